@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Local fixture server for scrape_airline_codes.py.
+
+Serves /icao/<page> for the A-Z and 0-9 pages so the scraper can run offline.
+Pages come from a directory of saved HTML (as written by the scraper's
+--save-pages option, one <page>.html per page), or are rendered from
+AirlineCodes.csv when no directory is given. Connections are HTTP/1.1
+keep-alive, and the server counts requests and connections. Pages carry an
+ETag (content hash) and Last-Modified, and conditional GETs for an
+unchanged page get 304 Not Modified; set_page() changes a page in place.
+
+Usage:
+    python3 airline_fixture_server.py [--port 8644] [--pages DIR] [--fail-rate 0.1]
+    python3 scrape_airline_codes.py --base-url http://127.0.0.1:8644/icao
+"""
+
+import argparse
+import csv
+import hashlib
+import html
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+AIRLINE_CODES = SCRIPT_DIR / "AirlineCodes.csv"
+PAGES = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ") + list("0123456789")
+
+
+def render_page(airlines):
+    """Render airline rows as a page shaped like the airlinecodes.info tables."""
+    rows = "\n".join(
+        f"<tr><td>{html.escape(a['airlineCode'])}</td><td>{html.escape(a['iata'] or '-')}</td>"
+        f"<td>{html.escape(a['airlineName'])}</td></tr>"
+        for a in airlines
+    )
+    return ("<!DOCTYPE html>\n<html><head><title>Airline Codes</title></head><body>\n"
+            "<table>\n<tr><th>ICAO</th><th>IATA</th><th>Airline</th></tr>\n"
+            "<tr><td>ICAO</td><td>IATA</td><td>Airline</td></tr>\n"
+            f"{rows}\n</table>\n</body></html>\n")
+
+
+def load_pages(pages_dir=None, csv_path=AIRLINE_CODES):
+    """{page: html} from saved pages, or rendered from AirlineCodes.csv."""
+    if pages_dir is not None:
+        return {path.stem: path.read_text(encoding="utf-8")
+                for path in Path(pages_dir).glob("*.html")}
+
+    grouped = {page: [] for page in PAGES}
+    with open(csv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            first = row["airlineCode"][:1].upper()
+            if first in grouped:
+                grouped[first].append(row)
+    return {page: render_page(airlines) for page, airlines in grouped.items()}
+
+
+class FixtureServer:
+    """
+    Threaded fixture server, usable as a context manager.
+
+        with FixtureServer() as server:
+            scrape_pages(PAGES, base_url=server.base_url)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, pages=None, fail_rate=0.0, seed=None):
+        self.pages = {}
+        self.etags = {}
+        self.modified = {}
+        for page, body in (pages if pages is not None else load_pages()).items():
+            self.set_page(page, body)
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/icao"
+
+    def set_page(self, page, body, modified=None):
+        """Serve body for page, with a new ETag and Last-Modified time."""
+        self.pages[page] = body
+        self.etags[page] = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+        self.modified[page] = int(modified if modified is not None else time.time())
+
+    def not_modified(self, page, headers):
+        """True if a conditional request's validators still match page."""
+        if headers.get("If-None-Match"):
+            return self.etags[page] in [tag.strip() for tag in headers["If-None-Match"].split(",")]
+        if headers.get("If-Modified-Since"):
+            try:
+                since = parsedate_to_datetime(headers["If-Modified-Since"]).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.modified[page] <= since
+        return False
+
+    def _handler_class(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def setup(self):
+                super().setup()
+                with fixture.lock:
+                    fixture.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, page=None):
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                if page is not None:
+                    self.send_header("ETag", fixture.etags[page])
+                    self.send_header("Last-Modified", formatdate(fixture.modified[page], usegmt=True))
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                with fixture.lock:
+                    fixture.requests += 1
+                    fail = fixture.random.random() < fixture.fail_rate
+
+                page = self.path.rstrip("/").rsplit("/", 1)[-1]
+                if not self.path.startswith("/icao/") or page not in fixture.pages:
+                    self._send(404, "<html><body>Not Found</body></html>")
+                elif fail:
+                    self._send(503, "<html><body>Service Unavailable</body></html>")
+                elif fixture.not_modified(page, self.headers):
+                    self._send(304, "", page)
+                else:
+                    self._send(200, fixture.pages[page], page)
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve airlinecodes.info fixture pages locally.")
+    parser.add_argument("--port", type=int, default=8644)
+    parser.add_argument("--pages", type=Path, help="Directory of saved <page>.html files")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    args = parser.parse_args()
+
+    server = FixtureServer(port=args.port, pages=load_pages(args.pages), fail_rate=args.fail_rate)
+    print(f"Serving {len(server.pages)} pages at {server.base_url}/<page>")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped after {server.requests} requests on {server.connections} connections")
+
+
+if __name__ == "__main__":
+    main()
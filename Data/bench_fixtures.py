@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Synthetic FAA-scale input files for benchmark.py.
+
+The real inputs (FAA-Registered-Aircraft.csv, FAA-Manufacturer-Reference.csv,
+MasterAircraftList.csv and PlaneFinder's ICAOList.csv) are not in the repo.
+This writes stand-ins with the same column layouts at any row count. Rows are
+derived from ICAOCodes.csv, so a realistic share of registrations resolves to
+an ICAO code through find_icao(). Output is fully determined by the row count
+and the seed.
+
+Usage:
+    python3 bench_fixtures.py [--rows 100k] [--seed 8643] [--out DIR]
+"""
+
+import argparse
+import csv
+import random
+from pathlib import Path
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+ICAO_CODES = SCRIPT_DIR / "ICAOCodes.csv"
+DEFAULT_FIXTURE_DIR = SCRIPT_DIR / ".bench-fixtures"
+DEFAULT_SEED = 8643
+
+# Column layouts of the real files
+REGISTRY_COLUMNS = [
+    'REGISTRATION', 'SERIAL-NUMBER', 'MFR-CODE', 'ENG-MFR-CODE', 'YEAR-MFR',
+    'TYPE-REGISTRANT', 'NAME', 'STREET', 'CITY', 'STATE', 'ZIP-CODE', 'REGION',
+    'COUNTRY', 'LAST-ACTION-DATE', 'CERT-ISSUE-DATE', 'TYPE-ACFT', 'TYPE-ENG',
+    'STATUS-CODE', 'MODE-S-CODE', 'AIR-WORTH-DATE', 'EXPIRATION-DATE', 'MODE-S-CODE-HEX',
+]
+MANUFACTURER_COLUMNS = [
+    'MFR-CODE', 'MANUFACTURER', 'MODEL', 'TYPE-ACFT', 'TYPE-ENG', 'AC-CAT',
+    'BUILD-CERT-IND', 'NO-ENG', 'NO-SEATS', 'AC-WEIGHT', 'SPEED', 'TC-DATA-SHEET',
+    'TC-DATA-HOLDER',
+]
+MASTER_COLUMNS = ['ICAO', 'Manufacturer', 'Model', 'EngineType', 'NumEngines']
+ICAO_LIST_COLUMNS = ['ICAO', 'Class', 'Engines', 'Manufacturer, Model']
+
+# Fraction of synthetic manufacturer rows copied from a real ICAO type
+MATCHING_SHARE = 0.6
+
+CITIES = [("OSHKOSH", "WI"), ("WICHITA", "KS"), ("DENVER", "CO"), ("ANCHORAGE", "AK"),
+          ("PHOENIX", "AZ"), ("ORLANDO", "FL"), ("DALLAS", "TX"), ("SEATTLE", "WA"),
+          ("ATLANTA", "GA"), ("BOISE", "ID"), ("SPOKANE", "WA"), ("TULSA", "OK")]
+ENGINE_NAMES = {'0': 'Glider', '1': 'Piston', '2': 'Turboprop', '3': 'Turboprop/Turboshaft',
+                '4': 'Jet', '5': 'Jet', '9': 'Rocket', '10': 'Electric'}
+WEIGHT_CLASSES = ['CLASS 1', 'CLASS 2', 'CLASS 3', 'CLASS 4']
+WORDS = ['AERO', 'SKY', 'AIR', 'WING', 'JET', 'STAR', 'HAWK', 'EAGLE', 'CLOUD', 'NORTH',
+         'WEST', 'FALCON', 'CONDOR', 'RIVER', 'VALLEY', 'SUMMIT', 'PRAIRIE', 'COASTAL']
+
+
+def parse_rows(text):
+    """'10k' / '1M' / '2500' -> int."""
+    text = text.strip().lower().replace('_', '').replace(',', '')
+    multiplier = 1
+    if text.endswith('k'):
+        multiplier, text = 1_000, text[:-1]
+    elif text.endswith('m'):
+        multiplier, text = 1_000_000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def label_rows(rows):
+    """Inverse of parse_rows for round numbers (100000 -> '100k')."""
+    if rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}M"
+    if rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+def load_icao_types(path=ICAO_CODES):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def fake_name(rng, words=2):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def mfr_code(index):
+    return f"{index:07d}"
+
+
+def n_number(index):
+    """
+    Unique registration (without the N) for a row index, at most five
+    characters like a real N-number: 1-99999, then 1-9999 plus a letter,
+    then 1-999 plus two letters. Repeats after ~915k rows.
+    """
+    letters = 'ABCDEFGHJKLMNPQRSTUVWXYZ'
+    index %= 99_999 + 9_999 * 24 + 999 * 24 * 24
+    if index < 99_999:
+        return str(index + 1)
+    index -= 99_999
+    if index < 9_999 * 24:
+        return f"{index // 24 + 1}{letters[index % 24]}"
+    index -= 9_999 * 24
+    number, suffix = divmod(index, 24 * 24)
+    return f"{number + 1}{letters[suffix // 24]}{letters[suffix % 24]}"
+
+
+# =============================================================================
+# Writers
+# =============================================================================
+
+def write_manufacturer_reference(path, rows, types, rng):
+    """FAA-Manufacturer-Reference.csv: one row per MFR-CODE."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(MANUFACTURER_COLUMNS)
+        for i in range(rows):
+            if rng.random() < MATCHING_SHARE:
+                t = rng.choice(types)
+                manufacturer, model = t['manufacturer'], t['model'].upper()
+                type_acft, type_eng, no_eng = t['aircraftType'], t['engineType'], t['engineCount']
+            else:
+                manufacturer = fake_name(rng) + " AIRCRAFT"
+                model = f"{rng.choice(WORDS)}-{rng.randint(1, 999)}"
+                type_acft, type_eng, no_eng = rng.choice('4456'), rng.choice('1124'), str(rng.randint(1, 2))
+            writer.writerow([
+                mfr_code(i), manufacturer, model, type_acft, type_eng, rng.choice('1123'),
+                rng.choice('0123'), no_eng, str(rng.randint(1, 20)), rng.choice(WEIGHT_CLASSES),
+                str(rng.randint(0, 300)), f"A{rng.randint(1, 99)}CE", fake_name(rng),
+            ])
+
+
+def write_registry(path, rows, manufacturer_rows, rng):
+    """FAA-Registered-Aircraft.csv: registrations pointing at MFR-CODEs."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(REGISTRY_COLUMNS)
+        for i in range(rows):
+            city, state = rng.choice(CITIES)
+            mode_s = rng.randint(0, 0o77777777)
+            writer.writerow([
+                n_number(i), f"SN{rng.randint(1, 99999)}",
+                mfr_code(rng.randrange(manufacturer_rows)), f"{rng.randint(0, 99999):05d}",
+                str(rng.randint(1940, 2025)), rng.choice('12345789'), fake_name(rng, 3),
+                f"{rng.randint(1, 9999)} {rng.choice(WORDS)} RD", city, state,
+                f"{rng.randint(10000, 99999)}", rng.choice('1234567CES'), 'US',
+                '20250101', '20200101', rng.choice('4456'), rng.choice('1124'), 'V',
+                f"{mode_s:08o}", '20100101', '20280101', f"{mode_s:06X}",
+            ])
+
+
+def write_master_list(path, rows, types, rng):
+    """MasterAircraftList.csv: the real ICAO types first, then synthetic ones."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(MASTER_COLUMNS)
+        for i in range(rows):
+            if i < len(types):
+                t = types[i]
+                writer.writerow([t['icao'], t['manufacturer'].title(), t['model'],
+                                 ENGINE_NAMES.get(t['engineType'], 'Piston'), t['engineCount']])
+            else:
+                writer.writerow([f"Z{i:06X}"[-4:] if rng.random() < 0.9 else 'XXXX',
+                                 fake_name(rng).title(), f"{rng.choice(WORDS).title()} {rng.randint(1, 999)}",
+                                 rng.choice(['Piston', 'Jet', 'Turboprop']), str(rng.randint(1, 4))])
+
+
+def write_icao_list(path, rows, types, rng):
+    """PlaneFinder ICAOList.csv: ICAO, class, 'count/engine', 'MANUFACTURER, Model'."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(ICAO_LIST_COLUMNS)
+        for i in range(rows):
+            t = types[i % len(types)]
+            icao = t['icao'] if i < len(types) else f"{t['icao'][:2]}{i:X}"[:6]
+            engine = ENGINE_NAMES.get(t['engineType'], 'Piston')
+            writer.writerow([icao, t['icaoClass'], f"{t['engineCount']}/{engine}",
+                             f"{t['manufacturer']}, {t['model']}"])
+
+
+def fixture_paths(rows, seed=DEFAULT_SEED, out_dir=DEFAULT_FIXTURE_DIR):
+    base = Path(out_dir) / f"{label_rows(rows)}-seed{seed}"
+    return {
+        'dir': base,
+        'registry': base / "FAA-Registered-Aircraft.csv",
+        'manufacturer': base / "FAA-Manufacturer-Reference.csv",
+        'master': base / "MasterAircraftList.csv",
+        'icao_list': base / "ICAOList.csv",
+    }
+
+
+def build_fixtures(rows, seed=DEFAULT_SEED, out_dir=DEFAULT_FIXTURE_DIR, force=False):
+    """
+    Write (or reuse) the fixture set for a row count. Returns its paths.
+
+    Each file gets `rows` data rows. A set is reused when all of its files
+    exist, since the content only depends on rows and seed.
+    """
+    paths = fixture_paths(rows, seed, out_dir)
+    files = [p for key, p in paths.items() if key != 'dir']
+    if not force and all(p.exists() for p in files):
+        return paths
+
+    paths['dir'].mkdir(parents=True, exist_ok=True)
+    types = load_icao_types()
+    # Separate streams so one file's layout does not shift another's
+    write_manufacturer_reference(paths['manufacturer'], rows, types, random.Random(f"{seed}-mfr"))
+    write_registry(paths['registry'], rows, rows, random.Random(f"{seed}-registry"))
+    write_master_list(paths['master'], rows, types, random.Random(f"{seed}-master"))
+    write_icao_list(paths['icao_list'], rows, types, random.Random(f"{seed}-icao"))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic FAA-scale benchmark fixtures.")
+    parser.add_argument('--rows', default='100k', help="Data rows per file (e.g. 10k, 100k, 1M)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--out', type=Path, default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument('--force', action='store_true', help="Rewrite even if the set already exists")
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    paths = build_fixtures(rows, args.seed, args.out, args.force)
+    print(f"Fixtures ({rows:,} rows each) in {paths['dir']}:")
+    for key, path in paths.items():
+        if key != 'dir':
+            print(f"  {path.name}: {path.stat().st_size:,} bytes")
+
+
+if __name__ == '__main__':
+    main()
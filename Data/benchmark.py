@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Data pipeline.
+
+Times the pipeline stages against synthetic FAA-scale fixtures
+(bench_fixtures.py) at each requested size, and writes the timings as JSON
+so two runs can be compared for regressions:
+
+    load_manufacturer_reference   FAA-Manufacturer-Reference.csv, N rows
+    load_icao_mapping             MasterAircraftList.csv, N rows
+    find_icao                     up to FIND_ICAO_LOOKUPS lookups with an IcaoMatcher
+    generate_test_data            2000 records from an N-row registry, no cache
+    generate_icao_codes           ICAOList.csv, N rows
+    table_parser                  parse_airlines() on an N-row airline page
+    add_copyright_to_svg          one SVG with N / 10 paths
+
+The scripts read module-level paths, so each benchmark points them at the
+fixture files for its duration; the real Data/ outputs are never touched.
+Script output is discarded while timing.
+
+Usage:
+    python3 benchmark.py [--sizes 10k,100k,1M] [--repeat 3] [--output bench.json]
+    python3 benchmark.py --compare baseline.json [--threshold 0.15]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import bench_fixtures
+import generate_icao_codes
+import generate_test_data as gtd
+from airline_fixture_server import AIRLINE_CODES, render_page
+from icao_matcher import IcaoMatcher
+from scrape_airline_codes import parse_airlines
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "xCode/iOS_APP/Airplane-ID/scripts"))
+from add_copyright import add_copyright_to_svg  # noqa: E402
+
+# Configuration
+DEFAULT_SIZES = "10k,100k,1M"
+DEFAULT_OUTPUT = Path(__file__).parent / "benchmark-results.json"
+DEFAULT_THRESHOLD = 0.15  # Allowed slowdown of the best time before a regression is reported
+FIND_ICAO_LOOKUPS = 10_000
+TEST_DATA_COUNT = 2000
+SVG_PATHS_PER_ROW = 0.1
+
+
+@contextlib.contextmanager
+def patched(module, **values):
+    """Temporarily replace module globals."""
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+@contextlib.contextmanager
+def fixture_inputs(paths, work_dir):
+    """Point generate_test_data and generate_icao_codes at a fixture set."""
+    with patched(gtd,
+                 FAA_AIRCRAFT=paths['registry'],
+                 FAA_MANUFACTURER=paths['manufacturer'],
+                 ICAO_MASTER=paths['master'],
+                 OUTPUT_FILE=work_dir / "AirplaneID-TestData.csv",
+                 ICAO_RESOLUTION_CACHE=work_dir / "icao-cache.json",
+                 REFERENCE_BUNDLE=work_dir / "no-reference.bundle"), \
+         patched(generate_icao_codes,
+                 INPUT_FILE=paths['icao_list'],
+                 OUTPUT_FILE=work_dir / "ICAOCodes.csv"):
+        yield
+
+
+def time_call(func, repeat, setup=None):
+    """Run func `repeat` times with output discarded; returns seconds per run."""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(arg) if setup else func()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+# =============================================================================
+# Benchmarks
+# =============================================================================
+
+def bench_find_icao(rows, repeat):
+    manufacturers = gtd.load_manufacturer_reference()
+    icao_map, icao_by_model = gtd.load_icao_mapping()
+    matcher = IcaoMatcher(icao_map)
+    step = max(1, len(manufacturers) // FIND_ICAO_LOOKUPS)
+    sample = [(m.manufacturer, m.model) for m in list(manufacturers.values())[::step]]
+
+    def run():
+        for manufacturer, model in sample:
+            gtd.find_icao(manufacturer, model, icao_map, icao_by_model, matcher)
+
+    return len(sample), time_call(run, repeat)
+
+
+def airline_rows(rows):
+    """rows airline records, cycling the real list with unique codes."""
+    with open(AIRLINE_CODES, 'r', encoding='utf-8') as f:
+        real = list(csv.DictReader(f))
+    return [{'airlineCode': f"{real[i % len(real)]['airlineCode']}{i // len(real) or ''}",
+             'iata': real[i % len(real)]['iata'],
+             'airlineName': real[i % len(real)]['airlineName']}
+            for i in range(rows)]
+
+
+def bench_table_parser(rows, repeat):
+    page = render_page(airline_rows(rows))
+    return rows, time_call(lambda: parse_airlines(page), repeat)
+
+
+def synthetic_svg(paths):
+    body = "\n".join(
+        f'  <path d="M{i % 97}.5 {i % 89}.25l12.5 0l0 12.5l-12.5 0z" fill="#{i % 4096:03x}"/>'
+        for i in range(paths))
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 128 128">\n'
+            f"{body}\n</svg>\n")
+
+
+def bench_add_copyright(rows, repeat, work_dir):
+    paths = max(1, int(rows * SVG_PATHS_PER_ROW))
+    source = work_dir / "source.svg"
+    source.write_text(synthetic_svg(paths), encoding='utf-8')
+    target = work_dir / "icon.svg"
+
+    def fresh_copy():
+        shutil.copyfile(source, target)
+        return target
+
+    return paths, time_call(add_copyright_to_svg, repeat, setup=fresh_copy)
+
+
+def run_size(rows, repeat, fixtures_dir, only=None):
+    """Benchmark every stage at one fixture size. Returns result records."""
+    paths = bench_fixtures.build_fixtures(rows, out_dir=fixtures_dir)
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="airplane-id-bench-") as tmp:
+        work_dir = Path(tmp)
+        benchmarks = {
+            'load_manufacturer_reference': lambda: (rows, time_call(gtd.load_manufacturer_reference, repeat)),
+            'load_icao_mapping': lambda: (rows, time_call(gtd.load_icao_mapping, repeat)),
+            'find_icao': lambda: bench_find_icao(rows, repeat),
+            'generate_test_data': lambda: (rows, time_call(
+                lambda: gtd.generate_test_data(TEST_DATA_COUNT, use_cache=False, seed=8643), repeat)),
+            'generate_icao_codes': lambda: (rows, time_call(lambda: generate_icao_codes.main([]), repeat)),
+            'table_parser': lambda: bench_table_parser(rows, repeat),
+            'add_copyright_to_svg': lambda: bench_add_copyright(rows, repeat, work_dir),
+        }
+        with fixture_inputs(paths, work_dir):
+            for name, bench in benchmarks.items():
+                if only and name not in only:
+                    continue
+                items, times = bench()
+                best = min(times)
+                record = {
+                    'name': name,
+                    'size': bench_fixtures.label_rows(rows),
+                    'rows': rows,
+                    'items': items,
+                    'times': [round(t, 6) for t in times],
+                    'best': round(best, 6),
+                    'median': round(statistics.median(times), 6),
+                    'items_per_sec': round(items / best) if best else None,
+                }
+                results.append(record)
+                print(f"  {name:30} {record['best']:10.4f}s best  {record['median']:10.4f}s median"
+                      f"  {record['items']:>10,} items  {record['items_per_sec'] or 0:>12,}/s")
+    return results
+
+
+# =============================================================================
+# Results
+# =============================================================================
+
+def run_metadata(repeat):
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'seed': bench_fixtures.DEFAULT_SEED,
+    }
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare best times of benchmarks present in both runs.
+
+    Returns a list of {name, size, baseline, current, ratio, regression}
+    rows; a regression is a best time more than `threshold` slower.
+    """
+    old = {(r['name'], r['size']): r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        before = old.get((r['name'], r['size']))
+        if before is None or not before['best']:
+            continue
+        ratio = r['best'] / before['best']
+        rows.append({'name': r['name'], 'size': r['size'], 'baseline': before['best'],
+                     'current': r['best'], 'ratio': round(ratio, 3),
+                     'regression': ratio > 1 + threshold})
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print("\n" + "="*60)
+    print(f"COMPARISON WITH BASELINE (threshold +{threshold:.0%})")
+    print("="*60)
+    for row in rows:
+        flag = "  REGRESSION" if row['regression'] else ""
+        print(f"  {row['name']:30} {row['size']:>5}  {row['baseline']:9.4f}s -> {row['current']:9.4f}s"
+              f"  x{row['ratio']:.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Data pipeline on synthetic FAA-scale fixtures.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated fixture sizes (e.g. 10k,100k,1M)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per benchmark")
+    parser.add_argument('--only', help="Comma-separated benchmark names to run")
+    parser.add_argument('--fixtures-dir', type=Path, default=bench_fixtures.DEFAULT_FIXTURE_DIR,
+                        help="Where fixture sets are written and reused")
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT, help="Results JSON")
+    parser.add_argument('--compare', type=Path, help="Baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown (fraction of the baseline best time) reported as a regression")
+    args = parser.parse_args()
+
+    only = set(args.only.split(',')) if args.only else None
+    sizes = [bench_fixtures.parse_rows(s) for s in args.sizes.split(',')]
+
+    results = []
+    for rows in sizes:
+        print(f"Size {bench_fixtures.label_rows(rows)} ({rows:,} rows):")
+        results.extend(run_size(rows, args.repeat, args.fixtures_dir, only))
+
+    current = {'meta': run_metadata(args.repeat), 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), current, args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
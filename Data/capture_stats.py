@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Pre-aggregated capture statistics cube.
+
+The app's stats rescan every capture per view - uniqueTypesCount is
+Set(allAircraft.compactMap { $0.icao }).count, counts by date filter the
+whole collection. This rolls the captures up once into capture counts per
+value of every dimension and every pair of dimensions (a cuboid per
+combination), plus the number of distinct ICAO types per single-dimension
+value, so dashboard questions become dictionary lookups:
+
+    cube = StatsCube.load()
+    cube.count()                                  # total captures
+    cube.unique_types()                           # uniqueTypesCount
+    cube.unique_types(near_airport='KOSH')        # types seen at one airport
+    cube.count(icao='C172', year_month='2025-06') # one cell of a pair cuboid
+    cube.breakdown('date', year_month='2025-06')  # captures per day of a month
+
+Dimensions are the capture columns icao, manufacturer, engine_type,
+aircraft_type and near_airport, plus year, year_month and date derived from
+the capture date.
+
+The cube is saved to AirplaneID-Stats.json with the byte offset of the
+capture CSV it has consumed and hashes of the CSV's first block and of the
+block before that offset. While those still match, the CSV is taken to
+have only been appended to, and an update reads just the new rows and adds
+them (StatsCube.add() does the same for a single capture in memory).
+Otherwise the cube is rebuilt.
+
+Usage:
+    python3 capture_stats.py              # build or incrementally update AirplaneID-Stats.json
+    python3 capture_stats.py --rebuild    # rebuild from scratch
+    python3 capture_stats.py --benchmark  # query latency vs scanning the captures
+    [--captures CSV] [--output FILE] [--metrics-json FILE] [--profile FILE] [--trace-memory]
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from itertools import combinations
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # Optional: batches are counted with collections.Counter
+    np = None
+
+from instrumentation import add_arguments, instrumented
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+CAPTURES = SCRIPT_DIR / "AirplaneID-TestData.csv"
+OUTPUT_FILE = SCRIPT_DIR / "AirplaneID-Stats.json"
+FORMAT_VERSION = 1
+
+DIMENSIONS = ('icao', 'manufacturer', 'engine_type', 'aircraft_type', 'near_airport',
+              'year', 'year_month', 'date')
+
+# Materialized dimension combinations, each in DIMENSIONS order
+CUBOIDS = [()] + [(d,) for d in DIMENSIONS] + list(combinations(DIMENSIONS, 2))
+CUBOID_SET = set(CUBOIDS)
+# Combinations with a distinct-ICAO count (maintained from the cuboid plus icao)
+DISTINCT_CUBOIDS = [()] + [(d,) for d in DIMENSIONS if d != 'icao']
+
+# Capture CSV columns the dimensions are derived from
+CAPTURE_COLUMNS = ('icao', 'manufacturer', 'engine_type', 'aircraft_type', 'near_airport',
+                   'capture_date', 'year', 'month', 'day')
+
+# Bytes at the start of the capture CSV and before the consumed offset that
+# must be unchanged for an incremental update
+CHECK_BYTES = 64 * 1024
+# Capture CSV bytes aggregated per batch (about 80,000 rows)
+CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def capture_columns(fields, size):
+    """{dimension: [values]} from {CSV column: [values]} for a batch of captures."""
+    blank = [''] * size
+    icao, manufacturer, engine_type, aircraft_type, near_airport, dates, years, months, days = (
+        list(fields.get(name, blank)) for name in CAPTURE_COLUMNS)
+    dates = [date or (f"{year}-{int(month):02d}-{int(day):02d}" if year and month and day else '')
+             for date, year, month, day in zip(dates, years, months, days)]
+    return {
+        'icao': icao,
+        'manufacturer': manufacturer,
+        'engine_type': engine_type,
+        'aircraft_type': aircraft_type,
+        'near_airport': near_airport,
+        'year': [year or date[:4] for year, date in zip(years, dates)],
+        'year_month': [date[:7] for date in dates],
+        'date': dates,
+    }
+
+
+def capture_dimensions(row):
+    """{dimension: value} for one capture CSV row."""
+    return {d: values[0] for d, values in capture_columns({k: [v] for k, v in row.items()}, 1).items()}
+
+
+def cuboid_for(dimensions):
+    """The materialized cuboid (dimension tuple) for a set of dimension names."""
+    unknown = set(dimensions) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimension(s): {', '.join(sorted(unknown))}")
+    cuboid = tuple(d for d in DIMENSIONS if d in dimensions)
+    if cuboid not in CUBOID_SET:
+        raise ValueError(f"No precomputed aggregate for {', '.join(cuboid)}")
+    return cuboid
+
+
+def batch_counts(columns, size):
+    """Yield (cuboid, {values: captures}) for a batch of dimension columns."""
+    if np is None:
+        for cuboid in CUBOIDS:
+            yield cuboid, Counter(zip(*(columns[d] for d in cuboid))) if cuboid else {(): size}
+        return
+
+    # Encode each dimension as integer codes; a pair cuboid is then one
+    # np.unique over code_a * len(labels_b) + code_b
+    labels, codes = {}, {}
+    for d in DIMENSIONS:
+        unique, codes[d] = np.unique(np.array(columns[d], dtype=str), return_inverse=True)
+        labels[d] = unique.tolist()
+    for cuboid in CUBOIDS:
+        if not cuboid:
+            yield cuboid, {(): size}
+        elif len(cuboid) == 1:
+            counts = np.bincount(codes[cuboid[0]]).tolist()
+            yield cuboid, {(value,): n for value, n in zip(labels[cuboid[0]], counts)}
+        else:
+            a, b = cuboid
+            width = len(labels[b])
+            keys, counts = np.unique(codes[a].astype(np.int64) * width + codes[b], return_counts=True)
+            la, lb = labels[a], labels[b]
+            yield cuboid, {(la[k // width], lb[k % width]): n
+                           for k, n in zip(keys.tolist(), counts.tolist())}
+
+
+class StatsCube:
+    """Capture counts per cuboid cell, plus distinct ICAO counts."""
+
+    def __init__(self):
+        self.counts = {cuboid: {} for cuboid in CUBOIDS}      # cuboid -> {values: captures}
+        self.distinct = {cuboid: {} for cuboid in DISTINCT_CUBOIDS}  # cuboid -> {values: types}
+        self.source = {}  # Capture CSV consumed so far, see source_state()
+        self._groups = {}  # (cuboid, dimension) -> grouped cells, see _group()
+
+    def add(self, row):
+        """Add one capture (a CSV row dict)."""
+        self.add_many([row])
+
+    def add_many(self, rows):
+        """Add captures (CSV row dicts)."""
+        rows = list(rows)
+        self.add_columns({name: [row.get(name, '') for row in rows] for name in CAPTURE_COLUMNS}, len(rows))
+
+    def add_columns(self, fields, size):
+        """
+        Add a batch of captures given as {CSV column: [values]}. Each cuboid
+        is counted over the whole batch first and then merged, so the
+        dictionary updates are per cell rather than per capture.
+        """
+        if not size:
+            return
+        self._groups.clear()
+        for cuboid, batch in batch_counts(capture_columns(fields, size), size):
+            cells = self.counts[cuboid]
+            distinct, position = None, None
+            if 'icao' in cuboid:
+                distinct = self.distinct.get(tuple(d for d in cuboid if d != 'icao'))
+                position = cuboid.index('icao')
+            for key, n in batch.items():
+                previous = cells.get(key, 0)
+                cells[key] = previous + n
+                # A new (..., icao) cell is a new type for the same cell without
+                # icao; captures without a type don't count, like compactMap
+                if not previous and distinct is not None and key[position]:
+                    rest_key = tuple(v for d, v in zip(cuboid, key) if d != 'icao')
+                    distinct[rest_key] = distinct.get(rest_key, 0) + 1
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def count(self, **filters):
+        """Captures matching dimension=value filters (at most two dimensions)."""
+        cuboid = cuboid_for(filters)
+        return self.counts[cuboid].get(tuple(filters[d] for d in cuboid), 0)
+
+    def unique_types(self, **filters):
+        """Distinct ICAO types among captures matching at most one filter."""
+        cuboid = cuboid_for(filters)
+        if cuboid == ('icao',):
+            return 1 if filters['icao'] and self.count(**filters) else 0
+        if cuboid not in self.distinct:
+            raise ValueError(f"No distinct-type count for {', '.join(cuboid)}")
+        return self.distinct[cuboid].get(tuple(filters[d] for d in cuboid), 0)
+
+    def values(self, dimension):
+        """All values seen for a dimension."""
+        return [key[0] for key in self.counts[cuboid_for([dimension])]]
+
+    def breakdown(self, dimension, top=None, **filters):
+        """
+        [(value, captures)] of a dimension under at most one filter, most
+        captures first (ties by value). Filtered breakdowns read a grouping
+        of the pair cuboid built on first use, so the cost is the size of
+        the answer, not a scan of the captures.
+        """
+        cuboid = cuboid_for([dimension, *filters])
+        if filters:
+            (name, value), = filters.items()
+            cells = self._group(cuboid, name).get(value, {})
+        else:
+            cells = {key[0]: n for key, n in self.counts[cuboid].items()}
+        results = sorted(cells.items(), key=lambda item: (-item[1], item[0]))
+        return results[:top] if top else results
+
+    def _group(self, cuboid, name):
+        """{value of name: {value of the other dimension: captures}} for a pair cuboid."""
+        groups = self._groups.get((cuboid, name))
+        if groups is None:
+            position = cuboid.index(name)
+            groups = {}
+            for key, n in self.counts[cuboid].items():
+                groups.setdefault(key[position], {})[key[1 - position]] = n
+            self._groups[(cuboid, name)] = groups
+        return groups
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            'version': FORMAT_VERSION,
+            'captures': self.count(),
+            'source': self.source,
+            'dimensions': list(DIMENSIONS),
+            'cuboids': [','.join(cuboid) for cuboid in CUBOIDS],
+            'counts': {','.join(cuboid): [[*key, n] for key, n in sorted(cells.items())]
+                       for cuboid, cells in self.counts.items()},
+            'distinct_icao': {','.join(cuboid): [[*key, n] for key, n in sorted(cells.items())]
+                              for cuboid, cells in self.distinct.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if (data.get('version') != FORMAT_VERSION or data.get('dimensions') != list(DIMENSIONS)
+                or data.get('cuboids') != [','.join(cuboid) for cuboid in CUBOIDS]):
+            raise ValueError("Stats file was built with a different cube layout")
+        cube = cls()
+        cube.source = data.get('source', {})
+        for table, field in ((cube.counts, 'counts'), (cube.distinct, 'distinct_icao')):
+            for name, rows in data[field].items():
+                cuboid = tuple(name.split(',')) if name else ()
+                table[cuboid] = {tuple(row[:-1]): row[-1] for row in rows}
+        return cube
+
+    def save(self, path=OUTPUT_FILE):
+        tmp_file = Path(path).with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path=OUTPUT_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+# =============================================================================
+# Building from the capture CSV
+# =============================================================================
+
+def block_sha256(f, start, end):
+    """SHA-256 of bytes [start, end) of an open binary file."""
+    f.seek(start)
+    return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+def source_state(path, f, offset):
+    """The cube's source record for having consumed path up to offset."""
+    return {
+        'file': Path(path).name,
+        'offset': offset,
+        'head_sha256': block_sha256(f, 0, min(offset, CHECK_BYTES)),
+        'tail_sha256': block_sha256(f, max(0, offset - CHECK_BYTES), offset),
+    }
+
+
+def record_end(data):
+    """
+    Length of the complete CSV records at the start of data: up to the last
+    newline outside a quoted field (an even number of quotes before it).
+    """
+    cut = data.rfind(b'\n') + 1
+    while cut and data.count(b'"', 0, cut) % 2:
+        cut = data.rfind(b'\n', 0, cut - 1) + 1
+    return cut
+
+
+def consume(cube, path, offset=0, progress=None):
+    """
+    Add the complete rows of a capture CSV after byte offset (0 = whole file)
+    to cube and record the new offset. Returns the number of rows added.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        fieldnames = next(csv.reader([header.decode('utf-8-sig')]))
+        width = len(fieldnames)
+        f.seek(max(offset, len(header)))
+        end = f.tell()
+
+        added = 0
+        pending = b''
+        while chunk := f.read(CHUNK_BYTES):
+            # Only whole records; a partly written last row is left for the next update
+            chunk = pending + chunk
+            cut = record_end(chunk)
+            pending = chunk[cut:]
+            if not cut:
+                continue
+            end += cut
+            reader = csv.reader(io.StringIO(chunk[:cut].decode('utf-8'), newline=''))
+            # Short rows are padded (and long ones cut) so columns stay aligned
+            batch = [row if len(row) == width else (row + [''] * width)[:width] for row in reader if row]
+            cube.add_columns(dict(zip(fieldnames, zip(*batch))), len(batch))
+            added += len(batch)
+            if progress is not None:
+                progress.advance(len(batch))
+        cube.source = source_state(path, f, end)
+    return added
+
+
+def can_append(cube, path):
+    """
+    True if path looks like the file the cube consumed, only appended to
+    since. This is a spot check, not a hash of the whole consumed prefix:
+    the first and the last CHECK_BYTES before the consumed offset (header
+    included) must be unchanged.
+    """
+    offset = cube.source.get('offset')
+    if not offset or cube.source.get('file') != Path(path).name or os.path.getsize(path) < offset:
+        return False
+    with open(path, 'rb') as f:
+        return source_state(path, f, offset) == cube.source
+
+
+def update_stats(captures=CAPTURES, output_file=OUTPUT_FILE, rebuild=False, progress=None):
+    """Build or incrementally update the stats file. Returns (cube, rows added, incremental)."""
+    cube = None
+    if not rebuild and Path(output_file).exists():
+        try:
+            cube = StatsCube.load(output_file)
+        except (OSError, ValueError, KeyError):
+            cube = None  # Unreadable or old layout - rebuild below
+    incremental = cube is not None and can_append(cube, captures)
+    if not incremental:
+        cube = StatsCube()
+
+    added = consume(cube, captures, cube.source.get('offset', 0) if incremental else 0, progress)
+    cube.save(output_file)
+    return cube, added, incremental
+
+
+# =============================================================================
+# Command line
+# =============================================================================
+
+def print_dashboard(cube):
+    print(f"  Captures:          {cube.count():,}")
+    print(f"  Unique types:      {cube.unique_types():,}")
+    print("  Top types:         " + ', '.join(f"{v} ({n})" for v, n in cube.breakdown('icao', top=5)))
+    print("  Top airports:      " + ', '.join(f"{v} ({n})" for v, n in cube.breakdown('near_airport', top=5)))
+    months = sorted(cube.breakdown('year_month'))
+    print("  By month:          " + ', '.join(f"{v}: {n}" for v, n in months[-6:]))
+    if months:
+        airport = cube.breakdown('near_airport', top=1)[0][0]
+        print(f"  Types at {airport}:     {cube.unique_types(near_airport=airport)}")
+
+
+def benchmark(cube, captures, repeat=200):
+    """Median latency of dashboard queries from the cube vs scanning the capture rows."""
+    with open(captures, 'r', encoding='utf-8') as f:
+        rows = [capture_dimensions(row) for row in csv.DictReader(f)]
+    month = cube.breakdown('year_month', top=1)[0][0]
+    airport = cube.breakdown('near_airport', top=1)[0][0]
+    icao = cube.breakdown('icao', top=1)[0][0]
+
+    queries = [
+        ("unique types", lambda: cube.unique_types(),
+         lambda: len({r['icao'] for r in rows if r['icao']})),
+        ("captures in a month", lambda: cube.count(year_month=month),
+         lambda: sum(1 for r in rows if r['year_month'] == month)),
+        ("type at airport", lambda: cube.count(icao=icao, near_airport=airport),
+         lambda: sum(1 for r in rows if r['icao'] == icao and r['near_airport'] == airport)),
+        ("types at airport", lambda: cube.unique_types(near_airport=airport),
+         lambda: len({r['icao'] for r in rows if r['near_airport'] == airport})),
+        ("captures per day", lambda: cube.breakdown('date', year_month=month),
+         lambda: Counter(r['date'] for r in rows if r['year_month'] == month).most_common()),
+    ]
+    print(f"\nQuery latency over {len(rows):,} captures (median of {repeat}):")
+    print(f"  {'query':22} {'cube':>10} {'scan':>10}")
+    for name, from_cube, from_scan in queries:
+        timings = []
+        for func in (from_cube, from_scan):
+            samples = []
+            for _ in range(repeat if func is from_cube else max(3, repeat // 20)):
+                start = time.perf_counter()
+                func()
+                samples.append(time.perf_counter() - start)
+            timings.append(statistics.median(samples) * 1e6)
+        print(f"  {name:22} {timings[0]:8.1f}us {timings[1]:8.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pre-aggregated capture statistics cube.")
+    parser.add_argument('--captures', type=Path, default=CAPTURES, help="Capture CSV (generate_test_data.py output)")
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE, help="Stats file to write")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild instead of adding appended captures")
+    parser.add_argument('--benchmark', action='store_true', help="Compare query latency with scanning")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.captures.exists():
+        print(f"Error: {args.captures} not found")
+        sys.exit(1)
+
+    with instrumented('capture_stats', args) as metrics:
+        with metrics.stage('aggregate', unit='captures', progress_every=100_000) as stage:
+            cube, added, incremental = update_stats(args.captures, args.output, args.rebuild, stage)
+        mode = "Added" if incremental else "Aggregated"
+        print(f"{mode} {added:,} captures -> {args.output} "
+              f"({sum(map(len, cube.counts.values())):,} cells in {len(CUBOIDS)} cuboids)")
+        metrics.set('added', added)
+        metrics.set('incremental', incremental)
+        print_dashboard(cube)
+        if args.benchmark:
+            with metrics.stage('benchmark'):
+                benchmark(cube, args.captures)
+
+
+if __name__ == '__main__':
+    main()
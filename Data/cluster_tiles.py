@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Precompute zoom-level marker clusters as map tiles.
+
+The Map page places one annotation per captured aircraft, which stops
+scaling once a Hangar holds thousands of captures. This clusters the
+captures offline, supercluster-style, into a fixed hierarchy of grid cells:
+at zoom z the Web Mercator world is split into 2^(z + CELL_BITS) cells per
+side (CLUSTER_PIXELS-wide cells on 256px tiles), every non-empty cell is one
+marker, and each zoom's cells are built by merging the four child cells of
+the zoom below, so the whole pyramid costs one pass over the captures plus
+one pass per zoom over the clusters.
+
+Each marker carries its capture count, the count-weighted centroid of its
+captures and the most frequent ICAO codes among them; a single capture also
+carries its registration. Markers are written per tile:
+
+    ClusterTiles/index.json          zoom range, cell size, tile counts
+    ClusterTiles/{z}/{x}/{y}.json    {"z", "x", "y", "fields", "clusters"}
+
+where each cluster is [latitude, longitude, count, [top ICAO codes], registration].
+A tile holds at most (256 / CLUSTER_PIXELS)^2 markers, whatever the number of captures.
+
+Usage:
+    python3 cluster_tiles.py                        # tiles for AirplaneID-TestData.csv
+    python3 cluster_tiles.py --captures FILE --output DIR [--max-zoom 14]
+    python3 cluster_tiles.py --benchmark            # 2k, 100k and 1M synthetic captures
+    [--metrics-json FILE] [--profile FILE] [--trace-memory]
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # Optional: clustering falls back to dict aggregation
+    np = None
+
+from generate_test_data import random_captures
+from instrumentation import add_arguments, instrumented
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+CAPTURES = SCRIPT_DIR / "AirplaneID-TestData.csv"
+OUTPUT_DIR = SCRIPT_DIR / "ClusterTiles"
+
+TILE_PIXELS = 256
+CLUSTER_PIXELS = 64
+CELL_BITS = int(math.log2(TILE_PIXELS // CLUSTER_PIXELS))  # Cells per tile side = 2^CELL_BITS
+MIN_ZOOM = 0
+MAX_ZOOM = 14
+TOP_ICAO = 3
+MAX_LATITUDE = 85.05112878  # Web Mercator limit
+
+FIELDS = ['latitude', 'longitude', 'count', 'icao', 'registration']
+BENCHMARK_SIZES = [2_000, 100_000, 1_000_000]
+
+
+# =============================================================================
+# Projection
+# =============================================================================
+
+def mercator(latitude, longitude):
+    """Web Mercator (x, y) in [0, 1], y growing southwards."""
+    sin = math.sin(math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))))
+    return (longitude + 180) / 360, 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+
+
+def unmercator(x, y):
+    """(latitude, longitude) of a Web Mercator point."""
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))), x * 360 - 180
+
+
+# =============================================================================
+# Clustering
+# =============================================================================
+
+class ClusterLevel:
+    """
+    Clusters of one zoom: parallel arrays (NumPy) or lists, one entry per
+    non-empty cell.
+
+    cells    cell id, cx * side + cy, side = 2^(zoom + CELL_BITS)
+    count    captures in the cluster
+    sum_x    sum of capture Mercator x (centroid = sum_x / count)
+    sum_y    sum of capture Mercator y
+    first    index of the cluster's first capture (its registration if count == 1)
+    icao     (cluster, ICAO id, count) rows, as three arrays or a Counter per cluster
+    """
+
+    def __init__(self, zoom, cells, count, sum_x, sum_y, first, icao):
+        self.zoom = zoom
+        self.cells = cells
+        self.count = count
+        self.sum_x = sum_x
+        self.sum_y = sum_y
+        self.first = first
+        self.icao = icao
+
+    @property
+    def side(self):
+        return 1 << (self.zoom + CELL_BITS)
+
+    def __len__(self):
+        return len(self.cells)
+
+
+def _base_level(xs, ys, icao_ids, zoom):
+    """Bucket captures into the cells of the deepest zoom."""
+    side = 1 << (zoom + CELL_BITS)
+    if np is not None:
+        cx = np.clip((xs * side).astype(np.int64), 0, side - 1)
+        cy = np.clip((ys * side).astype(np.int64), 0, side - 1)
+        cells, inverse = np.unique(cx * side + cy, return_inverse=True)
+        first = np.full(len(cells), len(xs), dtype=np.int64)
+        np.minimum.at(first, inverse, np.arange(len(xs)))
+        width = int(icao_ids.max()) + 1 if len(icao_ids) else 1
+        pairs, pair_counts = np.unique(inverse * width + icao_ids, return_counts=True)
+        return ClusterLevel(zoom, cells, np.bincount(inverse), np.bincount(inverse, xs),
+                            np.bincount(inverse, ys), first,
+                            (pairs // width, pairs % width, pair_counts))
+
+    clusters = {}
+    for i, (x, y, icao) in enumerate(zip(xs, ys, icao_ids)):
+        cell = min(side - 1, int(x * side)) * side + min(side - 1, int(y * side))
+        cluster = clusters.get(cell)
+        if cluster is None:
+            cluster = clusters[cell] = [0, 0.0, 0.0, i, Counter()]
+        cluster[0] += 1
+        cluster[1] += x
+        cluster[2] += y
+        cluster[4][icao] += 1
+    return _level_from_dict(zoom, clusters)
+
+
+def _level_from_dict(zoom, clusters):
+    cells = sorted(clusters)
+    values = [clusters[cell] for cell in cells]
+    return ClusterLevel(zoom, cells, [v[0] for v in values], [v[1] for v in values],
+                        [v[2] for v in values], [v[3] for v in values], [v[4] for v in values])
+
+
+def _parent_level(level):
+    """Merge each 2x2 block of cells into the cell of the zoom above."""
+    side = level.side
+    parent_side = side >> 1
+    if np is not None:
+        parents = (level.cells // side >> 1) * parent_side + (level.cells % side >> 1)
+        cells, inverse = np.unique(parents, return_inverse=True)
+        first = np.full(len(cells), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first, inverse, level.first)
+        clusters, icao_ids, counts = level.icao
+        width = int(icao_ids.max()) + 1 if len(icao_ids) else 1
+        pairs, pair_inverse = np.unique(inverse[clusters] * width + icao_ids, return_inverse=True)
+        return ClusterLevel(level.zoom - 1, cells, np.bincount(inverse, level.count).astype(np.int64),
+                            np.bincount(inverse, level.sum_x), np.bincount(inverse, level.sum_y), first,
+                            (pairs // width, pairs % width, np.bincount(pair_inverse, counts).astype(np.int64)))
+
+    clusters = {}
+    for cell, count, sum_x, sum_y, first, icao in zip(level.cells, level.count, level.sum_x,
+                                                      level.sum_y, level.first, level.icao):
+        parent = (cell // side >> 1) * parent_side + (cell % side >> 1)
+        cluster = clusters.get(parent)
+        if cluster is None:
+            cluster = clusters[parent] = [0, 0.0, 0.0, first, Counter()]
+        cluster[0] += count
+        cluster[1] += sum_x
+        cluster[2] += sum_y
+        cluster[3] = min(cluster[3], first)
+        cluster[4].update(icao)
+    return _level_from_dict(level.zoom - 1, clusters)
+
+
+def _top_icao(level, icao_codes):
+    """Most frequent ICAO codes per cluster (ties by code order), as lists of strings."""
+    if np is not None:
+        clusters, icao_ids, counts = level.icao
+        order = np.lexsort((icao_ids, -counts, clusters))
+        clusters, icao_ids = clusters[order], icao_ids[order]
+        starts = np.searchsorted(clusters, np.arange(len(level)))
+        rank = np.arange(len(clusters)) - starts[clusters]
+        keep = rank < TOP_ICAO
+        top = [[] for _ in range(len(level))]
+        for cluster, icao_id in zip(clusters[keep].tolist(), icao_ids[keep].tolist()):
+            top[cluster].append(icao_codes[icao_id])
+        return top
+    return [[icao_codes[i] for i, _ in sorted(counter.items(), key=lambda item: (-item[1], item[0]))[:TOP_ICAO]]
+            for counter in level.icao]
+
+
+def cluster_levels(latitudes, longitudes, icao, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """Yield (ClusterLevel, ICAO codes) from max_zoom up to min_zoom."""
+    icao_codes = sorted(set(icao))
+    icao_index = {code: i for i, code in enumerate(icao_codes)}
+    if np is not None:
+        lats = np.clip(np.asarray(latitudes, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE)
+        xs = (np.asarray(longitudes, dtype=np.float64) + 180) / 360
+        sin = np.sin(np.radians(lats))
+        ys = 0.5 - np.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+        icao_ids = np.array([icao_index[code] for code in icao], dtype=np.int64)
+    else:
+        xs, ys = zip(*(mercator(lat, lon) for lat, lon in zip(latitudes, longitudes))) if icao else ((), ())
+        icao_ids = [icao_index[code] for code in icao]
+
+    level = _base_level(xs, ys, icao_ids, max_zoom)
+    while True:
+        yield level, icao_codes
+        if level.zoom <= min_zoom:
+            break
+        level = _parent_level(level)
+
+
+# =============================================================================
+# Tiles
+# =============================================================================
+
+def level_tiles(level, icao_codes, registrations):
+    """{(x, y): [cluster rows]} for one zoom."""
+    side = level.side
+    top = _top_icao(level, icao_codes)
+    cells = level.cells.tolist() if np is not None else level.cells
+    count = level.count.tolist() if np is not None else level.count
+    sum_x = level.sum_x.tolist() if np is not None else level.sum_x
+    sum_y = level.sum_y.tolist() if np is not None else level.sum_y
+    first = level.first.tolist() if np is not None else level.first
+
+    tiles = {}
+    for i, cell in enumerate(cells):
+        cx, cy = divmod(cell, side)
+        latitude, longitude = unmercator(sum_x[i] / count[i], sum_y[i] / count[i])
+        row = [round(latitude, 6), round(longitude, 6), count[i], top[i],
+               registrations[first[i]] if count[i] == 1 else None]
+        tiles.setdefault((cx >> CELL_BITS, cy >> CELL_BITS), []).append(row)
+    return tiles
+
+
+def write_tiles(output_dir, latitudes, longitudes, icao, registrations,
+                min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, metrics=None):
+    """
+    Cluster captures and write the tile pyramid to output_dir (replacing it).
+
+    Written to a sibling temp directory and swapped in, so readers never see
+    a half-written pyramid. Returns the index.json dict.
+    """
+    output_dir = Path(output_dir)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{output_dir.name}-", dir=output_dir.parent))
+    zooms = {}
+    try:
+        for level, icao_codes in cluster_levels(latitudes, longitudes, icao, min_zoom, max_zoom):
+            tiles = level_tiles(level, icao_codes, registrations)
+            sizes = []
+            for (x, y), rows in tiles.items():
+                tile_dir = tmp_dir / str(level.zoom) / str(x)
+                tile_dir.mkdir(parents=True, exist_ok=True)
+                data = json.dumps({'z': level.zoom, 'x': x, 'y': y, 'fields': FIELDS, 'clusters': rows},
+                                  separators=(',', ':'))
+                (tile_dir / f"{y}.json").write_text(data, encoding='utf-8')
+                sizes.append(len(data))
+            zooms[level.zoom] = {
+                'tiles': len(tiles),
+                'clusters': len(level),
+                'bytes': sum(sizes),
+                'max_tile_bytes': max(sizes, default=0),
+                'max_tile_clusters': max(map(len, tiles.values()), default=0),
+            }
+            if metrics is not None:
+                metrics.count('tiles', len(tiles))
+
+        index = {
+            'captures': len(icao),
+            'min_zoom': min_zoom,
+            'max_zoom': max_zoom,
+            'tile_pixels': TILE_PIXELS,
+            'cluster_pixels': CLUSTER_PIXELS,
+            'fields': FIELDS,
+            'zooms': {str(z): zooms[z] for z in sorted(zooms)},
+        }
+        with open(tmp_dir / "index.json", 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+
+        if output_dir.exists():
+            old_dir = output_dir.with_name(f".{output_dir.name}-old")
+            os.replace(output_dir, old_dir)
+            os.replace(tmp_dir, output_dir)
+            shutil.rmtree(old_dir)
+        else:
+            os.replace(tmp_dir, output_dir)
+    finally:
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+    return index
+
+
+def read_captures(path):
+    """(latitudes, longitudes, icao, registrations) from a capture CSV."""
+    latitudes, longitudes, icao, registrations = [], [], [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            latitudes.append(float(row['latitude']))
+            longitudes.append(float(row['longitude']))
+            icao.append(row['icao'])
+            registrations.append(row['registration'])
+    return latitudes, longitudes, icao, registrations
+
+
+# =============================================================================
+# Command line
+# =============================================================================
+
+def benchmark(args, metrics):
+    """Build time and tile sizes for BENCHMARK_SIZES synthetic captures."""
+    # ICAO codes drawn with the test data's type frequencies
+    sample_icao = read_captures(args.captures)[2] if args.captures.exists() else ['C172']
+    rng = random.Random(8643)
+    np_rng = np.random.default_rng(8643) if np is not None else None
+    print(f"{'captures':>10} {'build':>8} {'tiles':>8} {'MB':>7} {'max tile':>9} {'markers z4':>11} {'max/tile':>9}")
+    for size in BENCHMARK_SIZES:
+        captures = random_captures(size, np_rng)
+        icao = [rng.choice(sample_icao) for _ in range(size)]
+        registrations = [f"N{n + 1}" for n in range(size)]
+        with tempfile.TemporaryDirectory() as work_dir:
+            with metrics.stage(f'build_{size}', unit='captures') as stage:
+                index = write_tiles(Path(work_dir) / "tiles", captures['latitude'], captures['longitude'],
+                                    icao, registrations, args.min_zoom, args.max_zoom)
+                stage.update(size)
+        zooms = index['zooms'].values()
+        print(f"{size:>10,} {stage.seconds:>7.2f}s {sum(z['tiles'] for z in zooms):>8,} "
+              f"{sum(z['bytes'] for z in zooms) / 1e6:>7.1f} {max(z['max_tile_bytes'] for z in zooms):>8,}B "
+              f"{index['zooms'].get('4', {}).get('clusters', 0):>11,} "
+              f"{max(z['max_tile_clusters'] for z in zooms):>9,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute zoom-level marker clusters as map tiles.")
+    parser.add_argument('--captures', type=Path, default=CAPTURES, help="Capture CSV (generate_test_data.py output)")
+    parser.add_argument('--output', type=Path, default=OUTPUT_DIR, help="Tile directory to write")
+    parser.add_argument('--min-zoom', type=int, default=MIN_ZOOM, help="Lowest zoom level")
+    parser.add_argument('--max-zoom', type=int, default=MAX_ZOOM, help="Highest zoom level")
+    parser.add_argument('--benchmark', action='store_true', help="Time 2k/100k/1M synthetic captures")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented('cluster_tiles', args) as metrics:
+        if args.benchmark:
+            benchmark(args, metrics)
+            return
+
+        if not args.captures.exists():
+            print(f"Error: {args.captures} not found")
+            sys.exit(1)
+        with metrics.stage('read_captures', unit='captures') as stage:
+            latitudes, longitudes, icao, registrations = read_captures(args.captures)
+            stage.update(len(icao))
+        print(f"Clustering {len(icao):,} captures, zoom {args.min_zoom}-{args.max_zoom}...")
+        with metrics.stage('write_tiles', unit='captures') as stage:
+            index = write_tiles(args.output, latitudes, longitudes, icao, registrations,
+                                args.min_zoom, args.max_zoom, metrics)
+            stage.update(len(icao))
+        for zoom, info in index['zooms'].items():
+            print(f"  z{zoom:>2}: {info['clusters']:>7,} markers in {info['tiles']:>6,} tiles "
+                  f"(max {info['max_tile_clusters']} per tile, {info['max_tile_bytes']:,} bytes)")
+        print(f"Done! {args.output}")
+
+
+if __name__ == '__main__':
+    main()
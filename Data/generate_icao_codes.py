@@ -6,15 +6,18 @@ Extracts aircraft type information for use in the Airplane-ID iOS app.
 Maps ICAO data to FAA classification codes for consistency.
 
 Usage:
-    python3 generate_icao_codes.py
+    python3 generate_icao_codes.py [--metrics-json FILE] [--profile FILE] [--trace-memory]
 
 Input:  ~/dev/projects/PlaneFinder/Aircraft/faa/ICAO/ICAOList.csv
 Output: ICAOCodes.csv (in same directory as this script)
 """
 
+import argparse
 import csv
 from pathlib import Path
 
+from instrumentation import Metrics, add_arguments, instrumented
+
 # Configuration
 INPUT_FILE = Path.home() / "dev/projects/PlaneFinder/Aircraft/faa/ICAO/ICAOList.csv"
 OUTPUT_FILE = Path(__file__).parent / "ICAOCodes.csv"
@@ -173,8 +176,9 @@ def derive_category_code(icao_class: str) -> int:
 # Main Processing
 # =============================================================================
 
-def main():
-    """Main function to process ICAO codes and generate CSV."""
+def build_icao_codes(metrics=None):
+    """Process ICAO codes and generate CSV."""
+    metrics = metrics or Metrics('generate_icao_codes')
     print(f"Reading from: {INPUT_FILE}")
     print(f"Output to: {OUTPUT_FILE}")
     print()
@@ -186,7 +190,8 @@ def main():
     records = []
     skipped = 0
 
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+    with metrics.stage('parse_input', unit='rows') as stage, \
+            open(INPUT_FILE, 'r', encoding='utf-8') as f:
         reader = csv.reader(f)
         header = next(reader)  # Skip header
         print(f"Input columns: {header}")
@@ -226,36 +231,42 @@ def main():
                 'engineCount': engine_count,
                 'engineType': engine_type_code,
             })
+        stage.update(len(records) + skipped)
 
     print(f"Parsed {len(records)} aircraft types")
     print(f"Skipped {skipped} invalid rows")
 
     # Remove duplicates (keep first occurrence)
-    seen_icao = set()
-    unique_records = []
-    duplicates = 0
-    for record in records:
-        if record['icao'] not in seen_icao:
-            seen_icao.add(record['icao'])
-            unique_records.append(record)
-        else:
-            duplicates += 1
+    with metrics.stage('dedupe', unit='records') as stage:
+        seen_icao = set()
+        unique_records = []
+        duplicates = 0
+        for record in records:
+            if record['icao'] not in seen_icao:
+                seen_icao.add(record['icao'])
+                unique_records.append(record)
+            else:
+                duplicates += 1
+        stage.update(len(records))
+    metrics.set('parsed', len(records))
+    metrics.set('skipped', skipped)
+    metrics.set('duplicates', duplicates)
 
     print(f"Removed {duplicates} duplicate ICAO codes")
     print(f"Final count: {len(unique_records)} unique aircraft types")
 
-    # Sort by ICAO code
-    unique_records.sort(key=lambda x: x['icao'])
-
-    # Write output CSV
+    # Sort by ICAO code and write output CSV
     print(f"\nWriting to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            'icao', 'manufacturer', 'model', 'icaoClass',
-            'aircraftCategoryCode', 'aircraftType', 'engineCount', 'engineType'
-        ])
-        writer.writeheader()
-        writer.writerows(unique_records)
+    with metrics.stage('write_output', unit='records') as stage:
+        unique_records.sort(key=lambda x: x['icao'])
+        with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=[
+                'icao', 'manufacturer', 'model', 'icaoClass',
+                'aircraftCategoryCode', 'aircraftType', 'engineCount', 'engineType'
+            ])
+            writer.writeheader()
+            writer.writerows(unique_records)
+        stage.update(len(unique_records))
 
     print("Done!")
 
@@ -303,5 +314,13 @@ def main():
         print(f"  {e} ({eng_names.get(e, 'Unknown')}): {count}")
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate ICAOCodes.csv from PlaneFinder's ICAOList.csv.")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    with instrumented('generate_icao_codes', args) as metrics:
+        build_icao_codes(metrics)
+
+
 if __name__ == "__main__":
     main()
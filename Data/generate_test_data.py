@@ -6,20 +6,47 @@ Combines FAA registration data with manufacturer reference and ICAO codes
 to create a realistic test dataset with GPS coordinates and timestamps.
 
 Usage:
-    python3 generate_test_data.py [--count 2000]
+    python3 generate_test_data.py [--count 2000] [--no-cache] [--workers N] [--seed N]
+                                  [--stream [--run-size N]]
+                                  [--metrics-json FILE] [--profile FILE] [--trace-memory]
 """
 
+import argparse
 import csv
+import hashlib
+import heapq
+import json
+import math
+import os
 import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:  # Optional: random_captures() falls back to the per-record helpers
+    np = None
+
+from icao_matcher import IcaoMatcher
+from instrumentation import Metrics, Stage, add_arguments, instrumented
+from reference_bundle import OUTPUT_FILE as REFERENCE_BUNDLE, ReferenceBundle
+from reference_records import aircraft_record, read_manufacturer_reference
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 FAA_AIRCRAFT = SCRIPT_DIR / "FAA-Registered-Aircraft.csv"
 FAA_MANUFACTURER = SCRIPT_DIR / "FAA-Manufacturer-Reference.csv"
 ICAO_MASTER = Path.home() / "dev/projects/PlaneFinder/Aircraft/faa/MasterAircraftList.csv"
 OUTPUT_FILE = SCRIPT_DIR / "AirplaneID-TestData.csv"
+ICAO_RESOLUTION_CACHE = SCRIPT_DIR / "FAA-Manufacturer-Reference.icao-cache.json"
+# Bump when find_icao(), its hints or IcaoMatcher change, so persisted
+# resolution tables built by the old rules are not reused
+ICAO_RESOLVER_VERSION = 1
+
+# Registry rows between progress lines
+PROGRESS_EVERY = 50_000
 
 # Major US airports with coordinates (for realistic GPS data)
 US_AIRPORTS = [
@@ -59,24 +86,20 @@ US_AIRPORTS = [
 
 
 def load_manufacturer_reference():
-    """Load FAA manufacturer reference into a dict keyed by MFR-CODE."""
-    manufacturers = {}
-    with open(FAA_MANUFACTURER, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            code = row.get('MFR-CODE', '').strip()
-            if code:
-                manufacturers[code] = {
-                    'manufacturer': row.get('MANUFACTURER', '').strip(),
-                    'model': row.get('MODEL', '').strip(),
-                    'type_acft': row.get('TYPE-ACFT', '').strip(),
-                    'type_eng': row.get('TYPE-ENG', '').strip(),
-                    'ac_cat': row.get('AC-CAT', '').strip(),  # Aircraft classification (1-9)
-                    'no_eng': row.get('NO-ENG', '').strip(),
-                    'no_seats': row.get('NO-SEATS', '').strip(),
-                    'ac_weight': row.get('AC-WEIGHT', '').strip(),
-                }
-    return manufacturers
+    """
+    Load FAA manufacturer reference as {MFR-CODE: ManufacturerRecord}.
+
+    If a compiled reference bundle (reference_bundle.py) is at least as new as
+    the CSV, its memory-mapped manufacturer table is returned instead; it
+    behaves like the dict (with the same records) but needs no parsing.
+    """
+    if REFERENCE_BUNDLE.exists() and (not FAA_MANUFACTURER.exists() or
+                                      REFERENCE_BUNDLE.stat().st_mtime >= FAA_MANUFACTURER.stat().st_mtime):
+        bundle = ReferenceBundle(REFERENCE_BUNDLE)
+        if 'manufacturer' in bundle:
+            return bundle.table('manufacturer')
+
+    return read_manufacturer_reference(FAA_MANUFACTURER)
 
 
 def load_icao_mapping():
@@ -110,8 +133,13 @@ def load_icao_mapping():
     return icao_map, icao_by_model
 
 
-def find_icao(manufacturer, model, icao_map, icao_by_model):
-    """Try to find ICAO code for an aircraft."""
+def find_icao(manufacturer, model, icao_map, icao_by_model, matcher=None):
+    """
+    Try to find ICAO code for an aircraft.
+
+    Pass an IcaoMatcher built from icao_map to resolve the partial-match tier
+    from its index instead of scanning every mapping entry.
+    """
     mfr_upper = manufacturer.upper().strip()
     model_upper = model.upper().strip()
 
@@ -121,10 +149,15 @@ def find_icao(manufacturer, model, icao_map, icao_by_model):
         return icao_map[key]
 
     # Try partial manufacturer match
-    for (map_mfr, map_model), icao in icao_map.items():
-        if map_mfr in mfr_upper or mfr_upper in map_mfr:
-            if map_model in model_upper or model_upper in map_model:
-                return icao
+    if matcher is not None:
+        icao = matcher.partial_match(mfr_upper, model_upper)
+        if icao:
+            return icao
+    else:
+        for (map_mfr, map_model), icao in icao_map.items():
+            if map_mfr in mfr_upper or mfr_upper in map_mfr:
+                if map_model in model_upper or model_upper in map_model:
+                    return icao
 
     # Try model keyword match
     model_words = model_upper.split()
@@ -163,6 +196,91 @@ def find_icao(manufacturer, model, icao_map, icao_by_model):
     return None
 
 
+def file_sha256(path):
+    """SHA256 of a file's bytes, or '' if the file does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return ''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IcaoResolution:
+    """
+    MFR-CODE -> ICAO resolution table.
+
+    find_icao() only depends on a registration's manufacturer and model, which
+    come from its MFR-CODE, so every code is resolved once up front and the
+    registry pass becomes a dictionary join. The table can be persisted beside
+    FAA-Manufacturer-Reference.csv, keyed by the content hashes of the
+    manufacturer reference and the ICAO master list it was built from and
+    by ICAO_RESOLVER_VERSION.
+    """
+
+    def __init__(self, resolved):
+        self.resolved = resolved  # MFR-CODE -> ICAO ('' if unresolved)
+        self.loaded_from_cache = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def build(cls, manufacturers, icao_map, icao_by_model, matcher=None):
+        """Resolve every manufacturer code with find_icao()."""
+        resolved = {}
+        for code, mfr_data in manufacturers.items():
+            icao = find_icao(mfr_data.manufacturer, mfr_data.model,
+                             icao_map, icao_by_model, matcher)
+            resolved[code] = icao or ''
+        return cls(resolved)
+
+    @classmethod
+    def load_or_build(cls, manufacturers, icao_map, icao_by_model, matcher=None,
+                      cache_file=None, persist=True):
+        """Reuse the persisted table if its key still matches, else rebuild it."""
+        cache_file = Path(cache_file or ICAO_RESOLUTION_CACHE)
+        key = {
+            'resolver_version': ICAO_RESOLVER_VERSION,
+            'manufacturer_sha256': file_sha256(FAA_MANUFACTURER),
+            'icao_master_sha256': file_sha256(ICAO_MASTER),
+        }
+
+        if persist and cache_file.exists():
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if all(cached.get(k) == v for k, v in key.items()):
+                    resolution = cls(cached['resolved'])
+                    resolution.loaded_from_cache = True
+                    return resolution
+            except (OSError, ValueError, KeyError):
+                pass  # Unreadable cache - rebuild below
+
+        resolution = cls.build(manufacturers, icao_map, icao_by_model, matcher)
+        if persist:
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({**key, 'resolved': resolution.resolved}, f)
+        return resolution
+
+    def __len__(self):
+        return len(self.resolved)
+
+    @property
+    def resolved_count(self):
+        return sum(1 for icao in self.resolved.values() if icao)
+
+    def lookup(self, mfr_code):
+        """Return the ICAO for a MFR-CODE (None if unknown or unresolved)."""
+        icao = self.resolved.get(mfr_code)
+        if icao:
+            self.hits += 1
+            return icao
+        self.misses += 1
+        return None
+
+
 def get_engine_type(type_eng_code):
     """Convert FAA engine type code to readable string."""
     engine_types = {
@@ -210,129 +328,484 @@ def random_date_last_year():
     return date
 
 
-def generate_test_data(count=2000):
+CAPTURE_COLUMNS = ['latitude', 'longitude', 'capture_date', 'capture_time',
+                   'year', 'month', 'day', 'near_airport']
+
+
+def random_captures(n, np_rng=None):
+    """
+    Generate GPS points and capture timestamps for n records at once.
+
+    Returns {column: list} for CAPTURE_COLUMNS, with the same distributions as
+    random_gps_near_airport() and random_date_last_year(). With NumPy the
+    whole batch is drawn and formatted as arrays; without it (or without
+    np_rng) the per-record helpers are called n times.
+    """
+    if np is None or np_rng is None:
+        columns = {column: [] for column in CAPTURE_COLUMNS}
+        for _ in range(n):
+            lat, lon, airport = random_gps_near_airport()
+            capture_date = random_date_last_year()
+            columns['latitude'].append(lat)
+            columns['longitude'].append(lon)
+            columns['capture_date'].append(capture_date.strftime('%Y-%m-%d'))
+            columns['capture_time'].append(capture_date.strftime('%H:%M:%S'))
+            columns['year'].append(capture_date.year)
+            columns['month'].append(capture_date.month)
+            columns['day'].append(capture_date.day)
+            columns['near_airport'].append(airport)
+        return columns
+
+    # GPS: random airport plus an offset within ~10 miles (0.15 degrees)
+    airport_codes = np.array([a[0] for a in US_AIRPORTS])
+    airport_lats = np.array([a[2] for a in US_AIRPORTS])
+    airport_lons = np.array([a[3] for a in US_AIRPORTS])
+    airports = np_rng.integers(0, len(US_AIRPORTS), n)
+    lats = np.round(airport_lats[airports] + np_rng.uniform(-0.15, 0.15, n), 6)
+    lons = np.round(airport_lons[airports] + np_rng.uniform(-0.15, 0.15, n), 6)
+
+    # Dates: triangular days ago (mode 30), random time between 06:00 and 22:59
+    today = np.datetime64(datetime.now().date(), 'D')
+    days_ago = np.floor(np_rng.triangular(0, 30, 365, n)).astype('timedelta64[D]')
+    dates = today - days_ago
+    seconds = (np_rng.integers(6, 23, n) * 3600 + np_rng.integers(0, 60, n) * 60
+               + np_rng.integers(0, 60, n)).astype('timedelta64[s]')
+    stamps = np.datetime_as_string(dates.astype('datetime64[s]') + seconds, unit='s')
+    date_part, _, time_part = np.char.partition(stamps, 'T').T
+
+    months = dates.astype('datetime64[M]')
+    return {
+        'latitude': lats.tolist(),
+        'longitude': lons.tolist(),
+        'capture_date': date_part.tolist(),
+        'capture_time': time_part.tolist(),
+        'year': (dates.astype('datetime64[Y]').astype(int) + 1970).tolist(),
+        'month': (months.astype(int) % 12 + 1).tolist(),
+        'day': ((dates - months).astype(int) + 1).tolist(),
+        'near_airport': airport_codes[airports].tolist(),
+    }
+
+
+# =============================================================================
+# Sampling
+# =============================================================================
+
+class ReservoirSampler:
+    """
+    Uniform fixed-size sample of a stream of unknown length (Algorithm L).
+
+    Memory is O(size) however long the stream is. Callers check wants() for
+    each stream item and only build the item for keep() when it returns True,
+    so items that will never be sampled cost nothing to construct.
+    """
+
+    def __init__(self, size, rng=random):
+        self.size = size
+        self.rng = rng
+        self.items = []
+        self.seen = 0
+        self._weight = 0.0
+        self._next = 0  # Set once the reservoir fills
+
+    def _uniform(self):
+        u = self.rng.random()
+        while u == 0.0:
+            u = self.rng.random()
+        return u
+
+    def _schedule_next(self):
+        """Draw the stream position of the next item to admit."""
+        self._weight *= math.exp(math.log(self._uniform()) / self.size)
+        gap = math.floor(math.log(self._uniform()) / math.log1p(-self._weight))
+        self._next = self.seen + gap + 1
+
+    def wants(self):
+        """Count one more stream item; True if it must be passed to keep()."""
+        self.seen += 1
+        return self.seen <= self.size or self.seen == self._next
+
+    def keep(self, item):
+        """Store the item that the last wants() call admitted."""
+        if len(self.items) < self.size:
+            self.items.append(item)
+            if len(self.items) == self.size:
+                self._weight = 1.0
+                self._schedule_next()
+        else:
+            self.items[self.rng.randrange(self.size)] = item
+            self._schedule_next()
+
+    def add(self, item):
+        """Offer an already-built item."""
+        if self.wants():
+            self.keep(item)
+
+    @staticmethod
+    def merge(samples, size, rng=random):
+        """
+        Combine (items, seen) reservoirs of disjoint streams into one uniform
+        sample of `size`, as if the streams had been sampled as one.
+        """
+        pools = [list(items) for items, _ in samples]
+        remaining = [seen for _, seen in samples]
+        merged = []
+        while len(merged) < size and sum(remaining) > 0:
+            # Pick a stream in proportion to its unsampled population, then
+            # draw without replacement from that stream's (uniform) reservoir
+            pick = rng.randrange(sum(remaining))
+            for source, population in enumerate(remaining):
+                if pick < population:
+                    break
+                pick -= population
+            pool = pools[source]
+            merged.append(pool.pop(rng.randrange(len(pool))))
+            remaining[source] -= 1
+        return merged
+
+
+# =============================================================================
+# Registry Ingestion
+# =============================================================================
+
+def build_aircraft_record(row, mfr_data, icao):
+    """Build the matched-aircraft AircraftRecord for one FAA registry row."""
+    reg = row.get('REGISTRATION', '').strip()
+    return aircraft_record(
+        f"N{reg}" if not reg.startswith('N') else reg,
+        icao,
+        mfr_data,
+        get_engine_type(mfr_data.type_eng),
+        row.get('CITY', '').strip().title(),
+        row.get('STATE', '').strip(),
+    )
+
+
+def sample_registry_rows(rows, manufacturers, resolution, sampler, progress=None):
+    """
+    Feed matched registry rows into a reservoir sampler. Returns rows read.
+
+    progress is an optional instrumentation Stage that is updated with the
+    row count every PROGRESS_EVERY rows.
+    """
+    total_read = 0
+    for row in rows:
+        total_read += 1
+        mfr_code = row.get('MFR-CODE', '').strip()
+
+        # Join against the per-code resolution table (unknown codes miss)
+        icao = resolution.lookup(mfr_code)
+        if icao and sampler.wants():
+            sampler.keep(build_aircraft_record(row, manufacturers[mfr_code], icao))
+
+        # Progress indicator
+        if progress is not None and total_read % PROGRESS_EVERY == 0:
+            progress.update(total_read, f"matched {sampler.seen:,} with ICAO codes")
+    if progress is not None:
+        progress.update(total_read)
+    return total_read
+
+
+def read_registry(manufacturers, resolution, count, rng=random, progress=None):
+    """
+    Read the whole FAA registry once, keeping a uniform sample of `count`
+    matched aircraft. Returns (sample, rows read, matched rows).
+    """
+    sampler = ReservoirSampler(count, rng)
+    with open(FAA_AIRCRAFT, 'r', encoding='utf-8-sig') as f:
+        total_read = sample_registry_rows(csv.DictReader(f), manufacturers, resolution,
+                                          sampler, progress)
+    return sampler.items, total_read, sampler.seen
+
+
+def registry_chunks(path, chunk_count):
+    """
+    Split a CSV file into byte ranges aligned on record boundaries.
+
+    Returns (header_line, [(start, end), ...]) covering every data row exactly
+    once. Assumes no quoted field spans a line break, which holds for the FAA
+    registry export.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+
+        cuts = [data_start]
+        step = max(1, (size - data_start) // max(1, chunk_count))
+        for i in range(1, chunk_count):
+            target = data_start + i * step
+            if target <= cuts[-1] or target >= size:
+                continue
+            # Advance to the first byte after the next newline
+            f.seek(target - 1)
+            f.readline()
+            boundary = f.tell()
+            if cuts[-1] < boundary < size:
+                cuts.append(boundary)
+        cuts.append(size)
+
+    return header, list(zip(cuts[:-1], cuts[1:]))
+
+
+# Per-process state for registry workers, set once by the pool initializer
+_worker_state = {}
+
+
+def _init_registry_worker(manufacturers, resolved):
+    _worker_state['manufacturers'] = manufacturers
+    _worker_state['resolved'] = resolved
+
+
+def _scan_registry_chunk(task):
+    """Worker: parse, match and sample the rows of one byte range of the registry."""
+    path, header, start, end, count, seed = task
+    resolution = IcaoResolution(_worker_state['resolved'])
+    sampler = ReservoirSampler(count, random.Random(seed))
+    fieldnames = next(csv.reader([header.decode('utf-8-sig')]))
+
+    def lines():
+        with open(path, 'rb') as f:
+            f.seek(start)
+            position = start
+            while position < end:
+                line = f.readline()
+                if not line:
+                    break
+                position += len(line)
+                yield line.decode('utf-8')
+
+    rows = sample_registry_rows(csv.DictReader(lines(), fieldnames=fieldnames),
+                                _worker_state['manufacturers'], resolution, sampler)
+    return sampler.items, sampler.seen, rows, resolution.hits, resolution.misses
+
+
+def read_registry_parallel(manufacturers, resolution, count, workers, rng=random, progress=None):
+    """
+    Read the FAA registry with a process pool, one byte-range chunk per task.
+
+    Each chunk keeps its own reservoir; the reservoirs are merged in file order
+    into one uniform sample of `count`. Chunk seeds are drawn from `rng`, so a
+    seeded run is reproducible for a given worker count.
+    """
+    header, chunks = registry_chunks(FAA_AIRCRAFT, workers * 4)
+    tasks = [(str(FAA_AIRCRAFT), header, start, end, count, rng.getrandbits(64))
+             for start, end in chunks]
+
+    samples = []
+    total_read = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_registry_worker,
+                             initargs=(manufacturers, resolution.resolved)) as pool:
+        for index, (items, seen, rows, hits, misses) in enumerate(pool.map(_scan_registry_chunk, tasks)):
+            samples.append((items, seen))
+            total_read += rows
+            resolution.hits += hits
+            resolution.misses += misses
+            if progress is not None:
+                progress.items = total_read
+                progress.report(f"chunk {index + 1}/{len(tasks)}, {seen:,} matched")
+
+    matched = sum(seen for _, seen in samples)
+    return ReservoirSampler.merge(samples, count, rng), total_read, matched
+
+
+# =============================================================================
+# Output
+# =============================================================================
+
+OUTPUT_FIELDNAMES = ['icao', 'manufacturer', 'model', 'registration', 'engine_type',
+                     'num_engines', 'aircraft_type', 'aircraft_classification',
+                     'latitude', 'longitude', 'capture_date', 'capture_time',
+                     'year', 'month', 'day', 'near_airport']
+
+# Default number of records sorted in memory per run in streaming mode
+DEFAULT_RUN_SIZE = 500_000
+
+DATE_INDEX = OUTPUT_FIELDNAMES.index('capture_date')
+TIME_INDEX = OUTPUT_FIELDNAMES.index('capture_time')
+
+
+def capture_sort_key(record):
+    return record[DATE_INDEX], record[TIME_INDEX]
+
+
+def now_capture_fields():
+    """Date/time columns for a capture taken right now."""
+    now = datetime.now()
+    return {
+        'capture_date': now.strftime('%Y-%m-%d'),
+        'capture_time': now.strftime('%H:%M:%S'),
+        'year': now.year,
+        'month': now.month,
+        'day': now.day,
+    }
+
+
+def mark_captured_now(record):
+    """Rewrite an output row's date/time columns to the current moment."""
+    for column, value in now_capture_fields().items():
+        record[OUTPUT_FIELDNAMES.index(column)] = value
+
+
+def build_output_records(aircraft_list, captures, start=0):
+    """
+    Combine aircraft with GPS/timestamp columns from random_captures().
+
+    Returns one list per record in OUTPUT_FIELDNAMES order. Capture i uses
+    aircraft (start + i) modulo the list length, so a batch can be longer
+    than the aircraft list (repeat sightings).
+    """
+    records = []
+    count = len(aircraft_list)
+    for i, capture in enumerate(zip(*(captures[column] for column in CAPTURE_COLUMNS))):
+        aircraft = aircraft_list[(start + i) % count]
+        records.append([aircraft.icao, aircraft.manufacturer, aircraft.model, aircraft.registration,
+                        aircraft.engine_type, aircraft.num_engines, aircraft.aircraft_type,
+                        aircraft.aircraft_classification, *capture])
+    return records
+
+
+def write_records_streaming(aircraft_list, total, np_rng=None, run_size=DEFAULT_RUN_SIZE,
+                            output_file=None, progress=None):
+    """
+    Write `total` capture records sorted by date/time with bounded memory.
+
+    Records are generated run_size at a time, each run is sorted and written
+    to a temporary file, and the runs are k-way merged (heapq.merge) into the
+    output CSV. At most one run is held in memory. The final merged row is
+    held back one step so it can be rewritten to "now" like the in-memory path.
+    """
+    output_file = output_file or OUTPUT_FILE
+    progress = progress or Stage('write_output', total, 'records')
+
+    with tempfile.TemporaryDirectory(prefix='airplaneid-runs-') as run_dir:
+        run_files = []
+        for start in range(0, total, run_size):
+            batch = min(run_size, total - start)
+            records = build_output_records(aircraft_list, random_captures(batch, np_rng), start)
+            records.sort(key=capture_sort_key)
+
+            run_file = Path(run_dir) / f"run-{len(run_files):05d}.csv"
+            with open(run_file, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(records)
+            run_files.append(run_file)
+            del records
+            progress.items = start + batch
+            progress.report(f"sorted run {len(run_files)}")
+
+        print(f"\nMerging {len(run_files)} runs into {output_file}...")
+        handles = [open(run_file, 'r', newline='', encoding='utf-8') for run_file in run_files]
+        try:
+            merged = heapq.merge(*(csv.reader(h) for h in handles),
+                                 key=capture_sort_key)
+            with open(output_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(OUTPUT_FIELDNAMES)
+                previous = None
+                for row in merged:
+                    if previous is not None:
+                        writer.writerow(previous)
+                    previous = row
+
+                # Update the last record to be "now"
+                if previous is not None:
+                    mark_captured_now(previous)
+                    writer.writerow(previous)
+        finally:
+            for handle in handles:
+                handle.close()
+
+
+def generate_test_data(count=2000, use_cache=True, workers=1, seed=None,
+                       stream=False, run_size=DEFAULT_RUN_SIZE, metrics=None):
     """Generate test data by combining FAA data with ICAO codes."""
+    metrics = metrics or Metrics('generate_test_data')
+
+    # A seed makes the sample, GPS points and timestamps reproducible
+    if seed is not None:
+        random.seed(seed)
+    np_rng = np.random.default_rng(seed) if np is not None else None
+
     print(f"Loading manufacturer reference data...")
-    manufacturers = load_manufacturer_reference()
+    with metrics.stage('load_manufacturers', unit='codes') as stage:
+        manufacturers = load_manufacturer_reference()
+        stage.update(len(manufacturers))
     print(f"  Loaded {len(manufacturers)} manufacturer codes")
 
     print(f"Loading ICAO mapping...")
-    icao_map, icao_by_model = load_icao_mapping()
+    with metrics.stage('load_icao_mapping', unit='mappings') as stage:
+        icao_map, icao_by_model = load_icao_mapping()
+        stage.update(len(icao_map))
     print(f"  Loaded {len(icao_map)} ICAO mappings")
 
-    print(f"Loading FAA aircraft registrations...")
-    aircraft_with_icao = []
-
-    with open(FAA_AIRCRAFT, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        total_read = 0
-        matched = 0
-
-        for row in reader:
-            total_read += 1
-            reg = row.get('REGISTRATION', '').strip()
-            mfr_code = row.get('MFR-CODE', '').strip()
-            city = row.get('CITY', '').strip()
-            state = row.get('STATE', '').strip()
-
-            # Skip if no manufacturer code
-            if not mfr_code or mfr_code not in manufacturers:
-                continue
-
-            mfr_data = manufacturers[mfr_code]
-            manufacturer = mfr_data['manufacturer']
-            model = mfr_data['model']
-            engine_type = get_engine_type(mfr_data['type_eng'])
-            num_engines = mfr_data['no_eng'] or '1'
-            aircraft_type = mfr_data['type_acft']  # 1-9, H, O
-            aircraft_cat = mfr_data['ac_cat']  # 1-9 classification
-
-            # Try to find ICAO code
-            icao = find_icao(manufacturer, model, icao_map, icao_by_model)
-            if icao:
-                matched += 1
-                aircraft_with_icao.append({
-                    'registration': f"N{reg}" if not reg.startswith('N') else reg,
-                    'icao': icao,
-                    'manufacturer': manufacturer.title(),
-                    'model': model.strip(),
-                    'engine_type': engine_type,
-                    'num_engines': num_engines,
-                    'aircraft_type': aircraft_type,
-                    'aircraft_classification': aircraft_cat,
-                    'city': city.title(),
-                    'state': state,
-                })
-
-            # Progress indicator
-            if total_read % 50000 == 0:
-                print(f"  Processed {total_read:,} aircraft, matched {matched:,} with ICAO codes...")
-
-            # Stop if we have enough
-            if len(aircraft_with_icao) >= count * 3:
-                break
+    print(f"Resolving ICAO codes per manufacturer code...")
+    with metrics.stage('resolve_icao', unit='codes') as stage:
+        resolution = IcaoResolution.load_or_build(
+            manufacturers, icao_map, icao_by_model, IcaoMatcher(icao_map), persist=use_cache)
+        stage.update(len(resolution))
+    source = "cache" if resolution.loaded_from_cache else "fresh build"
+    print(f"  Resolved {resolution.resolved_count:,} of {len(resolution):,} codes ({source})")
+    metrics.set('resolution_source', source)
+
+    with metrics.stage('read_registry', unit='rows', progress_every=PROGRESS_EVERY) as stage:
+        if workers > 1:
+            print(f"Loading FAA aircraft registrations ({workers} workers)...")
+            selected, total_read, matched = read_registry_parallel(
+                manufacturers, resolution, count, workers, progress=stage)
+        else:
+            print(f"Loading FAA aircraft registrations...")
+            selected, total_read, matched = read_registry(manufacturers, resolution, count,
+                                                          progress=stage)
 
     print(f"  Total processed: {total_read:,}")
-    print(f"  Matched with ICAO: {len(aircraft_with_icao):,}")
-
-    # Randomly select the requested count
-    if len(aircraft_with_icao) < count:
-        print(f"  Warning: Only {len(aircraft_with_icao)} aircraft matched, less than requested {count}")
-        selected = aircraft_with_icao
+    print(f"  Matched with ICAO: {matched:,}")
+    print(f"  Resolution table: {resolution.hits:,} hits, {resolution.misses:,} misses")
+    metrics.set('registry_rows', total_read)
+    metrics.set('matched', matched)
+    metrics.set('resolution_hits', resolution.hits)
+    metrics.set('resolution_misses', resolution.misses)
+
+    # The reservoir already holds a uniform sample of the whole registry
+    if matched < count:
+        print(f"  Warning: Only {matched} aircraft matched, less than requested {count}")
+
+    if not selected:
+        print("  No aircraft matched; nothing to write.")
+        return
+
+    if stream:
+        total = count
+        if len(selected) < count:
+            print(f"  Streaming mode: reusing aircraft as repeat sightings to reach {count:,} captures")
+        print(f"\nGenerating {total:,} test records in sorted runs of {run_size:,}...")
+        with metrics.stage('write_output', total=total, unit='records') as stage:
+            write_records_streaming(selected, total, np_rng, run_size, progress=stage)
+        with open(OUTPUT_FILE, 'r', newline='', encoding='utf-8') as f:
+            output_records = [row for _, row in zip(range(5), csv.DictReader(f))]
     else:
-        selected = random.sample(aircraft_with_icao, count)
-
-    print(f"\nGenerating {len(selected)} test records with GPS and timestamps...")
-
-    # Add GPS and timestamps
-    output_records = []
-    for i, aircraft in enumerate(selected):
-        lat, lon, airport = random_gps_near_airport()
-        capture_date = random_date_last_year()
-
-        output_records.append({
-            'icao': aircraft['icao'],
-            'manufacturer': aircraft['manufacturer'],
-            'model': aircraft['model'],
-            'registration': aircraft['registration'],
-            'engine_type': aircraft['engine_type'],
-            'num_engines': aircraft['num_engines'],
-            'aircraft_type': aircraft['aircraft_type'],
-            'aircraft_classification': aircraft['aircraft_classification'],
-            'latitude': lat,
-            'longitude': lon,
-            'capture_date': capture_date.strftime('%Y-%m-%d'),
-            'capture_time': capture_date.strftime('%H:%M:%S'),
-            'year': capture_date.year,
-            'month': capture_date.month,
-            'day': capture_date.day,
-            'near_airport': airport,
-        })
-
-    # Sort by capture date (oldest first, newest last)
-    output_records.sort(key=lambda x: (x['capture_date'], x['capture_time']))
-
-    # Update the last record to be "now"
-    now = datetime.now()
-    output_records[-1]['capture_date'] = now.strftime('%Y-%m-%d')
-    output_records[-1]['capture_time'] = now.strftime('%H:%M:%S')
-    output_records[-1]['year'] = now.year
-    output_records[-1]['month'] = now.month
-    output_records[-1]['day'] = now.day
-
-    # Write output CSV
-    print(f"\nWriting to {OUTPUT_FILE}...")
-    fieldnames = ['icao', 'manufacturer', 'model', 'registration', 'engine_type',
-                  'num_engines', 'aircraft_type', 'aircraft_classification',
-                  'latitude', 'longitude', 'capture_date', 'capture_time',
-                  'year', 'month', 'day', 'near_airport']
-
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(output_records)
-
-    print(f"\nDone! Generated {len(output_records)} test records.")
+        total = len(selected)
+        print(f"\nGenerating {total} test records with GPS and timestamps...")
+        with metrics.stage('generate_records', total=total, unit='records') as stage:
+            output_records = build_output_records(selected, random_captures(total, np_rng))
+
+            # Sort by capture date (oldest first, newest last)
+            output_records.sort(key=capture_sort_key)
+
+            # Update the last record to be "now"
+            mark_captured_now(output_records[-1])
+            stage.update(total)
+
+        # Write output CSV
+        print(f"\nWriting to {OUTPUT_FILE}...")
+        with metrics.stage('write_output', total=total, unit='records') as stage:
+            with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(OUTPUT_FIELDNAMES)
+                writer.writerows(output_records)
+            stage.update(total)
+        output_records = [dict(zip(OUTPUT_FIELDNAMES, record)) for record in output_records[:5]]
+    metrics.set('records_written', total)
+
+    print(f"\nDone! Generated {total:,} test records.")
     print(f"Output file: {OUTPUT_FILE}")
 
     # Show sample
@@ -344,8 +817,21 @@ def generate_test_data(count=2000):
 
 
 if __name__ == '__main__':
-    import sys
-    count = 2000
-    if len(sys.argv) > 2 and sys.argv[1] == '--count':
-        count = int(sys.argv[2])
-    generate_test_data(count)
+    parser = argparse.ArgumentParser(description="Generate Airplane-ID test data from FAA registrations.")
+    parser.add_argument('--count', type=int, default=2000, help="Number of records to generate")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Rebuild the MFR-CODE -> ICAO table without reading or writing its cache file")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Parse the FAA registry with N worker processes (0 = one per CPU)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Random seed for a reproducible dataset")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write through sorted temp-file runs with bounded memory (for 10M+ captures)")
+    parser.add_argument('--run-size', type=int, default=DEFAULT_RUN_SIZE,
+                        help="Records sorted in memory per run in --stream mode")
+    add_arguments(parser)
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    with instrumented('generate_test_data', args) as metrics:
+        generate_test_data(args.count, use_cache=not args.no_cache, workers=workers, seed=args.seed,
+                           stream=args.stream, run_size=args.run_size, metrics=metrics)
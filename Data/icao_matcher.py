@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Indexed partial-match lookup for FAA manufacturer/model -> ICAO designator.
+
+find_icao() in generate_test_data.py falls back to a linear scan over every
+(manufacturer, model) pair in the ICAO mapping, accepting the first entry where
+the manufacturers contain each other AND the models contain each other. This
+module prebuilds indexes over the mapping so the same first-match answer is
+found without touching every entry:
+
+    - "map string IN query"  -> Aho-Corasick automaton over the map strings
+    - "query IN map string"  -> n-gram inverted index over the map strings
+
+Usage:
+    matcher = IcaoMatcher(icao_map)
+    icao = matcher.partial_match('CESSNA AIRCRAFT CO', '172S')
+"""
+
+from collections import deque
+
+
+class AhoCorasick:
+    """Multi-pattern substring automaton: which patterns occur in a text."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]        # state -> {char: next_state}
+        self.fail = [0]         # state -> failure link
+        self.output = [[]]      # state -> pattern ids ending here (incl. via fail)
+        self.always = []        # ids of empty patterns (match every text)
+
+        for pattern_id, pattern in enumerate(patterns):
+            if not pattern:
+                self.always.append(pattern_id)
+                continue
+            state = 0
+            for char in pattern:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = nxt
+            self.output[state].append(pattern_id)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                link = self.goto[fallback].get(char, 0)
+                self.fail[nxt] = link if link != nxt else 0
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find_all(self, text):
+        """Return the set of pattern ids that occur anywhere in text."""
+        found = set(self.always)
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class NgramIndex:
+    """Inverted n-gram index: which indexed strings contain a query."""
+
+    def __init__(self, strings, n=3):
+        self.n = n
+        self.strings = list(strings)
+        self.postings = {}  # gram (length 1..n) -> set of string ids
+
+        for string_id, string in enumerate(self.strings):
+            for size in range(1, n + 1):
+                for start in range(len(string) - size + 1):
+                    gram = string[start:start + size]
+                    self.postings.setdefault(gram, set()).add(string_id)
+
+    def containing(self, query):
+        """Return the set of string ids whose string contains query."""
+        if not query:
+            return set(range(len(self.strings)))
+        if len(query) <= self.n:
+            return set(self.postings.get(query, ()))
+
+        # Intersect trigram postings (smallest first), then verify
+        grams = [query[i:i + self.n] for i in range(len(query) - self.n + 1)]
+        lists = sorted((self.postings.get(g, set()) for g in grams), key=len)
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return {i for i in candidates if query in self.strings[i]}
+
+
+class IcaoMatcher:
+    """
+    Prebuilt index over an icao_map of {(MFR_UPPER, MODEL_UPPER): ICAO}.
+
+    partial_match() returns exactly what the linear scan in find_icao()
+    returns: the ICAO of the earliest-inserted map entry whose manufacturer
+    and model each contain, or are contained in, the query values.
+    """
+
+    def __init__(self, icao_map):
+        self.icaos = []                 # entry position -> ICAO
+        mfr_ids, model_ids = {}, {}     # distinct string -> id
+        self.entries_by_mfr = []        # mfr id -> [(position, model id)]
+        self.entries_by_model = []      # model id -> [(position, mfr id)]
+
+        for position, ((map_mfr, map_model), icao) in enumerate(icao_map.items()):
+            self.icaos.append(icao)
+            if map_mfr not in mfr_ids:
+                mfr_ids[map_mfr] = len(mfr_ids)
+                self.entries_by_mfr.append([])
+            if map_model not in model_ids:
+                model_ids[map_model] = len(model_ids)
+                self.entries_by_model.append([])
+            mfr_id, model_id = mfr_ids[map_mfr], model_ids[map_model]
+            self.entries_by_mfr[mfr_id].append((position, model_id))
+            self.entries_by_model[model_id].append((position, mfr_id))
+
+        self.mfr_automaton = AhoCorasick(mfr_ids)
+        self.mfr_ngrams = NgramIndex(mfr_ids)
+        self.model_automaton = AhoCorasick(model_ids)
+        self.model_ngrams = NgramIndex(model_ids)
+
+    def __len__(self):
+        return len(self.icaos)
+
+    def partial_match(self, mfr_upper, model_upper):
+        """Find the first map entry matching both ways, or None."""
+        mfr_hits = self.mfr_automaton.find_all(mfr_upper) | self.mfr_ngrams.containing(mfr_upper)
+        if not mfr_hits:
+            return None
+        model_hits = self.model_automaton.find_all(model_upper) | self.model_ngrams.containing(model_upper)
+        if not model_hits:
+            return None
+
+        # Walk whichever side has fewer entries to check
+        mfr_cost = sum(len(self.entries_by_mfr[i]) for i in mfr_hits)
+        model_cost = sum(len(self.entries_by_model[i]) for i in model_hits)
+        if mfr_cost <= model_cost:
+            groups, other_hits = (self.entries_by_mfr[i] for i in mfr_hits), model_hits
+        else:
+            groups, other_hits = (self.entries_by_model[i] for i in model_hits), mfr_hits
+
+        best = None
+        for entries in groups:
+            for position, other_id in entries:
+                if best is not None and position >= best:
+                    break  # entries are in insertion order
+                if other_id in other_hits:
+                    best = position
+                    break
+        return self.icaos[best] if best is not None else None
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Report engine for verify_icao.py results.
+
+Builds one icao -> aircraft index for the whole report instead of scanning
+the aircraft list once per reported code, and writes the results as text
+(icao_verification_results.txt, same layout as before), JSON and CSV. The
+JSON from the previous run is diffed against the new results, so a large
+list can be reviewed by what changed: codes that became invalid or valid,
+and manufacturer/model changes on either side.
+
+Usage:
+    python3 icao_report.py OLD.json NEW.json   # diff two saved runs
+"""
+
+import csv
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+RESULTS_TXT = 'icao_verification_results.txt'
+RESULTS_JSON = 'icao_verification_results.json'
+RESULTS_CSV = 'icao_verification_results.csv'
+DIFF_JSON = 'icao_verification_diff.json'
+
+RESULT_FIELDS = ['icao', 'status', 'manufacturer', 'model',
+                 'icao_manufacturer', 'icao_model', 'result_count']
+
+# Fields compared between runs for codes present in both; the ICAO side is
+# only compared when both lookups found the code
+OUR_FIELDS = ['manufacturer', 'model']
+ICAO_FIELDS = ['icao_manufacturer', 'icao_model']
+
+
+def index_aircraft(aircraft):
+    """Map each ICAO code to its first aircraft in list order."""
+    index = {}
+    for a in aircraft:
+        index.setdefault(a['icao'], a)
+    return index
+
+
+def icao_names(result):
+    """(manufacturer, model) of one Doc 8643 result record."""
+    mfg = result.get('Manufacturer', result.get('ManufacturerCode', 'N/A'))
+    model = result.get('ModelFullName', result.get('Model', 'N/A'))
+    return mfg, model
+
+
+class VerificationReport:
+    """Results of one verification run, keyed by ICAO code."""
+
+    def __init__(self, aircraft, valid_codes, invalid_codes, errors):
+        self.index = index_aircraft(aircraft)
+        self.valid_codes = sorted(valid_codes, key=lambda item: item[0])
+        self.invalid_codes = sorted(invalid_codes)
+        self.errors = sorted(errors)
+
+        self.rows = {}
+        for code, results in self.valid_codes:
+            icao_mfg, icao_model = icao_names(results[0])
+            self._add_row(code, 'valid', icao_mfg, icao_model, len(results))
+        for code in self.invalid_codes:
+            self._add_row(code, 'invalid')
+        for code in self.errors:
+            self._add_row(code, 'error')
+        self.rows = dict(sorted(self.rows.items()))
+
+    def _add_row(self, code, status, icao_mfg='', icao_model='', result_count=0):
+        ours = self.index.get(code, {})
+        self.rows[code] = {
+            'icao': code,
+            'status': status,
+            'manufacturer': ours.get('manufacturer', ''),
+            'model': ours.get('model', ''),
+            'icao_manufacturer': icao_mfg,
+            'icao_model': icao_model,
+            'result_count': result_count,
+        }
+
+    @property
+    def total(self):
+        return len(self.rows)
+
+    def print_summary(self):
+        print("\n" + "="*60)
+        print("VERIFICATION SUMMARY")
+        print("="*60)
+        print(f"Total unique ICAO codes checked: {self.total}")
+        print(f"Valid codes (found in ICAO DB):  {len(self.valid_codes)}")
+        print(f"Invalid codes (not found):       {len(self.invalid_codes)}")
+        print(f"Errors during lookup:            {len(self.errors)}")
+
+        if self.invalid_codes:
+            print(f"\nInvalid/Unknown ICAO codes ({len(self.invalid_codes)}):")
+            for code in self.invalid_codes[:30]:
+                ours = self.index.get(code)
+                if ours:
+                    print(f"  {code}: {ours['manufacturer']} {ours['model']}")
+            if len(self.invalid_codes) > 30:
+                print(f"  ... and {len(self.invalid_codes) - 30} more")
+
+    def write_text(self, path=RESULTS_TXT):
+        with open(path, 'w') as f:
+            f.write("ICAO Code Verification Results\n")
+            f.write("="*60 + "\n\n")
+
+            f.write(f"Total codes checked: {self.total}\n")
+            f.write(f"Valid codes: {len(self.valid_codes)}\n")
+            f.write(f"Invalid codes: {len(self.invalid_codes)}\n")
+            f.write(f"Errors: {len(self.errors)}\n\n")
+
+            f.write("INVALID CODES (not in ICAO database):\n")
+            f.write("-"*40 + "\n")
+            for code in self.invalid_codes:
+                ours = self.index.get(code)
+                if ours:
+                    f.write(f"{code}: {ours['manufacturer']} {ours['model']}\n")
+
+            f.write("\n\nERROR CODES (lookup failed):\n")
+            f.write("-"*40 + "\n")
+            for code in self.errors:
+                ours = self.index.get(code)
+                if ours:
+                    f.write(f"{code}: {ours['manufacturer']} {ours['model']}\n")
+
+            f.write("\n\nVALID CODES - COMPARISON:\n")
+            f.write("-"*40 + "\n")
+            for code, results in self.valid_codes:
+                ours = self.index.get(code)
+                f.write(f"\n{code}:\n")
+                if ours:
+                    f.write(f"  OURS: {ours['manufacturer']} - {ours['model']}\n")
+                for r in results[:2]:
+                    mfg, model = icao_names(r)
+                    f.write(f"  ICAO: {mfg} - {model}\n")
+
+    def write_json(self, path=RESULTS_JSON):
+        payload = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'summary': {
+                'total': self.total,
+                'valid': len(self.valid_codes),
+                'invalid': len(self.invalid_codes),
+                'errors': len(self.errors),
+            },
+            'results': list(self.rows.values()),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+
+    def write_csv(self, path=RESULTS_CSV):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows.values())
+
+
+def load_results(path=RESULTS_JSON):
+    """Rows of a saved JSON report keyed by ICAO, or None if there is none."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {row['icao']: row for row in json.load(f)['results']}
+    except (ValueError, KeyError):
+        return None
+
+
+def diff_results(previous, current):
+    """
+    Compare two {icao: row} result sets.
+
+    Returns lists of added and removed codes, codes newly invalid or valid,
+    and manufacturer/model changes (ours, and ICAO's for codes valid in both).
+    """
+    diff = {'added': [], 'removed': [], 'newly_invalid': [], 'newly_valid': [], 'changed': []}
+
+    for code, row in current.items():
+        old = previous.get(code)
+        if old is None:
+            diff['added'].append(code)
+            continue
+        if row['status'] != old['status']:
+            if row['status'] == 'invalid':
+                diff['newly_invalid'].append(code)
+            elif row['status'] == 'valid':
+                diff['newly_valid'].append(code)
+        fields = OUR_FIELDS
+        if row['status'] == old['status'] == 'valid':
+            fields = OUR_FIELDS + ICAO_FIELDS
+        for field in fields:
+            if row[field] != old.get(field, ''):
+                diff['changed'].append({'icao': code, 'field': field,
+                                        'old': old.get(field, ''), 'new': row[field]})
+
+    diff['removed'] = sorted(code for code in previous if code not in current)
+    return diff
+
+
+def print_diff(diff, limit=20):
+    print("\n" + "="*60)
+    print("CHANGES SINCE PREVIOUS RUN")
+    print("="*60)
+    for key, label in [('added', 'Added codes'), ('removed', 'Removed codes'),
+                       ('newly_invalid', 'Newly invalid'), ('newly_valid', 'Newly valid')]:
+        codes = diff[key]
+        line = f"{label + ':':16} {len(codes)}"
+        if codes:
+            shown = ', '.join(codes[:limit])
+            if len(codes) > limit:
+                shown += ', ...'
+            line += f"  ({shown})"
+        print(line)
+    print(f"{'Changed fields:':16} {len(diff['changed'])}")
+    for change in diff['changed'][:limit]:
+        print(f"  {change['icao']} {change['field']}: {change['old']!r} -> {change['new']!r}")
+    if len(diff['changed']) > limit:
+        print(f"  ... and {len(diff['changed']) - limit} more")
+
+
+def write_report(report, previous=None):
+    """Write text/JSON/CSV results, plus a diff if a previous run is given."""
+    report.write_text()
+    report.write_json()
+    report.write_csv()
+    print(f"\nDetailed results saved to {RESULTS_TXT} ({RESULTS_JSON}, {RESULTS_CSV})")
+
+    if previous is not None:
+        diff = diff_results(previous, report.rows)
+        with open(DIFF_JSON, 'w', encoding='utf-8') as f:
+            json.dump(diff, f, indent=2)
+        print_diff(diff)
+        print(f"\nDiff saved to {DIFF_JSON}")
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python3 icao_report.py OLD.json NEW.json")
+        sys.exit(1)
+    previous, current = load_results(sys.argv[1]), load_results(sys.argv[2])
+    if previous is None or current is None:
+        print("Error: could not read both result files")
+        sys.exit(1)
+    print_diff(diff_results(previous, current))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ICAO Doc 8643 AircraftTypes endpoint.
+
+Serves /doc8643/External/AircraftTypes?searchParam=<code> from ICAOCodes.csv
+so verify_icao.py can be exercised offline. It can also imitate the real
+service's bad days: the HTML maintenance page, and random 503 responses for
+retry testing. Connections are HTTP/1.1 keep-alive, and the server counts
+requests and connections so connection reuse can be checked.
+
+Usage:
+    python3 icao_stub_server.py [--port 8643] [--maintenance] [--fail-rate 0.1]
+    python3 verify_icao.py --base-url http://127.0.0.1:8643/doc8643/External/AircraftTypes
+"""
+
+import argparse
+import csv
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+SCRIPT_DIR = Path(__file__).parent
+ICAO_CODES = SCRIPT_DIR / "ICAOCodes.csv"
+ENDPOINT_PATH = "/doc8643/External/AircraftTypes"
+
+MAINTENANCE_PAGE = """<!DOCTYPE html>
+<html><head><title>ICAO - Maintenance</title></head>
+<body><h1>Site under maintenance</h1>
+<p>This site is currently undergoing scheduled maintenance. Please try again later.</p>
+</body></html>"""
+
+ENGINE_TYPES = {'0': 'Glider', '1': 'Piston', '2': 'Turboprop/Turboshaft',
+                '3': 'Turboprop/Turboshaft', '4': 'Jet', '10': 'Electric'}
+
+
+def load_aircraft_types(path=ICAO_CODES):
+    """Load ICAOCodes.csv rows shaped like Doc 8643 JSON results."""
+    types = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            types.append({
+                'Designator': row['icao'],
+                'ManufacturerCode': row['manufacturer'],
+                'ModelFullName': row['model'],
+                'Description': row['icaoClass'],
+                'EngineCount': row['engineCount'],
+                'EngineType': ENGINE_TYPES.get(row['engineType'], 'Unknown'),
+            })
+    return types
+
+
+class StubServer:
+    """
+    Threaded stub server, usable as a context manager.
+
+        with StubServer(fail_rate=0.2) as server:
+            lookup_icao('C172', base_url=server.url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, maintenance=False, fail_rate=0.0,
+                 aircraft_types=None, seed=None):
+        self.maintenance = maintenance
+        self.fail_rate = fail_rate
+        self.aircraft_types = aircraft_types if aircraft_types is not None else load_aircraft_types()
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{ENDPOINT_PATH}"
+
+    def search(self, param):
+        """Designators starting with param, like the real prefix search."""
+        param = param.upper()
+        return [t for t in self.aircraft_types if t['Designator'].upper().startswith(param)]
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def setup(self):
+                super().setup()
+                with stub.lock:
+                    stub.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, content_type, body):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                    fail = stub.random.random() < stub.fail_rate
+
+                url = urlparse(self.path)
+                if url.path != ENDPOINT_PATH:
+                    self._send(404, 'text/plain', 'Not Found')
+                elif stub.maintenance:
+                    self._send(200, 'text/html', MAINTENANCE_PAGE)
+                elif fail:
+                    self._send(503, 'text/plain', 'Service Unavailable')
+                else:
+                    param = parse_qs(url.query).get('searchParam', [''])[0]
+                    matches = stub.search(param) if param else []
+                    self._send(200, 'application/json', json.dumps(matches) if matches else '')
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local ICAO Doc 8643 AircraftTypes stub.")
+    parser.add_argument('--port', type=int, default=8643)
+    parser.add_argument('--maintenance', action='store_true', help="Serve the HTML maintenance page")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of requests answered 503")
+    args = parser.parse_args()
+
+    server = StubServer(port=args.port, maintenance=args.maintenance, fail_rate=args.fail_rate)
+    print(f"Serving {len(server.aircraft_types)} aircraft types at {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped after {server.requests} requests on {server.connections} connections")
+
+
+if __name__ == '__main__':
+    main()
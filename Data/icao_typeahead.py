@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Trigram typeahead from free text to ICAO type designators.
+
+Turns what a user types in the capture form ("gulfstream 650", "pc12",
+"cessna skyh") into ranked ICAO designators from ICAOCodes.csv, without the
+hard-coded hints find_icao() relies on. Each type's manufacturer, model and
+designator are normalized and split into tokens, and every token's padded
+trigrams go into an inverted index (gram -> type ids).
+
+Normalization is punctuation-insensitive: accents are dropped, case is
+folded, and '-', '.', '/' and apostrophes inside a word are removed, so
+"PC-12", "pc.12" and "PC12" are the same token. Mixed tokens are also
+indexed by their letter and digit runs ("G650" -> G650, G, 650), so a bare
+model number matches.
+
+A query is scored per type by the share of its grams the type contains
+(coverage), then by the share of the type's grams the query covers
+(precision). The last query token is treated as a prefix still being typed.
+An exact designator match always ranks first.
+
+The index exports to ICAOTypeahead.json (types plus postings) so the app can
+load it prebuilt instead of tokenizing 2,700 types at startup.
+
+Usage:
+    python3 icao_typeahead.py                    # build and export ICAOTypeahead.json
+    python3 icao_typeahead.py "gulfstream 650"   # top suggestions for a query
+    python3 icao_typeahead.py --benchmark        # per-keystroke latency
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import re
+import statistics
+import sys
+import time
+import unicodedata
+from collections import Counter
+from itertools import chain
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: suggest() falls back to Counter-based scoring
+    np = None
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+ICAO_CODES = SCRIPT_DIR / "ICAOCodes.csv"
+OUTPUT_FILE = SCRIPT_DIR / "ICAOTypeahead.json"
+FORMAT_VERSION = 1
+DEFAULT_LIMIT = 5
+
+PAD = '$'
+JOINERS = re.compile(r"[-./'’]")
+SEPARATORS = re.compile(r'[^A-Z0-9]+')
+RUNS = re.compile(r'[A-Z]+|[0-9]+')
+
+# Queries typed one character at a time by --benchmark
+BENCHMARK_QUERIES = ["gulfstream 650", "pc12", "cessna 172 skyhawk", "boeing 737-800",
+                     "airbus a320neo", "piper pa-28 cherokee", "robinson r44", "cirrus sr22",
+                     "beech king air 350", "embraer phenom 300", "dash 8", "citation cj3"]
+
+
+class Suggestion(NamedTuple):
+    icao: str
+    manufacturer: str
+    model: str
+    score: float  # Share of the query's grams found in this type (0-1)
+
+
+def normalize(text):
+    """Uppercase, accent-free text with in-word punctuation removed."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return JOINERS.sub('', text.upper())
+
+
+def tokenize(text):
+    return [token for token in SEPARATORS.split(normalize(text)) if token]
+
+
+def token_grams(token, prefix=False):
+    """
+    Padded trigrams of a token, plus its leading bigram.
+
+    A prefix token (the word still being typed) gets no trailing pad, so
+    "SKYH" matches "SKYHAWK".
+    """
+    padded = PAD + token + ('' if prefix else PAD)
+    grams = {padded[:2]}
+    grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def document_grams(icao, manufacturer, model):
+    """All grams indexed for one ICAO type."""
+    grams = set()
+    for token in tokenize(f"{manufacturer} {model} {icao}"):
+        grams |= token_grams(token)
+        runs = RUNS.findall(token)
+        if len(runs) > 1:
+            for run in runs:
+                grams |= token_grams(run)
+    return grams
+
+
+def query_grams(text):
+    """(grams, compact query) for a typed query; the last token is a prefix."""
+    tokens = tokenize(text)
+    grams = set()
+    for index, token in enumerate(tokens):
+        grams |= token_grams(token, prefix=index == len(tokens) - 1 and not text[-1:].isspace())
+    return grams, ''.join(tokens)
+
+
+class TypeaheadIndex:
+    """Inverted trigram index over ICAO types."""
+
+    def __init__(self, types, postings):
+        self.types = types          # [(icao, manufacturer, model, gram count)]
+        self.postings = postings    # gram -> [type id]
+        self.by_icao = {icao: type_id for type_id, (icao, *_) in enumerate(types)}
+        self._arrays = None
+        if np is not None:
+            self._arrays = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+            # Precision only breaks ties between equal gram counts, so it is
+            # scaled below 1 and added to the count as one sortable score
+            self._precision = 0.5 / np.array([t[3] for t in types], dtype=np.float64)
+
+    @classmethod
+    def build(cls, rows):
+        """Index (icao, manufacturer, model) rows."""
+        types = []
+        postings = {}
+        for icao, manufacturer, model in rows:
+            grams = document_grams(icao, manufacturer, model)
+            type_id = len(types)
+            types.append((icao, manufacturer, model, len(grams)))
+            for gram in grams:
+                postings.setdefault(gram, []).append(type_id)
+        return cls(types, postings)
+
+    @classmethod
+    def from_csv(cls, path=ICAO_CODES):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.build((row['icao'], row['manufacturer'], row['model'])
+                             for row in csv.DictReader(f))
+
+    @classmethod
+    def load(cls, path=OUTPUT_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path} is typeahead index version {data.get('version')}, "
+                             f"expected {FORMAT_VERSION}")
+        return cls([tuple(t) for t in data['types']], data['postings'])
+
+    def save(self, path=OUTPUT_FILE):
+        data = {
+            'version': FORMAT_VERSION,
+            'source': ICAO_CODES.name,
+            'pad': PAD,
+            'types': self.types,
+            'postings': dict(sorted(self.postings.items())),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.write('\n')
+
+    def suggest(self, text, limit=DEFAULT_LIMIT):
+        """Top `limit` Suggestions for typed text, best first."""
+        grams, compact = query_grams(text)
+        if not grams:
+            return []
+        if self._arrays is not None:
+            return self._suggest_numpy(grams, compact, limit)
+
+        # Counter.update() and nlargest() over plain ints run in C; only types
+        # tied with the limit-th best gram count reach the Python ranking key
+        hits = Counter()
+        hits.update(chain.from_iterable(self.postings.get(gram, ()) for gram in grams))
+        if not hits:
+            return []
+        cutoff = heapq.nlargest(limit, hits.values())[-1]
+        candidates = [item for item in hits.items() if item[1] >= cutoff]
+
+        exact = self.by_icao.get(compact)
+        total = len(grams)
+        types = self.types
+
+        def rank(item):
+            # Ties go to the lower type id, as in _suggest_numpy()
+            type_id, matched = item
+            return (type_id == exact, matched, matched / types[type_id][3], -type_id)
+
+        if exact is not None and exact not in hits:
+            candidates.append((exact, 0))
+        best = heapq.nlargest(limit, candidates, key=rank)
+        return [Suggestion(*types[type_id][:3], round(matched / total, 3)) for type_id, matched in best]
+
+    def _suggest_numpy(self, grams, compact, limit):
+        """suggest() scoring with one bincount over the query's postings."""
+        arrays = [self._arrays[gram] for gram in grams if gram in self._arrays]
+        exact = self.by_icao.get(compact)
+        if not arrays and exact is None:
+            return []
+        matched = np.bincount(np.concatenate(arrays), minlength=len(self.types)) if arrays \
+            else np.zeros(len(self.types), dtype=np.int64)
+        score = matched * (1 + self._precision)
+        if exact is not None:
+            score[exact] = np.inf
+        ids = np.flatnonzero(score)
+        if not len(ids) or limit <= 0:
+            return []
+        scores = score[ids]
+        if len(ids) > limit:
+            # Keep everything tied with the limit-th best so ties are broken by
+            # type id below (as in suggest()) rather than by partition order
+            cutoff = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            keep = scores >= cutoff
+            ids, scores = ids[keep], scores[keep]
+        top = ids[np.lexsort((ids, -scores))][:limit]
+        total = len(grams)
+        return [Suggestion(*self.types[type_id][:3], round(int(matched[type_id]) / total, 3))
+                for type_id in top.tolist()]
+
+
+# =============================================================================
+# Command line
+# =============================================================================
+
+def benchmark(index, repeat=20):
+    """Latency of suggest() for every prefix of BENCHMARK_QUERIES. Returns microseconds."""
+    prefixes = [query[:i] for query in BENCHMARK_QUERIES for i in range(1, len(query) + 1)]
+    timings = []
+    for _ in range(repeat):
+        for prefix in prefixes:
+            start = time.perf_counter()
+            index.suggest(prefix)
+            timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICAO type typeahead over ICAOCodes.csv.")
+    parser.add_argument('query', nargs='*', help="Text to suggest designators for")
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help="Suggestions to show")
+    parser.add_argument('--index', type=Path, default=OUTPUT_FILE, help="Exported index file")
+    parser.add_argument('--benchmark', action='store_true', help="Measure per-keystroke latency")
+    args = parser.parse_args()
+
+    if args.query or args.benchmark:
+        index = TypeaheadIndex.load(args.index) if args.index.exists() else TypeaheadIndex.from_csv()
+    else:
+        print(f"Building typeahead index from {ICAO_CODES.name}...")
+        index = TypeaheadIndex.from_csv()
+        index.save(args.index)
+        print(f"  {len(index.types):,} types, {len(index.postings):,} grams, "
+              f"{sum(map(len, index.postings.values())):,} postings")
+        print(f"Done! {args.index} ({args.index.stat().st_size:,} bytes)")
+        return
+
+    if args.query:
+        query = ' '.join(args.query)
+        print(f"Suggestions for {query!r}:")
+        for s in index.suggest(query, args.limit):
+            print(f"  {s.icao:5} {s.score:5.2f}  {s.manufacturer} {s.model}")
+
+    if args.benchmark:
+        timings = benchmark(index)
+        print(f"\nsuggest() over {len(timings):,} keystrokes:")
+        print(f"  median {statistics.median(timings):7.1f} us")
+        print(f"  p95    {timings[int(len(timings) * 0.95)]:7.1f} us")
+        print(f"  max    {timings[-1]:7.1f} us")
+        for query in BENCHMARK_QUERIES:
+            top = index.suggest(query, 1)
+            print(f"  {query!r:24} -> {top[0].icao if top else '-'}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Stage timers, counters and memory peaks for the Data scripts.
+
+    metrics = Metrics('generate_test_data')
+    with metrics.stage('read_registry', unit='rows', progress_every=50_000) as stage:
+        for row in rows:
+            ...
+            stage.advance()
+    metrics.count('matched', matched)
+
+A stage records its wall time, the items it processed and items/second, and
+prints progress lines with the throughput and, when its total is known, an
+ETA. With memory tracing on, each stage also records its tracemalloc peak
+(nested stages count towards their parent's peak).
+
+Scripts add the shared command-line flags with add_arguments() and run under
+instrumented(), which prints the stage summary at exit, writes
+--metrics-json and dumps a cProfile --profile:
+
+    --metrics-json FILE   stage/counter metrics as JSON
+    --profile FILE        cProfile stats (view with: python3 -m pstats FILE)
+    --trace-memory        per-stage tracemalloc peaks (slows the run down)
+"""
+
+import contextlib
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def format_bytes(count):
+    return f"{count / (1024 * 1024):,.1f} MB"
+
+
+def format_duration(seconds):
+    """Seconds as m:ss (or h:mm:ss)."""
+    minutes, secs = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def max_rss_bytes():
+    """Peak resident set size of this process, or None if unknown."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024  # Linux reports KiB
+
+
+class Stage:
+    """One timed stage. Count work with advance() or update()."""
+
+    def __init__(self, name, total=None, unit='items', progress_every=None):
+        self.name = name
+        self.total = total
+        self.unit = unit
+        self.progress_every = progress_every
+        self.items = 0
+        self.seconds = 0.0
+        self.peak_bytes = None
+        self.started = None
+        self._next_report = progress_every or 0
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return self.seconds
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        """Items per second so far."""
+        elapsed = self.elapsed
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+    def advance(self, count=1, detail=None):
+        """Add count processed items."""
+        self.items += count
+        if self.progress_every and self.items >= self._next_report:
+            self.report(detail)
+
+    def update(self, items, detail=None):
+        """Set the processed item count."""
+        self.items = items
+        if self.progress_every and self.items >= self._next_report:
+            self.report(detail)
+
+    def report(self, detail=None):
+        """Print a progress line: count, throughput, ETA."""
+        done = f"{self.items:,}/{self.total:,}" if self.total else f"{self.items:,}"
+        line = f"  {self.name}: {done} {self.unit} ({self.rate:,.0f}/s"
+        if self.total and self.rate > 0:
+            line += f", ETA {format_duration(max(0, self.total - self.items) / self.rate)}"
+        line += ")"
+        if detail:
+            line += f" - {detail}"
+        print(line)
+        if self.progress_every:
+            while self._next_report <= self.items:
+                self._next_report += self.progress_every
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'seconds': round(self.seconds, 6),
+            'items': self.items,
+            'unit': self.unit,
+            'items_per_sec': round(self.rate, 1) if self.items else None,
+            'peak_bytes': self.peak_bytes,
+        }
+
+
+class Metrics:
+    """Stages and counters of one script run."""
+
+    def __init__(self, script, trace_memory=False):
+        self.script = script
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.wall_seconds = None
+        self.stages = []
+        self.counters = {}
+        self._open = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, total=None, unit='items', progress_every=None):
+        """Time a block as a stage; yields its Stage."""
+        stage = Stage(name, total, unit, progress_every)
+        if self.trace_memory:
+            if self._open:
+                parent = self._open[-1]
+                parent.peak_bytes = max(parent.peak_bytes or 0, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._open.append(stage)
+        self.stages.append(stage)
+        stage.started = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds = time.perf_counter() - stage.started
+            stage.started = None
+            self._open.pop()
+            if self.trace_memory:
+                stage.peak_bytes = max(stage.peak_bytes or 0, tracemalloc.get_traced_memory()[1])
+                if self._open:
+                    parent = self._open[-1]
+                    parent.peak_bytes = max(parent.peak_bytes or 0, stage.peak_bytes)
+
+    def count(self, name, value=1):
+        """Add to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        """Record a counter's final value."""
+        self.counters[name] = value
+
+    def finish(self):
+        if self.wall_seconds is None:
+            self.wall_seconds = time.perf_counter() - self.started
+            if self.trace_memory:
+                tracemalloc.stop()
+
+    def to_dict(self):
+        self.finish()
+        return {
+            'script': self.script,
+            'started': self.started_at.isoformat(timespec='seconds'),
+            'argv': sys.argv[1:],
+            'wall_seconds': round(self.wall_seconds, 6),
+            'max_rss_bytes': max_rss_bytes(),
+            'memory_traced': self.trace_memory,
+            'stages': [stage.to_dict() for stage in self.stages],
+            'counters': self.counters,
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def print_summary(self):
+        self.finish()
+        print("\n" + "="*60)
+        print("STAGE TIMINGS")
+        print("="*60)
+        for stage in self.stages:
+            line = f"  {stage.name:28} {stage.seconds:9.3f}s"
+            if stage.items:
+                line += f"  {stage.items:>12,} {stage.unit:8} {stage.rate:>12,.0f}/s"
+            if stage.peak_bytes is not None:
+                line += f"  peak {format_bytes(stage.peak_bytes)}"
+            print(line)
+        line = f"  {'total':28} {self.wall_seconds:9.3f}s"
+        rss = max_rss_bytes()
+        if rss is not None:
+            line += f"  max RSS {format_bytes(rss)}"
+        print(line)
+        for name, value in self.counters.items():
+            print(f"  {name}: {value:,}" if isinstance(value, int) else f"  {name}: {value}")
+
+
+def add_arguments(parser):
+    """Add --metrics-json, --profile and --trace-memory to an ArgumentParser."""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--metrics-json', metavar='FILE', help="Write stage timings and counters as JSON")
+    group.add_argument('--profile', metavar='FILE', help="Write cProfile stats for the run")
+    group.add_argument('--trace-memory', action='store_true',
+                       help="Record per-stage tracemalloc peaks (slower)")
+
+
+@contextlib.contextmanager
+def instrumented(script, args):
+    """
+    Run a script's main body with metrics and the shared flags applied.
+
+    Yields the Metrics. At exit (also on errors and sys.exit) the stage
+    summary is printed, and the metrics JSON and profile are written if
+    requested.
+    """
+    metrics = Metrics(script, trace_memory=getattr(args, 'trace_memory', False))
+    profile_path = getattr(args, 'profile', None)
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        metrics.print_summary()
+        if getattr(args, 'metrics_json', None):
+            metrics.write_json(args.metrics_json)
+            print(f"Metrics saved to {args.metrics_json}")
+        if profiler is not None:
+            print(f"\nTop functions by cumulative time ({profile_path}):")
+            pstats.Stats(profile_path, stream=sys.stdout).sort_stats('cumulative').print_stats(12)
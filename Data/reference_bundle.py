@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Compile the reference CSVs into one memory-mapped binary bundle.
+
+ICAOCodes.csv, AirlineCodes.csv and FAA-Manufacturer-Reference.csv are parsed
+into dicts of dicts by every script that needs them. This compiles them once
+into AirplaneID-Reference.bin, which ReferenceBundle maps into memory and
+binary-searches without parsing anything, so lookups are available as soon
+as the file is opened. The layout is plain little-endian structs so the same
+file can be read from Swift when bundled into the Xcode project.
+
+Usage:
+    python3 reference_bundle.py              # compile AirplaneID-Reference.bin
+    python3 reference_bundle.py --check C172 # compile, then look up a code
+
+File layout (version 1, all integers little-endian):
+    Header      magic "AIDREF\\0\\0", u16 version, u16 table count, u32 reserved,
+                u64 string table offset, u64 string table size
+    Directory   one entry per table: 16-byte name, u32 row count,
+                u16 column count, u16 key width, u64 column names offset,
+                u64 keys offset, u64 records offset
+    Columns     column count x (u32 string offset, u32 string length)
+    Keys        row count x key width bytes, NUL padded, sorted bytewise
+    Records     row count x column count x (u32 string offset, u32 length)
+    Strings     every distinct UTF-8 value once, concatenated
+"""
+
+import bisect
+import csv
+import mmap
+import struct
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+
+from reference_records import ManufacturerRecord
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+OUTPUT_FILE = SCRIPT_DIR / "AirplaneID-Reference.bin"
+
+MAGIC = b"AIDREF\0\0"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQQ")
+DIRECTORY_ENTRY = struct.Struct("<16sIHHQQQ")
+STRING_REF = struct.Struct("<II")
+
+# Table name -> (source CSV, key column, {bundle column: CSV column})
+# The manufacturer columns mirror load_manufacturer_reference() in
+# generate_test_data.py so a bundle table can stand in for its dict.
+TABLES = {
+    'icao': (SCRIPT_DIR / "ICAOCodes.csv", 'icao', {
+        'icao': 'icao',
+        'manufacturer': 'manufacturer',
+        'model': 'model',
+        'icaoClass': 'icaoClass',
+        'aircraftCategoryCode': 'aircraftCategoryCode',
+        'aircraftType': 'aircraftType',
+        'engineCount': 'engineCount',
+        'engineType': 'engineType',
+    }),
+    'airline': (SCRIPT_DIR / "AirlineCodes.csv", 'airlineCode', {
+        'airlineCode': 'airlineCode',
+        'iata': 'iata',
+        'airlineName': 'airlineName',
+    }),
+    'manufacturer': (SCRIPT_DIR / "FAA-Manufacturer-Reference.csv", 'MFR-CODE', {
+        'manufacturer': 'MANUFACTURER',
+        'model': 'MODEL',
+        'type_acft': 'TYPE-ACFT',
+        'type_eng': 'TYPE-ENG',
+        'ac_cat': 'AC-CAT',
+        'no_eng': 'NO-ENG',
+        'no_seats': 'NO-SEATS',
+        'ac_weight': 'AC-WEIGHT',
+    }),
+}
+
+# Tables whose records decode to a record type instead of a dict (when the
+# bundle's columns match the type's fields)
+RECORD_TYPES = {
+    'manufacturer': ManufacturerRecord,
+}
+
+
+# =============================================================================
+# Compiler
+# =============================================================================
+
+class StringTable:
+    """Deduplicated UTF-8 string pool."""
+
+    def __init__(self):
+        self.offsets = {}
+        self.data = bytearray()
+
+    def add(self, value):
+        """Return (offset, length) of value, adding it on first use."""
+        encoded = value.encode('utf-8')
+        offset = self.offsets.get(encoded)
+        if offset is None:
+            offset = len(self.data)
+            self.offsets[encoded] = offset
+            self.data += encoded
+        return offset, len(encoded)
+
+
+def read_table(csv_path, key_column, columns):
+    """Read a reference CSV into {key: [values]} (last row wins, like a dict load)."""
+    rows = {}
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            key = (row.get(key_column) or '').strip()
+            if key:
+                rows[key] = [(row.get(source) or '').strip() for source in columns.values()]
+    return rows
+
+
+def compile_bundle(output_file=OUTPUT_FILE, tables=None):
+    """
+    Compile the reference tables into a bundle file.
+
+    Tables whose source CSV is missing are left out. Returns
+    {table name: row count} for the tables written.
+    """
+    tables = TABLES if tables is None else tables
+    strings = StringTable()
+    compiled = []
+
+    for name, (csv_path, key_column, columns) in tables.items():
+        if not Path(csv_path).exists():
+            print(f"  Skipping {name}: {csv_path} not found")
+            continue
+        rows = read_table(csv_path, key_column, columns)
+        encoded_keys = sorted(key.encode('utf-8') for key in rows)
+        key_width = max((len(k) for k in encoded_keys), default=1)
+
+        column_refs = b''.join(STRING_REF.pack(*strings.add(c)) for c in columns)
+        keys = b''.join(k.ljust(key_width, b'\0') for k in encoded_keys)
+        records = bytearray()
+        for key in encoded_keys:
+            for value in rows[key.decode('utf-8')]:
+                records += STRING_REF.pack(*strings.add(value))
+
+        compiled.append((name, len(encoded_keys), len(columns), key_width,
+                         column_refs, keys, bytes(records)))
+        print(f"  {name}: {len(encoded_keys):,} rows, key width {key_width}")
+
+    # Lay out sections after the header and directory
+    offset = HEADER.size + DIRECTORY_ENTRY.size * len(compiled)
+    directory = bytearray()
+    sections = bytearray()
+    for name, row_count, column_count, key_width, column_refs, keys, records in compiled:
+        columns_offset = offset + len(sections)
+        sections += column_refs
+        keys_offset = offset + len(sections)
+        sections += keys
+        records_offset = offset + len(sections)
+        sections += records
+        directory += DIRECTORY_ENTRY.pack(name.encode('ascii'), row_count, column_count,
+                                          key_width, columns_offset, keys_offset, records_offset)
+
+    strings_offset = offset + len(sections)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(compiled), 0,
+                         strings_offset, len(strings.data))
+
+    tmp_file = Path(output_file).with_suffix('.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(header)
+        f.write(directory)
+        f.write(sections)
+        f.write(strings.data)
+    tmp_file.replace(output_file)
+
+    return {entry[0]: entry[1] for entry in compiled}
+
+
+# =============================================================================
+# Reader
+# =============================================================================
+
+class KeyColumn:
+    """Sequence view of a fixed-width, sorted key array in a buffer, for bisect."""
+
+    def __init__(self, buffer, offset, width, count):
+        self.buffer = buffer
+        self.offset = offset
+        self.width = width
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start = self.offset + index * self.width
+        return self.buffer[start:start + self.width]
+
+
+class BundleTable(Mapping):
+    """
+    Read-only {key: record} view of one bundle table.
+
+    Lookups binary-search the mapped key array; records are decoded on access,
+    as the table's RECORD_TYPES entry or else as a dict. Pickles by path and
+    name, so it can be handed to worker processes.
+    """
+
+    def __init__(self, bundle, name, row_count, column_count, key_width,
+                 columns_offset, keys_offset, records_offset):
+        self.bundle = bundle
+        self.name = name
+        self.key_width = key_width
+        self._keys = KeyColumn(bundle.buffer, keys_offset, key_width, row_count)
+        self._records_offset = records_offset
+        self._record_size = column_count * STRING_REF.size
+        self.columns = [bundle.string_at(columns_offset + i * STRING_REF.size)
+                        for i in range(column_count)]
+        record_type = RECORD_TYPES.get(name)
+        self.record_type = record_type if record_type and tuple(self.columns) == record_type._fields else None
+
+    def __reduce__(self):
+        return open_table, (str(self.bundle.path), self.name)
+
+    def _index(self, key):
+        encoded = key.encode('utf-8') if isinstance(key, str) else b''
+        if not encoded or len(encoded) > self.key_width:
+            return -1
+        padded = encoded.ljust(self.key_width, b'\0')
+        index = bisect.bisect_left(self._keys, padded)
+        if index < len(self._keys) and self._keys[index] == padded:
+            return index
+        return -1
+
+    def _record(self, index):
+        base = self._records_offset + index * self._record_size
+        values = [self.bundle.string_at(base + i * STRING_REF.size) for i in range(len(self.columns))]
+        if self.record_type is not None:
+            return self.record_type._make(values)
+        return dict(zip(self.columns, values))
+
+    def __getitem__(self, key):
+        index = self._index(key)
+        if index < 0:
+            raise KeyError(key)
+        return self._record(index)
+
+    def __contains__(self, key):
+        return self._index(key) >= 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for index in range(len(self._keys)):
+            yield self._keys[index].rstrip(b'\0').decode('utf-8')
+
+    def items(self):
+        for index, key in enumerate(self):
+            yield key, self._record(index)
+
+
+class ReferenceBundle:
+    """Memory-mapped reader for a compiled reference bundle."""
+
+    def __init__(self, path=OUTPUT_FILE):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, table_count, _, strings_offset, strings_size = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a reference bundle")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is bundle version {version}, expected {FORMAT_VERSION}")
+        self.version = version
+        self._strings_offset = strings_offset
+
+        self.tables = {}
+        for i in range(table_count):
+            name, *layout = DIRECTORY_ENTRY.unpack_from(self.buffer, HEADER.size + i * DIRECTORY_ENTRY.size)
+            name = name.rstrip(b'\0').decode('ascii')
+            self.tables[name] = BundleTable(self, name, *layout)
+
+    def string_at(self, ref_offset):
+        """Decode the string referenced by the (offset, length) pair at ref_offset."""
+        offset, length = STRING_REF.unpack_from(self.buffer, ref_offset)
+        start = self._strings_offset + offset
+        return self.buffer[start:start + length].decode('utf-8')
+
+    def __contains__(self, name):
+        return name in self.tables
+
+    def table(self, name):
+        return self.tables[name]
+
+    def close(self):
+        self.buffer.close()
+
+
+_open_bundles = {}
+
+
+def open_table(path, name):
+    """Open (or reuse) a bundle by path and return one of its tables."""
+    bundle = _open_bundles.get(path)
+    if bundle is None:
+        bundle = _open_bundles[path] = ReferenceBundle(path)
+    return bundle.table(name)
+
+
+def main():
+    print(f"Compiling reference bundle: {OUTPUT_FILE}")
+    counts = compile_bundle()
+    print(f"Done! {len(counts)} tables, {OUTPUT_FILE.stat().st_size:,} bytes")
+
+    if len(sys.argv) > 2 and sys.argv[1] == '--check':
+        code = sys.argv[2]
+        bundle = ReferenceBundle()
+        for name, table in bundle.tables.items():
+            if code in table:
+                print(f"  {name}[{code}]: {table[code]}")
+
+
+if __name__ == '__main__':
+    main()
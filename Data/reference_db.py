@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Build an indexed SQLite reference database from the Data CSVs.
+
+Compiles ICAOCodes.csv, AirlineCodes.csv, the FAA manufacturer reference and
+registry, and AirplaneID-TestData.csv into AirplaneID-Reference.sqlite, with
+the indexes the Hangar search and filters need (icao, registration,
+manufacturer, capture date) and an FTS5 table over manufacturer/model text.
+Source files that are missing are left out, like reference_bundle.py does.
+
+The database is written to a temp file and renamed into place, so a failed
+build never leaves a half-written database behind.
+
+--benchmark runs the lookups the app makes against the finished database and
+reports per-query latency (median/p95) and the query plan SQLite chose, next
+to an unindexed LIKE '%...%' scan for comparison.
+
+Usage:
+    python3 reference_db.py [--output FILE] [--benchmark] [--iterations 200]
+                            [--manufacturer CSV] [--registry CSV] [--captures CSV]
+                            [--metrics-json FILE] [--profile FILE] [--trace-memory]
+"""
+
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from instrumentation import Metrics, add_arguments, instrumented
+from reference_records import read_manufacturer_reference
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+OUTPUT_FILE = SCRIPT_DIR / "AirplaneID-Reference.sqlite"
+ICAO_CODES = SCRIPT_DIR / "ICAOCodes.csv"
+AIRLINE_CODES = SCRIPT_DIR / "AirlineCodes.csv"
+FAA_MANUFACTURER = SCRIPT_DIR / "FAA-Manufacturer-Reference.csv"
+FAA_AIRCRAFT = SCRIPT_DIR / "FAA-Registered-Aircraft.csv"
+CAPTURES = SCRIPT_DIR / "AirplaneID-TestData.csv"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE icao_types (
+    icao TEXT PRIMARY KEY,
+    manufacturer TEXT NOT NULL,
+    model TEXT NOT NULL,
+    icao_class TEXT,
+    aircraft_category_code INTEGER,
+    aircraft_type TEXT,
+    engine_count INTEGER,
+    engine_type INTEGER
+) WITHOUT ROWID;
+
+CREATE TABLE airlines (
+    airline_code TEXT PRIMARY KEY,
+    iata TEXT,
+    airline_name TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE manufacturers (
+    mfr_code TEXT PRIMARY KEY,
+    manufacturer TEXT NOT NULL,
+    model TEXT NOT NULL,
+    type_acft TEXT,
+    type_eng TEXT,
+    ac_cat TEXT,
+    no_eng TEXT,
+    no_seats TEXT,
+    ac_weight TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE registrations (
+    registration TEXT PRIMARY KEY,
+    mfr_code TEXT,
+    city TEXT,
+    state TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE captures (
+    id INTEGER PRIMARY KEY,
+    icao TEXT,
+    manufacturer TEXT,
+    model TEXT,
+    registration TEXT,
+    engine_type TEXT,
+    num_engines INTEGER,
+    aircraft_type TEXT,
+    aircraft_classification TEXT,
+    latitude REAL,
+    longitude REAL,
+    capture_date TEXT,
+    capture_time TEXT,
+    year INTEGER,
+    month INTEGER,
+    day INTEGER,
+    near_airport TEXT
+);
+
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+# Created after the bulk load, which is faster than maintaining them per row
+INDEXES = """
+CREATE INDEX icao_types_manufacturer ON icao_types (manufacturer COLLATE NOCASE);
+CREATE INDEX airlines_iata ON airlines (iata);
+CREATE INDEX manufacturers_manufacturer ON manufacturers (manufacturer COLLATE NOCASE);
+CREATE INDEX registrations_mfr_code ON registrations (mfr_code);
+CREATE INDEX captures_icao ON captures (icao);
+CREATE INDEX captures_registration ON captures (registration);
+CREATE INDEX captures_manufacturer ON captures (manufacturer COLLATE NOCASE);
+CREATE INDEX captures_capture_date ON captures (capture_date, capture_time);
+"""
+
+# One row per distinct manufacturer/model text; source/ref say where it came from
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE aircraft_search USING fts5(
+    manufacturer, model, source UNINDEXED, ref UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+"""
+
+CAPTURE_COLUMNS = ['icao', 'manufacturer', 'model', 'registration', 'engine_type',
+                   'num_engines', 'aircraft_type', 'aircraft_classification',
+                   'latitude', 'longitude', 'capture_date', 'capture_time',
+                   'year', 'month', 'day', 'near_airport']
+
+
+def has_fts5():
+    """True if this Python's SQLite was built with FTS5."""
+    try:
+        sqlite3.connect(':memory:').execute('CREATE VIRTUAL TABLE t USING fts5(x)')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+# =============================================================================
+# Source readers (each yields rows in its table's column order)
+# =============================================================================
+
+def read_icao_types(path=ICAO_CODES):
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield (row['icao'], row['manufacturer'], row['model'], row['icaoClass'],
+                   int(row['aircraftCategoryCode'] or 0), row['aircraftType'],
+                   int(row['engineCount'] or 0), int(row['engineType'] or 0))
+
+
+def read_airlines(path=AIRLINE_CODES):
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield row['airlineCode'], row['iata'] or None, row['airlineName']
+
+
+def read_manufacturers(path=FAA_MANUFACTURER):
+    for code, record in read_manufacturer_reference(path).items():
+        yield (code, *record)
+
+
+def read_registrations(path=FAA_AIRCRAFT):
+    """Registry rows with the N prefix added as in generate_test_data.py."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = [header.index(c) for c in ('REGISTRATION', 'MFR-CODE', 'CITY', 'STATE')]
+        for row in reader:
+            if len(row) <= max(columns):
+                continue
+            reg, mfr_code, city, state = (row[i].strip() for i in columns)
+            if reg:
+                yield (reg if reg.startswith('N') else f"N{reg}", mfr_code, city.title(), state)
+
+
+def read_captures(path=CAPTURES):
+    """Capture rows with a leading None for the id column."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield (None, *(row[column] for column in CAPTURE_COLUMNS))
+
+
+# =============================================================================
+# Builder
+# =============================================================================
+
+def insert_rows(db, table, rows, column_count):
+    """Bulk insert; duplicate keys keep the last row, like a dict load. Returns the table's row count."""
+    placeholders = ', '.join('?' * column_count)
+    db.executemany(f'INSERT OR REPLACE INTO {table} VALUES ({placeholders})', rows)
+    return db.execute(f'SELECT count(*) FROM {table}').fetchone()[0]
+
+
+def populate_search(db):
+    """Fill the FTS5 table from the distinct manufacturer/model pairs of every table."""
+    db.execute("""
+        INSERT INTO aircraft_search (manufacturer, model, source, ref)
+        SELECT manufacturer, model, 'icao', icao FROM icao_types
+        UNION ALL
+        SELECT manufacturer, model, 'faa', min(mfr_code) FROM manufacturers
+        GROUP BY manufacturer, model
+        UNION ALL
+        SELECT manufacturer, model, 'capture', min(icao) FROM captures
+        WHERE manufacturer IS NOT NULL
+        GROUP BY manufacturer, model
+    """)
+    db.execute("INSERT INTO aircraft_search (aircraft_search) VALUES ('optimize')")
+    return db.execute('SELECT count(*) FROM aircraft_search').fetchone()[0]
+
+
+def build_database(output_file=OUTPUT_FILE, sources=None, metrics=None):
+    """
+    Build the database from the source CSVs. Returns {table: row count}.
+
+    sources maps table name -> CSV path and defaults to the Data files; a
+    table whose file is missing is left empty.
+    """
+    metrics = metrics or Metrics('reference_db')
+    sources = {**default_sources(), **(sources or {})}
+    readers = {
+        'icao_types': (read_icao_types, 8),
+        'airlines': (read_airlines, 3),
+        'manufacturers': (read_manufacturers, 9),
+        'registrations': (read_registrations, 4),
+        'captures': (read_captures, len(CAPTURE_COLUMNS) + 1),
+    }
+
+    output_file = Path(output_file)
+    tmp_file = output_file.with_suffix('.tmp')
+    if tmp_file.exists():
+        tmp_file.unlink()
+
+    db = sqlite3.connect(tmp_file)
+    try:
+        # Nothing to protect until the rename, so skip the journal and fsyncs
+        db.execute('PRAGMA journal_mode = OFF')
+        db.execute('PRAGMA synchronous = OFF')
+        db.executescript(SCHEMA)
+
+        counts = {}
+        with db:
+            for table, (reader, column_count) in readers.items():
+                path = Path(sources[table])
+                if not path.exists():
+                    print(f"  Skipping {table}: {path} not found")
+                    continue
+                with metrics.stage(f'load_{table}', unit='rows') as stage:
+                    count = insert_rows(db, table, reader(path), column_count)
+                    stage.update(count)
+                counts[table] = count
+                print(f"  {table}: {count:,} rows")
+
+        with metrics.stage('create_indexes'):
+            db.executescript(INDEXES)
+
+        if has_fts5():
+            with metrics.stage('full_text_index', unit='entries') as stage, db:
+                db.executescript(FTS_SCHEMA)
+                counts['aircraft_search'] = populate_search(db)
+                stage.update(counts['aircraft_search'])
+            print(f"  aircraft_search: {counts['aircraft_search']:,} entries")
+        else:
+            print("  Warning: SQLite was built without FTS5; skipping aircraft_search")
+
+        with metrics.stage('analyze'), db:
+            db.executemany('INSERT INTO meta VALUES (?, ?)', [
+                ('schema_version', str(SCHEMA_VERSION)),
+                ('built', time.strftime('%Y-%m-%dT%H:%M:%S')),
+            ])
+            db.execute('ANALYZE')
+        db.execute('VACUUM')
+    finally:
+        db.close()
+
+    os.replace(tmp_file, output_file)
+    return counts
+
+
+def default_sources():
+    return {
+        'icao_types': ICAO_CODES,
+        'airlines': AIRLINE_CODES,
+        'manufacturers': FAA_MANUFACTURER,
+        'registrations': FAA_AIRCRAFT,
+        'captures': CAPTURES,
+    }
+
+
+# =============================================================================
+# Query benchmark
+# =============================================================================
+
+def sample_values(db, sql, count, rng):
+    values = [row[0] for row in db.execute(sql) if row[0]]
+    return rng.sample(values, min(count, len(values))) if values else []
+
+
+def benchmark_queries(db, iterations=200, seed=8643):
+    """
+    Time the app's lookups. Returns rows of (name, median us, p95 us, rows, plan).
+
+    Each query runs `iterations` times with parameters drawn from the data.
+    Queries against tables that are empty are skipped.
+    """
+    rng = random.Random(seed)
+    icaos = sample_values(db, 'SELECT icao FROM icao_types', iterations, rng)
+    registrations = sample_values(db, 'SELECT registration FROM captures', iterations, rng)
+    faa_registrations = sample_values(db, 'SELECT registration FROM registrations', iterations, rng)
+    mfr_codes = sample_values(db, 'SELECT mfr_code FROM manufacturers', iterations, rng)
+    manufacturers = sample_values(db, 'SELECT DISTINCT manufacturer FROM captures', iterations, rng)
+    dates = sample_values(db, 'SELECT DISTINCT capture_date FROM captures', iterations, rng)
+    models = sample_values(db, 'SELECT model FROM captures', iterations, rng)
+    terms = [model.split()[0][:4] for model in models if model.split()]
+
+    queries = [
+        ('icao lookup', 'SELECT * FROM icao_types WHERE icao = ?', [(v,) for v in icaos]),
+        ('mfr-code lookup', 'SELECT * FROM manufacturers WHERE mfr_code = ?', [(v,) for v in mfr_codes]),
+        ('FAA registration lookup', 'SELECT * FROM registrations WHERE registration = ?',
+         [(v,) for v in faa_registrations]),
+        ('capture registration lookup', 'SELECT * FROM captures WHERE registration = ?',
+         [(v,) for v in registrations]),
+        ('manufacturer filter', 'SELECT * FROM captures WHERE manufacturer = ? COLLATE NOCASE',
+         [(v,) for v in manufacturers]),
+        ('captures on a date', 'SELECT * FROM captures WHERE capture_date = ? ORDER BY capture_time',
+         [(v,) for v in dates]),
+        ('50 most recent', 'SELECT * FROM captures ORDER BY capture_date DESC, capture_time DESC LIMIT 50',
+         [()] * iterations if registrations else []),
+        # The Hangar search today: a substring scan over every capture
+        ('text search (LIKE scan)',
+         "SELECT DISTINCT manufacturer, model FROM captures WHERE manufacturer LIKE ?1 OR model LIKE ?1",
+         [(f'%{t}%',) for t in terms]),
+    ]
+    if db.execute("SELECT 1 FROM sqlite_master WHERE name = 'aircraft_search'").fetchone():
+        queries.append(('text search (FTS5 prefix)',
+                        "SELECT manufacturer, model FROM aircraft_search "
+                        "WHERE aircraft_search MATCH ? AND source = 'capture'",
+                        [(f'"{t}"*',) for t in terms]))
+
+    results = []
+    for name, sql, params in queries:
+        if not params:
+            continue
+        plan = '; '.join(row[-1] for row in db.execute(f'EXPLAIN QUERY PLAN {sql}', params[0]))
+        timings = []
+        returned = 0
+        for args in params:
+            start = time.perf_counter()
+            returned += len(db.execute(sql, args).fetchall())
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        results.append((name, statistics.median(timings), p95, returned / len(params), plan))
+    return results
+
+
+def print_benchmark(results):
+    print("\n" + "="*60)
+    print("QUERY LATENCY")
+    print("="*60)
+    for name, median, p95, rows, plan in results:
+        print(f"  {name:28} {median:9.1f} us median {p95:9.1f} us p95 {rows:9.1f} rows")
+        print(f"    plan: {plan}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the indexed SQLite reference database.")
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE, help="Database file to write")
+    parser.add_argument('--manufacturer', type=Path, default=FAA_MANUFACTURER, help="FAA manufacturer reference CSV")
+    parser.add_argument('--registry', type=Path, default=FAA_AIRCRAFT, help="FAA registered aircraft CSV")
+    parser.add_argument('--captures', type=Path, default=CAPTURES, help="Capture CSV (generate_test_data.py output)")
+    parser.add_argument('--benchmark', action='store_true', help="Time the app's queries after building")
+    parser.add_argument('--benchmark-only', action='store_true', help="Benchmark an existing database without rebuilding")
+    parser.add_argument('--iterations', type=int, default=200, help="Runs per benchmark query")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented('reference_db', args) as metrics:
+        if not args.benchmark_only:
+            print(f"Building reference database: {args.output}")
+            counts = build_database(args.output, {
+                'manufacturers': args.manufacturer,
+                'registrations': args.registry,
+                'captures': args.captures,
+            }, metrics)
+            for table, count in counts.items():
+                metrics.set(table, count)
+            print(f"Done! {args.output.stat().st_size:,} bytes")
+        elif not args.output.exists():
+            print(f"Error: {args.output} not found")
+            sys.exit(1)
+
+        if args.benchmark or args.benchmark_only:
+            db = sqlite3.connect(f'file:{args.output}?mode=ro', uri=True)
+            with metrics.stage('benchmark'):
+                print_benchmark(benchmark_queries(db, args.iterations))
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
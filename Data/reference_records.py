@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Compact record types for loaded reference tables.
+
+load_manufacturer_reference() used to keep an 8-key dict of strings per
+MFR-CODE, and generate_test_data.py built another dict per matched aircraft.
+These NamedTuples hold the same fields without a per-record hash table and
+give typed attribute access (record.model instead of record['model']).
+
+The loaders intern the highly repetitive values - aircraft/engine/category
+codes, engine and seat counts, weight classes, manufacturer names, cities and
+state codes - so each distinct string is stored once rather than once per row.
+
+Usage:
+    python3 reference_records.py   # compare dict vs record memory for the manufacturer table
+"""
+
+import csv
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import NamedTuple
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+FAA_MANUFACTURER = SCRIPT_DIR / "FAA-Manufacturer-Reference.csv"
+
+intern = sys.intern
+
+
+class ManufacturerRecord(NamedTuple):
+    """One FAA-Manufacturer-Reference.csv row, keyed elsewhere by MFR-CODE."""
+    manufacturer: str
+    model: str
+    type_acft: str  # 1-9, H, O
+    type_eng: str
+    ac_cat: str  # Aircraft classification (1-9)
+    no_eng: str
+    no_seats: str
+    ac_weight: str
+
+
+class AircraftRecord(NamedTuple):
+    """One registered aircraft joined with its manufacturer record and ICAO code."""
+    registration: str
+    icao: str
+    manufacturer: str
+    model: str
+    engine_type: str
+    num_engines: str
+    aircraft_type: str
+    aircraft_classification: str
+    city: str
+    state: str
+
+
+class RegistrationRecord(NamedTuple):
+    """One registry entry as served by registration_index.py."""
+    registration: str  # With the N prefix
+    mfr_code: str
+    city: str
+    state: str
+    icao: str  # '' if the MFR-CODE has no resolved ICAO
+
+
+# FAA CSV column for each ManufacturerRecord field
+MANUFACTURER_COLUMNS = {
+    'manufacturer': 'MANUFACTURER',
+    'model': 'MODEL',
+    'type_acft': 'TYPE-ACFT',
+    'type_eng': 'TYPE-ENG',
+    'ac_cat': 'AC-CAT',
+    'no_eng': 'NO-ENG',
+    'no_seats': 'NO-SEATS',
+    'ac_weight': 'AC-WEIGHT',
+}
+
+# Fields that are unique per row, so not worth interning
+UNIQUE_FIELDS = {'model'}
+
+
+def read_manufacturer_reference(path=FAA_MANUFACTURER):
+    """
+    Read FAA-Manufacturer-Reference.csv into {MFR-CODE: ManufacturerRecord}.
+
+    Values are stripped and the repetitive ones interned. Missing columns
+    read as ''.
+    """
+    manufacturers = {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        code_index = header.index('MFR-CODE') if 'MFR-CODE' in header else None
+        if code_index is None:
+            return manufacturers
+        indexes = [header.index(column) if column in header else None
+                   for column in MANUFACTURER_COLUMNS.values()]
+        interned = [field not in UNIQUE_FIELDS for field in MANUFACTURER_COLUMNS]
+
+        for row in reader:
+            code = row[code_index].strip() if code_index < len(row) else ''
+            if not code:
+                continue
+            values = []
+            for index, intern_value in zip(indexes, interned):
+                value = row[index].strip() if index is not None and index < len(row) else ''
+                values.append(intern(value) if intern_value else value)
+            manufacturers[code] = ManufacturerRecord._make(values)
+    return manufacturers
+
+
+def aircraft_record(registration, icao, mfr, engine_type, city, state):
+    """Build an AircraftRecord from a registry row's fields and its ManufacturerRecord."""
+    return AircraftRecord(
+        registration,
+        icao,
+        intern(mfr.manufacturer.title()),
+        mfr.model,
+        engine_type,
+        mfr.no_eng or '1',
+        mfr.type_acft,
+        mfr.ac_cat,
+        intern(city),
+        intern(state),
+    )
+
+
+# =============================================================================
+# Memory comparison
+# =============================================================================
+
+def _read_as_dicts(path):
+    """The previous dict-of-dicts layout, for comparison."""
+    manufacturers = {}
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            code = row.get('MFR-CODE', '').strip()
+            if code:
+                manufacturers[code] = {field: row.get(column, '').strip()
+                                       for field, column in MANUFACTURER_COLUMNS.items()}
+    return manufacturers
+
+
+def traced_size(load, path):
+    """(rows, bytes still allocated after load(path)) via tracemalloc."""
+    tracemalloc.start()
+    table = load(path)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(table), size
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else FAA_MANUFACTURER
+    if not path.exists():
+        print(f"Error: {path} not found")
+        sys.exit(1)
+
+    print(f"Manufacturer table memory ({path.name}):")
+    rows, dict_bytes = traced_size(_read_as_dicts, path)
+    _, record_bytes = traced_size(read_manufacturer_reference, path)
+    print(f"  dict per code:        {dict_bytes / rows:7.0f} bytes/code  ({dict_bytes / 1e6:,.1f} MB)")
+    print(f"  ManufacturerRecord:   {record_bytes / rows:7.0f} bytes/code  ({record_bytes / 1e6:,.1f} MB)")
+    print(f"  {rows:,} codes, {dict_bytes / record_bytes:.1f}x smaller")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""
+Compact N-number lookup index over the full FAA registry.
+
+generate_test_data.py streams FAA-Registered-Aircraft.csv to sample it and
+keeps nothing, so resolving a registration someone typed or read off a tail
+means rescanning the registry. This compiles the registry once into
+AirplaneID-Registrations.bin: a sorted array of fixed-width N-number keys, a
+parallel table of fixed-size records (MFR-CODE, state, city, resolved ICAO
+and the row's byte offset in the source CSV) and an optional Bloom filter.
+RegistrationIndex maps the file and answers N-number -> RegistrationRecord by
+binary search in microseconds; the Bloom filter turns most misses away
+without touching the key array.
+
+Keys are stored without the N prefix or dashes ("N123AB" -> "123AB"); US
+N-numbers have at most five characters after the N. Duplicate registrations
+keep the last row, like a dict load.
+
+Usage:
+    python3 registration_index.py                       # compile AirplaneID-Registrations.bin
+    python3 registration_index.py --check N12345 N1AB   # compile, then look up registrations
+    python3 registration_index.py --benchmark-only      # time lookups against an existing index
+    [--registry CSV] [--manufacturer CSV] [--output FILE] [--no-bloom] [--false-positive-rate 0.01]
+    [--metrics-json FILE] [--profile FILE] [--trace-memory]
+
+File layout (version 1, all integers little-endian):
+    Header      magic "AIDNREG\\0", u16 version, u16 key width, u32 row count,
+                u32 Bloom hash count, u32 reserved, u64 keys offset,
+                u64 records offset, u64 strings offset, u64 strings size,
+                u64 Bloom offset, u64 Bloom bits (0 = no filter)
+    Keys        row count x key width bytes, NUL padded, sorted bytewise
+    Records     row count x (7-byte MFR-CODE, 2-byte state, u32 city string,
+                u32 ICAO string, u64 source CSV row offset)
+    Strings     distinct cities and ICAO codes, each as u8 length + UTF-8
+    Bloom       Bloom bits bytes; bit i is byte i >> 3, mask 1 << (i & 7).
+                Probe j of a key is (h1 + j * h2) mod bits, where h is the
+                64-bit FNV-1a hash of the key bytes, h1 = h & 0xFFFFFFFF and
+                h2 = (h >> 32) | 1.
+"""
+
+import argparse
+import csv
+import math
+import mmap
+import random
+import statistics
+import struct
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # Optional: set_row_offsets() falls back to struct.pack_into
+    np = None
+
+from generate_test_data import (FAA_MANUFACTURER, IcaoResolution, load_icao_mapping,
+                                load_manufacturer_reference)
+from icao_matcher import IcaoMatcher
+from instrumentation import Metrics, add_arguments, instrumented
+from reference_bundle import KeyColumn
+from reference_records import RegistrationRecord, read_manufacturer_reference
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+FAA_AIRCRAFT = SCRIPT_DIR / "FAA-Registered-Aircraft.csv"
+OUTPUT_FILE = SCRIPT_DIR / "AirplaneID-Registrations.bin"
+
+MAGIC = b"AIDNREG\0"
+FORMAT_VERSION = 1
+KEY_WIDTH = 5
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+
+HEADER = struct.Struct("<8sHHIIIQQQQQQ")
+RECORD = struct.Struct("<7s2sIIQ")
+OFFSET = struct.Struct("<Q")
+
+# Registry columns each record is built from
+ENTRY_COLUMNS = ('REGISTRATION', 'MFR-CODE', 'CITY', 'STATE')
+
+RECORD_DTYPE = np.dtype([('mfr_code', 'S7'), ('state', 'S2'), ('city', '<u4'),
+                         ('icao', '<u4'), ('row_offset', '<u8')]) if np is not None else None
+
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+MASK64 = (1 << 64) - 1
+
+# Registry rows between progress lines
+PROGRESS_EVERY = 50_000
+
+
+def registration_key(n_number):
+    """
+    Index key for an N-number: uppercase, no N prefix, dashes or spaces.
+
+    Returns None for text that cannot be an N-number.
+    """
+    text = n_number.strip().upper().replace('-', '').replace(' ', '')
+    if text.startswith('N'):
+        text = text[1:]
+    if not text or len(text) > KEY_WIDTH or not (text.isascii() and text.isalnum()):
+        return None
+    return text.encode('ascii')
+
+
+# =============================================================================
+# Bloom filter
+# =============================================================================
+
+def bloom_parameters(count, false_positive_rate):
+    """(bits, hash count) for `count` keys at the target false-positive rate."""
+    bits = max(64, math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2))
+    hashes = max(1, round(bits / max(1, count) * math.log(2)))
+    return bits, hashes
+
+
+def bloom_probes(key, bits, hashes):
+    """Bit positions for a key (FNV-1a double hashing, see the file layout)."""
+    h = FNV_OFFSET
+    for byte in key:
+        h = ((h ^ byte) * FNV_PRIME) & MASK64
+    h1 = h & 0xFFFFFFFF
+    h2 = (h >> 32) | 1
+    return [(h1 + j * h2) % bits for j in range(hashes)]
+
+
+def build_bloom(keys, bits, hashes):
+    bloom = bytearray((bits + 7) // 8)
+    for key in keys:
+        for bit in bloom_probes(key, bits, hashes):
+            bloom[bit >> 3] |= 1 << (bit & 7)
+    return bytes(bloom)
+
+
+# =============================================================================
+# Compiler
+# =============================================================================
+
+def registry_entry(reg, mfr_code, city, state, resolved, row_offset):
+    """(key, entry) for one registry row's fields, or None if reg is not an N-number."""
+    key = registration_key(reg)
+    if key is None:
+        return None
+    mfr_code = mfr_code.strip()
+    return key, (mfr_code, city.strip().title(), state.strip(), resolved.get(mfr_code, ''), row_offset)
+
+
+def read_registry_entries(path, resolved, progress=None):
+    """
+    Read the registry into {key: (mfr_code, city, state, icao, row offset)}.
+
+    The row offset is the byte position of the row's line in the CSV. Like
+    registry_chunks() in generate_test_data.py, this assumes no quoted field
+    spans a line break.
+    """
+    entries = {}
+    with open(path, 'rb') as f:
+        header = f.readline()
+        fieldnames = next(csv.reader([header.decode('utf-8-sig')]))
+        columns = [fieldnames.index(c) for c in ENTRY_COLUMNS]
+        last_column = max(columns)
+        line_start = [f.tell()]
+
+        def lines():
+            position = line_start[0]
+            for line in f:
+                line_start[0] = position
+                position += len(line)
+                yield line.decode('utf-8')
+
+        rows = 0
+        for row in csv.reader(lines()):
+            rows += 1
+            if progress is not None and rows % PROGRESS_EVERY == 0:
+                progress.update(rows)
+            if len(row) <= last_column:
+                continue
+            entry = registry_entry(*(row[i] for i in columns), resolved, line_start[0])
+            if entry is not None:
+                entries[entry[0]] = entry[1]
+    if progress is not None:
+        progress.update(rows)
+    return entries
+
+
+class StringPool:
+    """Deduplicated u8-length-prefixed strings, optionally continuing an existing pool."""
+
+    def __init__(self, data=b''):
+        self.data = bytearray(data)
+        self.offsets = {}
+        offset = 0
+        while offset < len(self.data):
+            length = self.data[offset]
+            self.offsets.setdefault(self.data[offset + 1:offset + 1 + length].decode('utf-8'), offset)
+            offset += 1 + length
+
+    def add(self, value):
+        offset = self.offsets.get(value)
+        if offset is None:
+            # At most 255 bytes, cut on a character boundary
+            encoded = value.encode('utf-8')[:255].decode('utf-8', 'ignore').encode('utf-8')
+            offset = self.offsets[value] = len(self.data)
+            self.data.append(len(encoded))
+            self.data.extend(encoded)
+        return offset
+
+
+def pack_record(entry, strings):
+    mfr_code, city, state, icao, row_offset = entry
+    return RECORD.pack(mfr_code.encode('ascii', 'replace'), state.encode('ascii', 'replace'),
+                       strings.add(city), strings.add(icao), row_offset)
+
+
+def write_index_file(output_file, row_count, keys, records, strings, bloom=b'', bloom_bits=0, bloom_hashes=0):
+    """Write the sections of an index file (keys already padded). Returns the file size."""
+    keys_offset = HEADER.size
+    records_offset = keys_offset + len(keys)
+    strings_offset = records_offset + len(records)
+    bloom_offset = strings_offset + len(strings)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, KEY_WIDTH, row_count, bloom_hashes, 0,
+                         keys_offset, records_offset, strings_offset, len(strings),
+                         bloom_offset, bloom_bits)
+
+    tmp_file = Path(output_file).with_suffix('.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(header)
+        f.write(keys)
+        f.write(records)
+        f.write(strings)
+        f.write(bloom)
+    tmp_file.replace(output_file)
+    return Path(output_file).stat().st_size
+
+
+def compile_index(entries, output_file=OUTPUT_FILE, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+    """
+    Write entries from read_registry_entries() as an index file.
+
+    A false_positive_rate of None leaves the Bloom filter out. Returns the
+    file size in bytes.
+    """
+    keys = sorted(entries)
+    strings = StringPool()
+    records = b''.join(pack_record(entries[key], strings) for key in keys)
+
+    if false_positive_rate and keys:
+        bloom_bits, bloom_hashes = bloom_parameters(len(keys), false_positive_rate)
+        bloom = build_bloom(keys, bloom_bits, bloom_hashes)
+    else:
+        bloom_bits, bloom_hashes, bloom = 0, 0, b''
+
+    return write_index_file(output_file, len(keys), b''.join(key.ljust(KEY_WIDTH, b'\0') for key in keys),
+                            records, strings.data, bloom, bloom_bits, bloom_hashes)
+
+
+def patch_index(path, removed, entries, source=None):
+    """
+    Apply a registry delta to an index file in place.
+
+    removed holds the keys to drop (deleted and changed registrations) and
+    entries the {key: entry} to add (inserted and changed ones), as built by
+    registry_entry(). Unchanged records are copied across in runs, so the
+    Python work is proportional to the number of changes. New keys are added
+    to the existing Bloom filter; removed keys keep their bits, which only
+    costs false positives until the next full build.
+
+    Row offsets of unchanged records point into the registry the index was
+    built from. Pass source, a RegistrySnapshot of the new registry
+    (registry_snapshot.py), to move every record's offset to the new file.
+    Returns the new row count.
+    """
+    index = RegistrationIndex(path)
+    buffer, row_count = index.buffer, len(index)
+    keys_start = index._keys.offset
+    strings = StringPool(buffer[index._strings_offset:index._bloom_offset])
+    bloom = bytearray(buffer[index._bloom_offset:index._bloom_offset + (index.bloom_bits + 7) // 8])
+
+    changes = sorted({key: None for key in removed} | {key: None for key in entries})
+    keys, records = bytearray(), bytearray()
+    copied = 0
+    for key in changes:
+        padded = key.ljust(KEY_WIDTH, b'\0')
+        position = index._search(padded, copied)
+        # Copy the unchanged run before this key, then skip the old record
+        keys += buffer[keys_start + copied * KEY_WIDTH:keys_start + position * KEY_WIDTH]
+        records += buffer[index._records_offset + copied * RECORD.size:
+                          index._records_offset + position * RECORD.size]
+        copied = position
+        if position < row_count and index._keys[position] == padded:
+            copied += 1
+        if key in entries:
+            keys += padded
+            records += pack_record(entries[key], strings)
+            for bit in (bloom_probes(key, index.bloom_bits, index.bloom_hashes) if bloom else ()):
+                bloom[bit >> 3] |= 1 << (bit & 7)
+    keys += buffer[keys_start + copied * KEY_WIDTH:keys_start + row_count * KEY_WIDTH]
+    records += buffer[index._records_offset + copied * RECORD.size:
+                      index._records_offset + row_count * RECORD.size]
+    bloom_bits, bloom_hashes = index.bloom_bits, index.bloom_hashes
+    index.close()
+
+    new_count = len(keys) // KEY_WIDTH
+    if source is not None:
+        if bytes(keys) != source.keys:
+            raise ValueError(f"{path} does not match the snapshot's registrations after patching")
+        set_row_offsets(records, source.offsets)
+    write_index_file(path, new_count, keys, records, strings.data, bloom, bloom_bits, bloom_hashes)
+    return new_count
+
+
+def set_row_offsets(records, offsets):
+    """Overwrite the row offset of every packed record, in order."""
+    if np is not None:
+        view = np.frombuffer(records, dtype=RECORD_DTYPE)
+        view['row_offset'] = np.frombuffer(offsets, dtype='<u8')
+        return
+    position = RECORD.size - 8
+    for offset in offsets:
+        OFFSET.pack_into(records, position, offset)
+        position += RECORD.size
+
+
+def build_index(registry=FAA_AIRCRAFT, manufacturer=FAA_MANUFACTURER, output_file=OUTPUT_FILE,
+                false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE, metrics=None):
+    """Resolve ICAO codes per MFR-CODE, read the registry and compile the index. Returns row count."""
+    metrics = metrics or Metrics('registration_index')
+
+    print("Resolving ICAO codes per manufacturer code...")
+    with metrics.stage('resolve_icao', unit='codes') as stage:
+        if Path(manufacturer) == FAA_MANUFACTURER:
+            manufacturers = load_manufacturer_reference()
+        else:
+            manufacturers = read_manufacturer_reference(manufacturer)
+        icao_map, icao_by_model = load_icao_mapping()
+        # The persisted resolution cache is keyed to the default manufacturer file
+        resolution = IcaoResolution.load_or_build(
+            manufacturers, icao_map, icao_by_model, IcaoMatcher(icao_map),
+            persist=Path(manufacturer) == FAA_MANUFACTURER)
+        stage.update(len(resolution))
+    print(f"  Resolved {resolution.resolved_count:,} of {len(resolution):,} codes")
+
+    print(f"Reading {registry}...")
+    with metrics.stage('read_registry', unit='rows', progress_every=PROGRESS_EVERY) as stage:
+        entries = read_registry_entries(registry, resolution.resolved, progress=stage)
+    resolved = sum(1 for entry in entries.values() if entry[3])
+    print(f"  {len(entries):,} registrations, {resolved:,} with an ICAO code")
+    metrics.set('registrations', len(entries))
+    metrics.set('with_icao', resolved)
+
+    with metrics.stage('write_index', unit='keys') as stage:
+        size = compile_index(entries, output_file, false_positive_rate)
+        stage.update(len(entries))
+    print(f"  {size:,} bytes ({size / max(1, len(entries)):.1f} bytes/registration)")
+    metrics.set('index_bytes', size)
+    return len(entries)
+
+
+# =============================================================================
+# Reader
+# =============================================================================
+
+class RegistrationIndex:
+    """Memory-mapped reader for a compiled registration index."""
+
+    def __init__(self, path=OUTPUT_FILE):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, key_width, row_count, self.bloom_hashes, _, keys_offset,
+         self._records_offset, self._strings_offset, _, self._bloom_offset,
+         self.bloom_bits) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a registration index")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is registration index version {version}, "
+                             f"expected {FORMAT_VERSION}")
+        self.key_width = key_width
+        self._keys = KeyColumn(self.buffer, keys_offset, key_width, row_count)
+        self.bloom_rejections = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, n_number):
+        key = registration_key(n_number)
+        return key is not None and self._index(key.ljust(self.key_width, b'\0')) >= 0
+
+    def might_contain(self, key):
+        """Bloom filter check for an encoded key; True if there is no filter."""
+        if not self.bloom_bits:
+            return True
+        # bloom_probes() inlined so a miss stops at its first clear bit
+        h = FNV_OFFSET
+        for byte in key:
+            h = ((h ^ byte) * FNV_PRIME) & MASK64
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        buffer, base, bits = self.buffer, self._bloom_offset, self.bloom_bits
+        for j in range(self.bloom_hashes):
+            bit = (h1 + j * h2) % bits
+            if not buffer[base + (bit >> 3)] & (1 << (bit & 7)):
+                self.bloom_rejections += 1
+                return False
+        return True
+
+    def _search(self, padded, lo=0):
+        """
+        bisect_left over the key array, inlined on the mapped bytes (about
+        3x faster than bisect through KeyColumn.__getitem__).
+        """
+        buffer, base, width = self.buffer, self._keys.offset, self.key_width
+        hi = self._keys.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + mid * width
+            if buffer[start:start + width] < padded:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _index(self, padded, lo=0):
+        index = self._search(padded, lo)
+        if index < len(self._keys) and self._keys[index] == padded:
+            return index
+        return -1
+
+    def _string_at(self, offset):
+        start = self._strings_offset + offset
+        return self.buffer[start + 1:start + 1 + self.buffer[start]].decode('utf-8')
+
+    def _record(self, index, key):
+        mfr_code, state, city, icao, _ = RECORD.unpack_from(
+            self.buffer, self._records_offset + index * RECORD.size)
+        return RegistrationRecord(
+            'N' + key.decode('ascii'),
+            mfr_code.rstrip(b'\0').decode('ascii'),
+            self._string_at(city),
+            state.rstrip(b'\0').decode('ascii'),
+            self._string_at(icao),
+        )
+
+    def lookup(self, n_number):
+        """RegistrationRecord for an N-number, or None if it is not registered."""
+        key = registration_key(n_number)
+        if key is None or not self.might_contain(key):
+            return None
+        index = self._index(key.ljust(self.key_width, b'\0'))
+        return self._record(index, key) if index >= 0 else None
+
+    def lookup_many(self, n_numbers):
+        """
+        Look up a batch of N-numbers. Returns a list of RegistrationRecord or
+        None, in input order.
+
+        The keys are searched in sorted order, each search starting where the
+        previous one ended, so a batch narrows the key range as it goes.
+        """
+        n_numbers = list(n_numbers)
+        wanted = {}
+        for n_number in n_numbers:
+            key = registration_key(n_number)
+            if key is not None and key not in wanted and self.might_contain(key):
+                wanted[key] = None
+
+        lo = 0
+        for key in sorted(wanted):
+            padded = key.ljust(self.key_width, b'\0')
+            index = self._search(padded, lo)
+            if index < len(self._keys) and self._keys[index] == padded:
+                wanted[key] = self._record(index, key)
+            lo = index
+
+        results = []
+        for n_number in n_numbers:
+            key = registration_key(n_number)
+            results.append(wanted.get(key) if key is not None else None)
+        return results
+
+    def source_row(self, n_number, registry=FAA_AIRCRAFT):
+        """The full registry CSV row for an N-number as a dict, or None."""
+        key = registration_key(n_number)
+        index = self._index(key.ljust(self.key_width, b'\0')) if key is not None else -1
+        if index < 0:
+            return None
+        row_offset = RECORD.unpack_from(self.buffer, self._records_offset + index * RECORD.size)[4]
+        with open(registry, 'rb') as f:
+            fieldnames = next(csv.reader([f.readline().decode('utf-8-sig')]))
+            f.seek(row_offset)
+            values = next(csv.reader([f.readline().decode('utf-8')]))
+        return dict(zip(fieldnames, values))
+
+    def close(self):
+        self.buffer.close()
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+def random_misses(index, count, rng):
+    """N-numbers that are valid-looking but not in the index."""
+    alphabet = '0123456789ABCDEFGHJKLMNPQRSTUVWXYZ'
+    misses = []
+    while len(misses) < count:
+        candidate = 'N' + rng.choice('123456789') + ''.join(
+            rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+        if candidate not in index:
+            misses.append(candidate)
+    return misses
+
+
+def time_lookups(lookup, n_numbers):
+    """Median and p95 microseconds per lookup()."""
+    timings = []
+    for n_number in n_numbers:
+        start = time.perf_counter()
+        lookup(n_number)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def benchmark(index, samples=2000, batch_size=10_000, seed=8643):
+    """Print single and batch lookup latency for an open RegistrationIndex."""
+    rng = random.Random(seed)
+    hits = ['N' + index._keys[rng.randrange(len(index))].rstrip(b'\0').decode('ascii')
+            for _ in range(samples)]
+    misses = random_misses(index, samples, rng)
+
+    print(f"\nLookup latency ({len(index):,} registrations):")
+    median, p95 = time_lookups(index.lookup, hits)
+    print(f"  hit                  {median:7.2f} us median  {p95:7.2f} us p95")
+
+    rejected_before = index.bloom_rejections
+    median, p95 = time_lookups(index.lookup, misses)
+    rejected = index.bloom_rejections - rejected_before
+    print(f"  miss                 {median:7.2f} us median  {p95:7.2f} us p95"
+          f"  ({rejected:,}/{len(misses):,} rejected by Bloom filter)")
+
+    bits, hashes = index.bloom_bits, index.bloom_hashes
+    index.bloom_bits = 0
+    median, p95 = time_lookups(index.lookup, misses)
+    index.bloom_bits, index.bloom_hashes = bits, hashes
+    print(f"  miss, no Bloom       {median:7.2f} us median  {p95:7.2f} us p95")
+
+    batch = [rng.choice(hits) if rng.random() < 0.5 else rng.choice(misses) for _ in range(batch_size)]
+    start = time.perf_counter()
+    results = index.lookup_many(batch)
+    seconds = time.perf_counter() - start
+    found = sum(1 for record in results if record is not None)
+    print(f"  lookup_many({batch_size:,})   {seconds * 1e6 / batch_size:7.2f} us/key"
+          f"  ({found:,} found, {batch_size / seconds:,.0f} keys/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped N-number registration index.")
+    parser.add_argument('--registry', type=Path, default=FAA_AIRCRAFT, help="FAA registered aircraft CSV")
+    parser.add_argument('--manufacturer', type=Path, default=FAA_MANUFACTURER, help="FAA manufacturer reference CSV")
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE, help="Index file to write")
+    parser.add_argument('--no-bloom', action='store_true', help="Leave out the Bloom filter")
+    parser.add_argument('--false-positive-rate', type=float, default=DEFAULT_FALSE_POSITIVE_RATE,
+                        help="Bloom filter false-positive rate")
+    parser.add_argument('--check', nargs='+', metavar='N_NUMBER', help="Look up registrations")
+    parser.add_argument('--benchmark', action='store_true', help="Time lookups after building")
+    parser.add_argument('--benchmark-only', action='store_true', help="Benchmark an existing index without rebuilding")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented('registration_index', args) as metrics:
+        if not args.benchmark_only:
+            if not args.registry.exists():
+                print(f"Error: {args.registry} not found")
+                sys.exit(1)
+            print(f"Building registration index: {args.output}")
+            build_index(args.registry, args.manufacturer, args.output,
+                        None if args.no_bloom else args.false_positive_rate, metrics)
+        elif not args.output.exists():
+            print(f"Error: {args.output} not found")
+            sys.exit(1)
+
+        index = RegistrationIndex(args.output)
+        if args.check:
+            for n_number, record in zip(args.check, index.lookup_many(args.check)):
+                print(f"  {n_number}: {record}")
+        if args.benchmark or args.benchmark_only:
+            with metrics.stage('benchmark'):
+                benchmark(index)
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
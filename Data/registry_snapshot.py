@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Snapshot the FAA registry and ingest daily releases as deltas.
+
+The FAA republishes FAA-Registered-Aircraft.csv daily with only a small
+fraction of registrations changed, but everything downstream is rebuilt from
+the whole file. This keeps a compact snapshot of the last ingested release -
+per registration, a 64-bit fingerprint of its row and the row's byte offset -
+and compares a new release against it to find inserted, deleted and changed
+registrations.
+
+A refresh:
+  1. fingerprints the new release (one pass over raw lines, no CSV parsing
+     unless a line has quotes),
+  2. diffs it against the saved snapshot,
+  3. writes the changed rows to FAA-Registered-Aircraft.delta.csv,
+  4. patches AirplaneID-Registrations.bin (registration_index.py) with only
+     the changed rows, resolving ICAO codes just for their MFR-CODEs,
+  5. saves the new snapshot.
+Step 1 reads the file once; everything after it scales with the number of
+changes rather than the registry size.
+
+Usage:
+    python3 registry_snapshot.py                          # refresh from FAA-Registered-Aircraft.csv
+    python3 registry_snapshot.py --registry new.csv       # refresh from another release
+    python3 registry_snapshot.py --diff old.snap new.snap # compare two saved snapshots
+    [--manufacturer CSV] [--snapshot FILE] [--delta FILE] [--index FILE] [--no-index]
+    [--metrics-json FILE] [--profile FILE] [--trace-memory]
+
+Snapshot layout (version 1, all integers little-endian):
+    Header        magic "AIDSNAP\\0", u16 version, u16 key width, u32 row count,
+                  32-byte SHA-256 of the registry file, u64 registry size
+    Keys          row count x key width bytes, NUL padded, sorted bytewise
+                  (registration_key() of the REGISTRATION column)
+    Fingerprints  row count x u64: first 8 bytes of BLAKE2b over the raw row
+    Offsets       row count x u64: byte offset of the row in the registry
+"""
+
+import argparse
+import csv
+import hashlib
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: diff_snapshots() falls back to a merge join
+    np = None
+
+from generate_test_data import FAA_MANUFACTURER, find_icao, load_icao_mapping, load_manufacturer_reference
+from icao_matcher import IcaoMatcher
+from instrumentation import add_arguments, instrumented
+from registration_index import (ENTRY_COLUMNS, FAA_AIRCRAFT, KEY_WIDTH, OUTPUT_FILE as REGISTRATION_INDEX,
+                                PROGRESS_EVERY, patch_index, registration_key, registry_entry)
+from reference_records import read_manufacturer_reference
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+SNAPSHOT_FILE = SCRIPT_DIR / "FAA-Registered-Aircraft.snapshot"
+DELTA_FILE = SCRIPT_DIR / "FAA-Registered-Aircraft.delta.csv"
+
+MAGIC = b"AIDSNAP\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHI32sQ")
+
+
+class RegistryDelta(NamedTuple):
+    """Registration keys (registration_key() bytes) that differ between two snapshots."""
+    inserted: list
+    deleted: list
+    changed: list
+
+    @property
+    def total(self):
+        return len(self.inserted) + len(self.deleted) + len(self.changed)
+
+
+class RegistrySnapshot:
+    """Sorted keys with a row fingerprint and row offset each."""
+
+    def __init__(self, keys, fingerprints, offsets, source_sha256=b'\0' * 32, source_size=0):
+        self.keys = keys                  # bytes: padded keys, sorted
+        self.fingerprints = fingerprints  # array('Q')
+        self.offsets = offsets            # array('Q')
+        self.source_sha256 = source_sha256
+        self.source_size = source_size
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def key(self, index):
+        return self.keys[index * KEY_WIDTH:(index + 1) * KEY_WIDTH].rstrip(b'\0')
+
+    @classmethod
+    def take(cls, path=FAA_AIRCRAFT, progress=None):
+        """Fingerprint every row of a registry file. Duplicate registrations keep the last row."""
+        rows = {}
+        digest = hashlib.sha256()
+        blake2b = hashlib.blake2b
+        with open(path, 'rb') as f:
+            header = f.readline()
+            digest.update(header)
+            column = next(csv.reader([header.decode('utf-8-sig')])).index('REGISTRATION')
+            position = f.tell()
+            count = 0
+            for line in f:
+                digest.update(line)
+                row = line.rstrip(b'\r\n')
+                if b'"' in row:
+                    fields = next(csv.reader([row.decode('utf-8')]), [])
+                    reg = fields[column] if column < len(fields) else ''
+                else:
+                    fields = row.split(b',', column + 1)
+                    reg = fields[column].decode('utf-8', 'replace') if column < len(fields) else ''
+                key = registration_key(reg)
+                if key is not None:
+                    rows[key] = (int.from_bytes(blake2b(row, digest_size=8).digest(), 'little'), position)
+                position += len(line)
+                count += 1
+                if progress is not None and count % PROGRESS_EVERY == 0:
+                    progress.update(count)
+        if progress is not None:
+            progress.update(count)
+
+        keys = sorted(rows)
+        return cls(b''.join(key.ljust(KEY_WIDTH, b'\0') for key in keys),
+                   array('Q', (rows[key][0] for key in keys)),
+                   array('Q', (rows[key][1] for key in keys)),
+                   digest.digest(), position)
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_FILE):
+        with open(path, 'rb') as f:
+            magic, version, key_width, count, sha256, size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a registry snapshot")
+            if version != FORMAT_VERSION or key_width != KEY_WIDTH:
+                raise ValueError(f"{path} is snapshot version {version} (key width {key_width}), "
+                                 f"expected {FORMAT_VERSION} ({KEY_WIDTH})")
+            keys = f.read(count * KEY_WIDTH)
+            fingerprints, offsets = array('Q'), array('Q')
+            fingerprints.fromfile(f, count)
+            offsets.fromfile(f, count)
+        if sys.byteorder != 'little':
+            fingerprints.byteswap()
+            offsets.byteswap()
+        return cls(keys, fingerprints, offsets, sha256, size)
+
+    def save(self, path=SNAPSHOT_FILE):
+        fingerprints, offsets = array('Q', self.fingerprints), array('Q', self.offsets)
+        if sys.byteorder != 'little':
+            fingerprints.byteswap()
+            offsets.byteswap()
+        tmp_file = Path(path).with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, KEY_WIDTH, len(self), self.source_sha256,
+                                self.source_size))
+            f.write(self.keys)
+            fingerprints.tofile(f)
+            offsets.tofile(f)
+        tmp_file.replace(path)
+
+
+def diff_snapshots(old, new):
+    """RegistryDelta from old to new; empty without comparing rows if the files are identical."""
+    if old.source_sha256 == new.source_sha256 and old.source_size == new.source_size:
+        return RegistryDelta([], [], [])
+
+    if np is not None:
+        old_keys = np.frombuffer(old.keys, dtype=f'S{KEY_WIDTH}')
+        new_keys = np.frombuffer(new.keys, dtype=f'S{KEY_WIDTH}')
+        old_fingerprints = np.frombuffer(old.fingerprints, dtype=np.uint64)
+        new_fingerprints = np.frombuffer(new.fingerprints, dtype=np.uint64)
+        common, old_index, new_index = np.intersect1d(old_keys, new_keys, assume_unique=True,
+                                                      return_indices=True)
+        changed = common[old_fingerprints[old_index] != new_fingerprints[new_index]]
+        return RegistryDelta(np.setdiff1d(new_keys, common, assume_unique=True).tolist(),
+                             np.setdiff1d(old_keys, common, assume_unique=True).tolist(),
+                             changed.tolist())
+
+    # Merge join over the two sorted key arrays
+    inserted, deleted, changed = [], [], []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        old_key, new_key = old.key(i), new.key(j)
+        if old_key == new_key:
+            if old.fingerprints[i] != new.fingerprints[j]:
+                changed.append(new_key)
+            i += 1
+            j += 1
+        elif old_key < new_key:
+            deleted.append(old_key)
+            i += 1
+        else:
+            inserted.append(new_key)
+            j += 1
+    deleted.extend(old.key(index) for index in range(i, len(old)))
+    inserted.extend(new.key(index) for index in range(j, len(new)))
+    return RegistryDelta(inserted, deleted, changed)
+
+
+def read_delta_rows(registry, snapshot, keys):
+    """
+    {key: (row offset, CSV row as a dict)} for keys present in snapshot,
+    read by seeking to each row's offset in registry.
+    """
+    positions = {}
+    for key in keys:
+        padded = key.ljust(KEY_WIDTH, b'\0')
+        lo, hi = 0, len(snapshot)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if snapshot.keys[mid * KEY_WIDTH:(mid + 1) * KEY_WIDTH] < padded:
+                lo = mid + 1
+            else:
+                hi = mid
+        positions[key] = snapshot.offsets[lo]
+
+    rows = {}
+    with open(registry, 'rb') as f:
+        fieldnames = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        for key, offset in sorted(positions.items(), key=lambda item: item[1]):
+            f.seek(offset)
+            values = next(csv.reader([f.readline().decode('utf-8')]))
+            rows[key] = (offset, dict(zip(fieldnames, values)))
+    return fieldnames, rows
+
+
+def write_delta(path, delta, fieldnames, rows):
+    """Delta CSV: a CHANGE column (insert/update/delete) then the registry columns."""
+    changes = [(key, 'insert') for key in delta.inserted] + [(key, 'update') for key in delta.changed]
+    changes += [(key, 'delete') for key in delta.deleted]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['CHANGE'] + fieldnames)
+        for key, change in sorted(changes):
+            if change == 'delete':
+                writer.writerow([change] + [key.decode('ascii') if name == 'REGISTRATION' else ''
+                                            for name in fieldnames])
+            else:
+                row = rows[key][1]
+                writer.writerow([change] + [row.get(name, '') for name in fieldnames])
+
+
+def resolve_delta_icao(rows, manufacturer=FAA_MANUFACTURER):
+    """
+    MFR-CODE -> ICAO for just the MFR-CODEs in the delta rows, with find_icao()
+    as generate_test_data.py's IcaoResolution does for every code.
+    """
+    if Path(manufacturer) == FAA_MANUFACTURER:
+        manufacturers = load_manufacturer_reference()
+    else:
+        manufacturers = read_manufacturer_reference(manufacturer)
+    icao_map, icao_by_model = load_icao_mapping()
+    matcher = IcaoMatcher(icao_map)
+
+    resolved = {}
+    for code in {row.get('MFR-CODE', '').strip() for _, row in rows.values()}:
+        mfr = manufacturers.get(code)
+        if mfr is not None:
+            resolved[code] = find_icao(mfr.manufacturer, mfr.model, icao_map, icao_by_model, matcher) or ''
+    return resolved
+
+
+def refresh(args, metrics):
+    """Snapshot args.registry, diff it against the saved snapshot and ingest the delta."""
+    if not args.registry.exists():
+        print(f"Error: {args.registry} not found")
+        sys.exit(1)
+
+    print(f"Fingerprinting {args.registry}...")
+    with metrics.stage('snapshot', unit='rows', progress_every=PROGRESS_EVERY) as stage:
+        new = RegistrySnapshot.take(args.registry, progress=stage)
+    print(f"  {len(new):,} registrations")
+    metrics.set('registrations', len(new))
+
+    if not args.snapshot.exists():
+        new.save(args.snapshot)
+        print(f"No previous snapshot; saved baseline {args.snapshot}")
+        print("Build the full registration index with: python3 registration_index.py")
+        return
+
+    with metrics.stage('diff', unit='registrations') as stage:
+        old = RegistrySnapshot.load(args.snapshot)
+        delta = diff_snapshots(old, new)
+        stage.update(len(new))
+    print(f"Delta: {len(delta.inserted):,} inserted, {len(delta.deleted):,} deleted, "
+          f"{len(delta.changed):,} changed")
+    metrics.set('inserted', len(delta.inserted))
+    metrics.set('deleted', len(delta.deleted))
+    metrics.set('changed', len(delta.changed))
+
+    with metrics.stage('write_delta', unit='rows') as stage:
+        fieldnames, rows = read_delta_rows(args.registry, new, delta.inserted + delta.changed)
+        write_delta(args.delta, delta, fieldnames, rows)
+        stage.update(delta.total)
+    print(f"  Wrote {args.delta}")
+
+    if not args.no_index and args.index.exists():
+        with metrics.stage('resolve_icao', unit='codes') as stage:
+            resolved = resolve_delta_icao(rows, args.manufacturer)
+            stage.update(len(resolved))
+        with metrics.stage('patch_index', unit='changes') as stage:
+            entries = {}
+            for key, (offset, row) in rows.items():
+                entry = registry_entry(*(row.get(column, '') for column in ENTRY_COLUMNS), resolved, offset)
+                if entry is not None:
+                    entries[entry[0]] = entry[1]
+            try:
+                count = patch_index(args.index, delta.deleted + delta.changed, entries, source=new)
+            except ValueError as e:
+                # Built from another release than the baseline snapshot; the
+                # snapshot is still saved so the next refresh diffs from here
+                count = None
+                print(f"  Could not patch {args.index}: {e}")
+                print("  Rebuild it with: python3 registration_index.py")
+            stage.update(delta.total)
+        if count is not None:
+            print(f"  Patched {args.index} ({count:,} registrations)")
+    elif not args.no_index:
+        print(f"  {args.index} not found; build it with: python3 registration_index.py")
+
+    new.save(args.snapshot)
+    print(f"Done! Saved snapshot {args.snapshot}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff FAA registry releases and ingest the delta.")
+    parser.add_argument('--registry', type=Path, default=FAA_AIRCRAFT, help="FAA registered aircraft CSV (new release)")
+    parser.add_argument('--manufacturer', type=Path, default=FAA_MANUFACTURER, help="FAA manufacturer reference CSV")
+    parser.add_argument('--snapshot', type=Path, default=SNAPSHOT_FILE, help="Snapshot of the last ingested release")
+    parser.add_argument('--delta', type=Path, default=DELTA_FILE, help="Delta CSV to write")
+    parser.add_argument('--index', type=Path, default=REGISTRATION_INDEX, help="Registration index to patch")
+    parser.add_argument('--no-index', action='store_true', help="Don't patch the registration index")
+    parser.add_argument('--diff', nargs=2, type=Path, metavar=('OLD', 'NEW'), help="Compare two snapshot files")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented('registry_snapshot', args) as metrics:
+        if args.diff:
+            delta = diff_snapshots(*(RegistrySnapshot.load(path) for path in args.diff))
+            print(f"{len(delta.inserted):,} inserted, {len(delta.deleted):,} deleted, "
+                  f"{len(delta.changed):,} changed")
+        else:
+            refresh(args, metrics)
+
+
+if __name__ == '__main__':
+    main()
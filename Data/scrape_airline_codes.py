@@ -5,21 +5,47 @@ Scrape airline ICAO/IATA codes from airlinecodes.info
 Extracts airline codes from multiple pages (A-Z, 0-9) and saves to CSV.
 Uses only built-in Python libraries (no pip install required).
 
+Pages are fetched by a small worker pool. Each worker keeps a persistent
+keep-alive connection per host, a per-host throttle keeps the scrape polite,
+and failed fetches are retried with exponential backoff. Point --base-url at
+airline_fixture_server.py to scrape offline.
+
+Runs are incremental: AirlineCodes.manifest.json keeps each page's ETag,
+Last-Modified, content hash and codes. Pages are requested conditionally,
+unchanged pages are not re-parsed, only changed pages' rows are merged into
+the existing CSV, and the added/removed/renamed codes are written to
+AirlineCodes.delta.json. Use --full to rebuild everything.
+
 Usage:
-    python3 scrape_airline_codes.py
+    python3 scrape_airline_codes.py [--workers 4] [--per-host 2] [--delay 0.25]
+                                    [--retries 3] [--base-url URL] [--save-pages DIR] [--full]
+                                    [--metrics-json FILE] [--profile FILE] [--trace-memory]
 """
 
+import argparse
 import csv
+import hashlib
+import http.client
+import json
+import random
+import threading
 import time
 import re
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from html.parser import HTMLParser
 from pathlib import Path
+from urllib.parse import urlsplit
+
+from instrumentation import add_arguments, instrumented
 
 # Configuration
 BASE_URL = "https://www.airlinecodes.info/icao"
 OUTPUT_FILE = Path(__file__).parent / "AirlineCodes.csv"
+MANIFEST_FILE = Path(__file__).parent / "AirlineCodes.manifest.json"
+DELTA_FILE = Path(__file__).parent / "AirlineCodes.delta.json"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
 
 # Pages to scrape: A-Z and 0-9
 PAGES = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ") + list("0123456789")
@@ -63,25 +89,116 @@ class TableParser(HTMLParser):
             self.current_cell += data
 
 
-def scrape_page(letter: str) -> list[dict]:
-    """Scrape a single page of airline codes."""
-    url = f"{BASE_URL}/{letter}"
-    print(f"  Fetching {url}...")
-
-    try:
-        req = urllib.request.Request(
-            url,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-            }
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            html = response.read().decode("utf-8")
-    except urllib.error.URLError as e:
-        print(f"    Error fetching {url}: {e}")
-        return []
-
-    # Parse HTML table
+class HostThrottle:
+    """
+    Per-host politeness limit: at most `max_in_flight` requests to a host at
+    once, and request starts spaced at least `min_interval` seconds apart.
+    """
+
+    def __init__(self, min_interval=0.25, max_in_flight=2):
+        self.min_interval = min_interval
+        self.max_in_flight = max_in_flight
+        self.lock = threading.Lock()
+        self.slots = {}       # host -> BoundedSemaphore
+        self.next_start = {}  # host -> earliest monotonic start time
+
+    def _slot(self, host):
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.BoundedSemaphore(self.max_in_flight)
+            return self.slots[host]
+
+    def acquire(self, host):
+        self._slot(host).acquire()
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start.get(host, now))
+            self.next_start[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, host):
+        self.slots[host].release()
+
+
+class PooledFetcher:
+    """
+    Fetch pages over persistent HTTP/1.1 connections.
+
+    Each worker thread keeps one open connection per host and reuses it for
+    every page it fetches. Connection errors and 429/5xx responses are
+    retried with exponential backoff and jitter on a fresh connection.
+    """
+
+    def __init__(self, throttle=None, retries=3, backoff=1.0, timeout=30):
+        self.throttle = throttle or HostThrottle()
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.local = threading.local()
+        self.connections_opened = 0
+        self.lock = threading.Lock()
+
+    def _connection(self, scheme, netloc):
+        connections = getattr(self.local, 'connections', None)
+        if connections is None:
+            connections = self.local.connections = {}
+        key = (scheme, netloc)
+        if key not in connections:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connections[key] = cls(netloc, timeout=self.timeout)
+            with self.lock:
+                self.connections_opened += 1
+        return connections[key]
+
+    def _drop_connection(self, scheme, netloc):
+        connection = self.local.connections.pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def request(self, url, headers=None):
+        """
+        GET url and return (status, response headers, decoded body).
+
+        429/5xx responses and connection errors are retried; any other status
+        (including 304 Not Modified) is returned to the caller.
+        """
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        for attempt in range(self.retries + 1):
+            self.throttle.acquire(parts.netloc)
+            try:
+                connection = self._connection(parts.scheme, parts.netloc)
+                connection.request("GET", path or "/", headers={"User-Agent": USER_AGENT, **(headers or {})})
+                response = connection.getresponse()
+                body = response.read()
+                if response.status == 429 or response.status >= 500:
+                    raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+                if response.will_close:
+                    self._drop_connection(parts.scheme, parts.netloc)
+                return response.status, response.headers, body.decode("utf-8")
+            except urllib.error.HTTPError as e:
+                error = e
+            except (OSError, http.client.HTTPException) as e:
+                error = urllib.error.URLError(e)
+            finally:
+                self.throttle.release(parts.netloc)
+
+            self._drop_connection(parts.scheme, parts.netloc)
+            if attempt < self.retries:
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        raise error
+
+    def fetch(self, url):
+        """Return the decoded body of url, or raise the last error."""
+        status, _, body = self.request(url)
+        if status != 200:
+            raise urllib.error.URLError(f"HTTP {status}")
+        return body
+
+
+def parse_airlines(html: str) -> list[dict]:
+    """Extract airline rows from one page of HTML."""
     parser = TableParser()
     parser.feed(html)
 
@@ -99,48 +216,226 @@ def scrape_page(letter: str) -> list[dict]:
                     "iata": iata if iata and iata != "-" else "",
                     "airlineName": airline_name
                 })
-
-    print(f"    Found {len(airlines)} airlines")
     return airlines
 
 
+def scrape_page(letter: str, fetcher: PooledFetcher = None, base_url: str = BASE_URL,
+                save_dir: Path = None, cached: dict = None) -> dict:
+    """
+    Scrape a single page of airline codes.
+
+    With a manifest entry for the page (`cached`), the request is conditional
+    on its ETag/Last-Modified, and a body whose hash matches the manifest is
+    not parsed. Returns {'status', 'airlines', 'entry'} where status is
+    'changed', 'not_modified' (304), 'unchanged' (same hash) or 'error';
+    airlines is only set for 'changed' pages.
+    """
+    url = f"{base_url}/{letter}"
+    print(f"  Fetching {url}...")
+    cached = cached or {}
+
+    try:
+        if fetcher is not None:
+            headers = {}
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+            status, response_headers, html = fetcher.request(url, headers)
+        else:
+            req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+            with urllib.request.urlopen(req, timeout=30) as response:
+                status, response_headers, html = response.status, response.headers, response.read().decode("utf-8")
+    except urllib.error.URLError as e:
+        print(f"    Error fetching {url}: {e}")
+        return {"status": "error", "airlines": None, "entry": cached}
+
+    if status == 304:
+        print(f"    Not modified ({letter})")
+        return {"status": "not_modified", "airlines": None, "entry": cached}
+    if status != 200:
+        print(f"    Error fetching {url}: HTTP {status}")
+        return {"status": "error", "airlines": None, "entry": cached}
+
+    entry = {
+        "etag": response_headers.get("ETag", ""),
+        "last_modified": response_headers.get("Last-Modified", ""),
+        "sha256": hashlib.sha256(html.encode("utf-8")).hexdigest(),
+        "codes": cached.get("codes", []),
+    }
+
+    if save_dir is not None:
+        (Path(save_dir) / f"{letter}.html").write_text(html, encoding="utf-8")
+
+    if cached and entry["sha256"] == cached.get("sha256"):
+        print(f"    Unchanged content ({letter})")
+        return {"status": "unchanged", "airlines": None, "entry": entry}
+
+    airlines = parse_airlines(html)
+    print(f"    Found {len(airlines)} airlines ({letter})")
+    return {"status": "changed", "airlines": airlines, "entry": entry}
+
+
+def scrape_pages(pages, workers=4, fetcher=None, base_url=BASE_URL, save_dir=None, manifest=None):
+    """Scrape pages concurrently; returns {page: scrape_page() result} in page order."""
+    fetcher = fetcher or PooledFetcher()
+    manifest = manifest or {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda page: scrape_page(page, fetcher, base_url, save_dir, manifest.get(page)),
+                           pages)
+        return dict(zip(pages, results))
+
+
+# =============================================================================
+# Incremental Updates
+# =============================================================================
+
+def load_manifest(path=None):
+    """Per-page manifest from the last scrape ({} if there is none)."""
+    path = Path(path or MANIFEST_FILE)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("pages", {})
+
+
+def save_manifest(pages, path=None):
+    with open(path or MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump({"base_url": BASE_URL, "pages": pages}, f, indent=2, sort_keys=True)
+
+
+def read_airlines_csv(path=None):
+    """Rows of an existing AirlineCodes.csv ([] if there is none)."""
+    path = Path(path or OUTPUT_FILE)
+    if not path.exists():
+        return []
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def merge_pages(existing, results, manifest):
+    """
+    Merge scraped pages into the existing rows.
+
+    Rows that came from changed pages (per the manifest) are replaced by those
+    pages' new rows; rows from unchanged, not-modified or failed pages are
+    kept as they are. Without a manifest every row is rebuilt from the scrape.
+    Codes are unique, and the first page (in PAGES order) listing a code
+    wins, as in a full scrape. Sets each changed page's manifest codes.
+    """
+    changed = [page for page in PAGES if results[page]["status"] == "changed"]
+    rows = {}
+    if manifest:
+        replaced = {code for page in changed for code in manifest.get(page, {}).get("codes", [])}
+        rows = {row["airlineCode"]: row for row in existing if row["airlineCode"] not in replaced}
+    for page in changed:
+        kept = []
+        for airline in results[page]["airlines"]:
+            if airline["airlineCode"] not in rows:
+                rows[airline["airlineCode"]] = airline
+                kept.append(airline["airlineCode"])
+        results[page]["entry"]["codes"] = kept
+
+    return sorted(rows.values(), key=lambda x: x["airlineCode"])
+
+
+def compute_delta(old_rows, new_rows):
+    """Added, removed and renamed airline codes (plus IATA changes)."""
+    old = {row["airlineCode"]: row for row in old_rows}
+    new = {row["airlineCode"]: row for row in new_rows}
+    delta = {"added": [], "removed": [], "renamed": [], "iata_changed": []}
+    for code, row in new.items():
+        before = old.get(code)
+        if before is None:
+            delta["added"].append(row)
+            continue
+        if before["airlineName"] != row["airlineName"]:
+            delta["renamed"].append({"airlineCode": code, "old": before["airlineName"], "new": row["airlineName"]})
+        if before["iata"] != row["iata"]:
+            delta["iata_changed"].append({"airlineCode": code, "old": before["iata"], "new": row["iata"]})
+    delta["removed"] = [row for code, row in sorted(old.items()) if code not in new]
+    return delta
+
+
+def write_delta(delta):
+    with open(DELTA_FILE, "w", encoding="utf-8") as f:
+        json.dump(delta, f, indent=2)
+    print(f"Delta: {len(delta['added'])} added, {len(delta['removed'])} removed, "
+          f"{len(delta['renamed'])} renamed, {len(delta['iata_changed'])} IATA changed -> {DELTA_FILE.name}")
+
+
 def main():
     """Main function to scrape all pages and save to CSV."""
+    parser = argparse.ArgumentParser(description="Scrape airline ICAO/IATA codes to AirlineCodes.csv.")
+    parser.add_argument("--base-url", default=BASE_URL, help="Site root for the A-Z/0-9 pages")
+    parser.add_argument("--workers", type=int, default=4, help="Pages fetched concurrently")
+    parser.add_argument("--per-host", type=int, default=2, help="Maximum requests in flight per host")
+    parser.add_argument("--delay", type=float, default=0.25, help="Minimum seconds between requests to a host")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per page with exponential backoff")
+    parser.add_argument("--save-pages", type=Path, help="Also save each fetched page here (fixtures)")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild the CSV from all pages")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented("scrape_airline_codes", args) as metrics:
+        scrape(args, metrics)
+
+
+def scrape(args, metrics):
+    """Scrape the pages, then write the CSV, manifest and delta."""
     print("Scraping airline codes from airlinecodes.info...")
     print(f"Output file: {OUTPUT_FILE}")
     print()
 
-    all_airlines = []
-
-    for letter in PAGES:
-        airlines = scrape_page(letter)
-        all_airlines.extend(airlines)
-
-        # Be polite - wait between requests
-        time.sleep(0.5)
-
+    if args.save_pages:
+        args.save_pages.mkdir(parents=True, exist_ok=True)
+
+    with metrics.stage("read_existing", unit="rows") as stage:
+        existing = read_airlines_csv()
+        stage.update(len(existing))
+    manifest = {} if args.full or not existing else load_manifest()
+    print(f"Mode: {'incremental (conditional GETs)' if manifest else 'full scrape'}")
+
+    fetcher = PooledFetcher(HostThrottle(args.delay, args.per_host), retries=args.retries)
+    started = time.monotonic()
+    with metrics.stage("fetch_pages", total=len(PAGES), unit="pages") as stage:
+        results = scrape_pages(PAGES, args.workers, fetcher, args.base_url, args.save_pages, manifest)
+        stage.update(len(results))
+    print(f"  Fetched {len(results)} pages in {time.monotonic() - started:.1f}s "
+          f"over {fetcher.connections_opened} connections")
+
+    statuses = [result["status"] for result in results.values()]
+    metrics.set("connections", fetcher.connections_opened)
+    for status in ("changed", "not_modified", "unchanged", "error"):
+        metrics.set(f"pages_{status}", statuses.count(status))
     print()
-    print(f"Total airlines scraped: {len(all_airlines)}")
-
-    # Remove duplicates based on airline code
-    seen_codes = set()
-    unique_airlines = []
-    for airline in all_airlines:
-        if airline["airlineCode"] not in seen_codes:
-            seen_codes.add(airline["airlineCode"])
-            unique_airlines.append(airline)
-
+    print("Pages: " + ", ".join(f"{statuses.count(s)} {s.replace('_', ' ')}"
+                                for s in ("changed", "not_modified", "unchanged", "error")))
+
+    if manifest and "changed" not in statuses:
+        save_manifest({page: result["entry"] for page, result in results.items() if result["entry"]})
+        # An empty delta, so the previous run's delta does not look current
+        write_delta(compute_delta(existing, existing))
+        print("\nNo page changed upstream - AirlineCodes.csv left as is.")
+        return
+
+    with metrics.stage("merge", unit="airlines") as stage:
+        unique_airlines = merge_pages(existing, results, manifest)
+        stage.update(len(unique_airlines))
     print(f"Unique airlines (by airlineCode): {len(unique_airlines)}")
 
-    # Sort by airline code
-    unique_airlines.sort(key=lambda x: x["airlineCode"])
-
     # Write to CSV
     print(f"\nWriting to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["airlineCode", "iata", "airlineName"])
-        writer.writeheader()
-        writer.writerows(unique_airlines)
+    with metrics.stage("write_output", unit="airlines") as stage:
+        with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["airlineCode", "iata", "airlineName"])
+            writer.writeheader()
+            writer.writerows(unique_airlines)
+        save_manifest({page: result["entry"] for page, result in results.items() if result["entry"]})
+        stage.update(len(unique_airlines))
+
+    # Write what changed since the previous CSV
+    write_delta(compute_delta(existing, unique_airlines))
 
     print("Done!")
 
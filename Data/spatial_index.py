@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Spatial indexes for capture coordinates: grid buckets and nearest airports.
+
+generate_test_data.py's near_airport is just the airport a point was
+generated around, and US_AIRPORTS is a 30-entry list. Real captures need a
+nearest-airport assignment against a full airport table, and the map needs
+viewport queries over every sighting. This provides:
+
+  GridIndex   captures bucketed into fixed lat/lon cells (points sorted by
+              cell id), for bounding-box queries. Boxes crossing the
+              antimeridian (west > east) are split in two.
+  AirportTree a KD-tree over airports as 3D unit vectors, so straight-line
+              distance orders the same as great-circle distance everywhere
+              (no special cases at the poles or the antimeridian).
+  nearest_airports()
+              batch k-nearest for many captures. Captures are grouped by grid
+              cell; each cell asks the tree once for every airport that can
+              be among the k nearest of any point in the cell, then all of
+              the cell's points are scored against that short list at once.
+
+Airports load from a local CSV in OurAirports' airports.csv layout (ident,
+name, latitude_deg, longitude_deg, type; closed airports are skipped), or
+from US_AIRPORTS if there is none.
+
+NumPy is used for the batch paths when available; without it the same
+queries run point by point.
+
+Usage:
+    python3 spatial_index.py                       # nearest airport for each AirplaneID-TestData.csv capture
+    python3 spatial_index.py --benchmark           # 100k airports, 1M captures
+    python3 spatial_index.py --benchmark --airport-count 100000 --capture-count 10000000
+    [--airports CSV] [--captures CSV] [--cell-degrees 0.25] [-k 1]
+    [--metrics-json FILE] [--profile FILE] [--trace-memory]
+"""
+
+import argparse
+import csv
+import heapq
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: queries fall back to per-point lookups
+    np = None
+
+from generate_test_data import US_AIRPORTS
+from instrumentation import add_arguments, instrumented
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+AIRPORTS_CSV = SCRIPT_DIR / "airports.csv"
+CAPTURES = SCRIPT_DIR / "AirplaneID-TestData.csv"
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_CELL_DEGREES = 0.25
+LEAF_SIZE = 8
+# Grid rows above which query_bbox searches all rows in one NumPy call
+VECTOR_ROWS = 16
+
+# Column names accepted for each airport field, first match wins
+AIRPORT_COLUMNS = {
+    'code': ('ident', 'icao', 'code', 'gps_code'),
+    'name': ('name',),
+    'latitude': ('latitude_deg', 'latitude', 'lat'),
+    'longitude': ('longitude_deg', 'longitude', 'lon', 'lng'),
+}
+
+# Continental US box for the synthetic benchmark airports
+US_BOUNDS = (24.5, -124.8, 49.4, -66.9)
+
+
+class Airport(NamedTuple):
+    code: str
+    name: str
+    latitude: float
+    longitude: float
+
+
+def load_airports(path=AIRPORTS_CSV):
+    """Airports from a local CSV, or US_AIRPORTS if the file does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return [Airport(*airport) for airport in US_AIRPORTS]
+
+    airports = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        columns = {field: next((c for c in names if c in reader.fieldnames), None)
+                   for field, names in AIRPORT_COLUMNS.items()}
+        if columns['latitude'] is None or columns['longitude'] is None:
+            raise ValueError(f"{path} has no latitude/longitude columns")
+        for row in reader:
+            if row.get('type') == 'closed':
+                continue
+            try:
+                latitude = float(row[columns['latitude']])
+                longitude = float(row[columns['longitude']])
+            except ValueError:
+                continue
+            airports.append(Airport(row.get(columns['code'], '') if columns['code'] else '',
+                                    row.get(columns['name'], '') if columns['name'] else '',
+                                    latitude, longitude))
+    return airports
+
+
+def to_xyz(latitude, longitude):
+    """Unit vector for a lat/lon in degrees."""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(chord):
+    """Great-circle distance for a straight-line distance between unit vectors."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km):
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+
+# =============================================================================
+# Airport KD-tree
+# =============================================================================
+
+class AirportTree:
+    """
+    Static KD-tree over airports on the unit sphere.
+
+    Nodes split on the axis with the widest spread at the median point;
+    leaves hold up to LEAF_SIZE airports. Distances are chord lengths; use
+    chord_to_km() to convert.
+    """
+
+    def __init__(self, airports, leaf_size=LEAF_SIZE):
+        self.airports = airports
+        self.points = [to_xyz(a.latitude, a.longitude) for a in airports]
+        self.coords = tuple(list(axis) for axis in zip(*self.points)) or ([], [], [])
+        self.xyz = np.array(self.points, dtype=np.float64).reshape(-1, 3) if np is not None else None
+        self.leaf_size = leaf_size
+        # Per node: [lo, hi) range of self.order, split axis and value, children (-1 for leaves)
+        self.order = list(range(len(airports)))
+        self._lo, self._hi, self._axis, self._split, self._left, self._right = [], [], [], [], [], []
+        if airports:
+            self._build(0, len(airports))
+
+    def __len__(self):
+        return len(self.airports)
+
+    def _build(self, lo, hi):
+        node = len(self._lo)
+        self._lo.append(lo)
+        self._hi.append(hi)
+        self._axis.append(0)
+        self._split.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        if hi - lo <= self.leaf_size:
+            return node
+
+        # Split on the widest axis, judged from a sample of the node's points
+        order = self.order
+        step = max(1, (hi - lo) // 64)
+        spreads = [max(coords[i] for i in order[lo:hi:step]) - min(coords[i] for i in order[lo:hi:step])
+                   for coords in self.coords]
+        axis = spreads.index(max(spreads))
+        order[lo:hi] = sorted(order[lo:hi], key=self.coords[axis].__getitem__)
+        mid = (lo + hi) // 2
+        self._axis[node] = axis
+        self._split[node] = self.coords[axis][order[mid]]
+        self._left[node] = self._build(lo, mid)
+        self._right[node] = self._build(mid, hi)
+        return node
+
+    def nearest(self, latitude, longitude, k=1):
+        """[(chord distance, airport index)] of the k nearest airports, nearest first."""
+        return self.nearest_xyz(to_xyz(latitude, longitude), k)
+
+    def nearest_xyz(self, point, k=1):
+        if not self.airports:
+            return []
+        x, y, z = point
+        points, order = self.points, self.order
+        lo_, hi_, axis_, split_, left_, right_ = (self._lo, self._hi, self._axis, self._split,
+                                                  self._left, self._right)
+        best = []  # Max-heap of (-squared distance, index)
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if len(best) == k and bound >= -best[0][0]:
+                continue
+            if left_[node] < 0:
+                for i in order[lo_[node]:hi_[node]]:
+                    px, py, pz = points[i]
+                    d2 = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+                    if len(best) < k:
+                        heapq.heappush(best, (-d2, i))
+                    elif d2 < -best[0][0]:
+                        heapq.heapreplace(best, (-d2, i))
+                continue
+            diff = point[axis_[node]] - split_[node]
+            near, far = (left_[node], right_[node]) if diff < 0 else (right_[node], left_[node])
+            # Push the far side first so the near side is searched first
+            stack.append((far, max(bound, diff * diff)))
+            stack.append((near, bound))
+        return [(math.sqrt(-d2), i) for d2, i in sorted(best, reverse=True)]
+
+    def within(self, latitude, longitude, km):
+        """Indexes of airports within km of a point (great-circle)."""
+        return self.within_xyz(to_xyz(latitude, longitude), km_to_chord(km))
+
+    def within_xyz(self, point, radius):
+        """Indexes of airports within a chord distance of a unit vector."""
+        if not self.airports:
+            return []
+        x, y, z = point
+        r2 = radius * radius
+        points, order = self.points, self.order
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._left[node] < 0:
+                for i in order[self._lo[node]:self._hi[node]]:
+                    px, py, pz = points[i]
+                    if (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2 <= r2:
+                        found.append(i)
+                continue
+            diff = point[self._axis[node]] - self._split[node]
+            if diff < radius:
+                stack.append(self._left[node])
+            if diff > -radius:
+                stack.append(self._right[node])
+        return found
+
+
+# =============================================================================
+# Capture grid
+# =============================================================================
+
+class GridIndex:
+    """
+    Points bucketed into cell_degrees x cell_degrees lat/lon cells.
+
+    Cell ids run row-major from (-90, -180). With NumPy the point indexes are
+    kept sorted by cell id, so one cell row of a bounding box is a single
+    contiguous slice; otherwise cells map to lists of point indexes.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_degrees=DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.rows = math.ceil(180 / cell_degrees)
+        self.cols = math.ceil(360 / cell_degrees)
+        if np is not None:
+            self.latitudes = np.asarray(latitudes, dtype=np.float64)
+            self.longitudes = np.asarray(longitudes, dtype=np.float64)
+            cells = self._cell_ids(self.latitudes, self.longitudes)
+            self.order = np.argsort(cells, kind='stable')
+            self.cells = cells[self.order]
+        else:
+            self.latitudes, self.longitudes = list(latitudes), list(longitudes)
+            self.buckets = {}
+            for i, (lat, lon) in enumerate(zip(self.latitudes, self.longitudes)):
+                self.buckets.setdefault(self._cell_id(lat, lon), []).append(i)
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    def _row_col(self, latitude, longitude):
+        row = min(self.rows - 1, max(0, int((latitude + 90) // self.cell_degrees)))
+        col = int((longitude + 180) // self.cell_degrees) % self.cols
+        return row, col
+
+    def _cell_id(self, latitude, longitude):
+        row, col = self._row_col(latitude, longitude)
+        return row * self.cols + col
+
+    def _cell_ids(self, latitudes, longitudes):
+        rows = np.clip(((latitudes + 90) // self.cell_degrees).astype(np.int64), 0, self.rows - 1)
+        cols = ((longitudes + 180) // self.cell_degrees).astype(np.int64) % self.cols
+        return rows * self.cols + cols
+
+    def cell_bounds(self, cell):
+        """(south, west, north, east) of a cell id."""
+        row, col = divmod(cell, self.cols)
+        south, west = row * self.cell_degrees - 90, col * self.cell_degrees - 180
+        return south, west, min(90, south + self.cell_degrees), min(180, west + self.cell_degrees)
+
+    def query_bbox(self, south, west, north, east):
+        """Indexes of points inside a box (degrees). west > east crosses the antimeridian."""
+        if west > east:
+            parts = [self.query_bbox(south, west, north, 180), self.query_bbox(south, -180, north, east)]
+            return np.concatenate(parts) if np is not None else parts[0] + parts[1]
+
+        first_row, first_col = self._row_col(south, west)
+        last_row, last_col = self._row_col(north, min(east, 180 - 1e-9))
+        if np is not None:
+            if 2 * (last_col - first_col + 1) >= self.cols:
+                # Wide boxes: one contiguous run of cell ids (at most twice the
+                # points needed, dropped by the filter below) instead of two
+                # searches per row
+                start = np.searchsorted(self.cells, first_row * self.cols + first_col, 'left')
+                end = np.searchsorted(self.cells, last_row * self.cols + last_col, 'right')
+                slices = [self.order[start:end]]
+            else:
+                row_starts = [row * self.cols + first_col for row in range(first_row, last_row + 1)]
+                span = last_col - first_col
+                if len(row_starts) > VECTOR_ROWS:
+                    # Tall boxes: search every row at once
+                    ids = np.array(row_starts, dtype=np.int64)
+                    starts = self.cells.searchsorted(ids, 'left').tolist()
+                    ends = self.cells.searchsorted(ids + span, 'right').tolist()
+                else:
+                    starts = [self.cells.searchsorted(i, 'left') for i in row_starts]
+                    ends = [self.cells.searchsorted(i + span, 'right') for i in row_starts]
+                slices = [self.order[start:end] for start, end in zip(starts, ends) if end > start]
+            candidates = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+            lats, lons = self.latitudes[candidates], self.longitudes[candidates]
+            inside = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+            return candidates[inside]
+
+        found = []
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                for i in self.buckets.get(row * self.cols + col, ()):
+                    if south <= self.latitudes[i] <= north and west <= self.longitudes[i] <= east:
+                        found.append(i)
+        return found
+
+    def occupied_cells(self):
+        """Yield (cell id, point indexes) for every non-empty cell."""
+        if np is not None:
+            if not len(self.cells):
+                return
+            starts = np.flatnonzero(np.diff(self.cells)) + 1
+            bounds = np.concatenate(([0], starts, [len(self.cells)]))
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+                yield int(self.cells[start]), self.order[start:end]
+        else:
+            yield from self.buckets.items()
+
+
+# =============================================================================
+# Batch nearest airport
+# =============================================================================
+
+def cell_candidates(tree, grid, airport_grid, cell, k):
+    """
+    Airports that can be among the k nearest of any point in a cell.
+
+    For a point p within chord distance r of the cell centre c, its k-th
+    nearest airport is at most d_k(c) + r away, so every airport in its k
+    nearest is within d_k(c) + 2r of c. Those are taken from the airport
+    grid by a box around the cell widened by that distance.
+    """
+    south, west, north, east = grid.cell_bounds(cell)
+    centre = to_xyz((south + north) / 2, (west + east) / 2)
+    corners = [to_xyz(lat, lon) for lat in (south, north) for lon in (west, east)]
+    corners += [to_xyz((south + north) / 2, west), to_xyz(south, (west + east) / 2)]
+    r = max(math.dist(centre, corner) for corner in corners) * 1.01
+    reach = math.degrees(2 * math.asin(min(1.0, (tree.nearest_xyz(centre, k)[-1][0] + 2 * r) / 2)))
+
+    south, north = south - reach, north + reach
+    if south <= -90 or north >= 90 or reach >= 90:
+        return airport_grid.query_bbox(max(-90, south), -180, min(90, north), 180)
+    widen = reach / math.cos(math.radians(max(abs(south), abs(north))))
+    if 2 * widen + (east - west) >= 360:
+        # Widened box covers every longitude; wrapping it would leave a sliver
+        return airport_grid.query_bbox(south, -180, north, 180)
+    west, east = west - widen, east + widen
+    west, east = (west + 360 if west < -180 else west), (east - 360 if east > 180 else east)
+    return airport_grid.query_bbox(south, west, north, east)
+
+
+def nearest_airports(tree, latitudes, longitudes, k=1, cell_degrees=DEFAULT_CELL_DEGREES, grid=None):
+    """
+    k nearest airports for many points.
+
+    Returns (indexes, distances_km), each len(points) x k, nearest first
+    (NumPy arrays, or lists of lists without NumPy). Pass a prebuilt
+    GridIndex over the same points to reuse it.
+    """
+    k = min(k, len(tree))
+    if np is None:
+        indexes, distances = [], []
+        for lat, lon in zip(latitudes, longitudes):
+            found = tree.nearest(lat, lon, k)
+            indexes.append([i for _, i in found])
+            distances.append([chord_to_km(d) for d, _ in found])
+        return indexes, distances
+
+    grid = grid or GridIndex(latitudes, longitudes, cell_degrees)
+    airport_grid = GridIndex([a.latitude for a in tree.airports], [a.longitude for a in tree.airports],
+                             grid.cell_degrees)
+    lats, lons = np.radians(grid.latitudes), np.radians(grid.longitudes)
+    cos_lats = np.cos(lats)
+    points = np.column_stack((cos_lats * np.cos(lons), cos_lats * np.sin(lons), np.sin(lats)))
+
+    indexes = np.zeros((len(grid), k), dtype=np.int64)
+    chords = np.zeros((len(grid), k), dtype=np.float64)
+    if k == 0:
+        return indexes, chords
+    for cell, members in grid.occupied_cells():
+        candidates = cell_candidates(tree, grid, airport_grid, cell, k)
+        if len(candidates) < k:
+            # Should not happen, but never rank fewer than k candidates
+            for i in np.asarray(members).tolist():
+                found = tree.nearest_xyz(tuple(points[i]), k)
+                indexes[i] = [j for _, j in found]
+                chords[i] = [d for d, _ in found]
+            continue
+        # |p - a|^2 = 2 - 2 p.a for unit vectors, so rank by dot product (one matrix product)
+        d2 = 2 - 2 * (points[members] @ tree.xyz[candidates].T)
+        if k == 1:
+            part = d2.argmin(axis=1)[:, None]
+        elif len(candidates) > k:
+            part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(len(candidates)), (len(members), len(candidates)))
+        part_d2 = np.take_along_axis(d2, part, axis=1)
+        ranked = np.argsort(part_d2, axis=1)
+        indexes[members] = candidates[np.take_along_axis(part, ranked, axis=1)]
+        chords[members] = np.sqrt(np.maximum(0, np.take_along_axis(part_d2, ranked, axis=1)))
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, chords / 2))
+    return indexes, distances
+
+
+# =============================================================================
+# Command line
+# =============================================================================
+
+def synthetic_airports(count, rng):
+    """Airports spread over the continental US, plus the real US_AIRPORTS."""
+    south, west, north, east = US_BOUNDS
+    airports = [Airport(*airport) for airport in US_AIRPORTS]
+    airports += [Airport(f"X{i:06d}", f"Synthetic {i}", rng.uniform(south, north), rng.uniform(west, east))
+                 for i in range(max(0, count - len(airports)))]
+    return airports
+
+
+def synthetic_captures(count, airports, rng):
+    """Capture points within ~10 miles of random airports, like generate_test_data.py."""
+    if np is not None:
+        np_rng = np.random.default_rng(rng.getrandbits(64))
+        picks = np_rng.integers(0, len(airports), count)
+        lats = np.array([a.latitude for a in airports])[picks] + np_rng.uniform(-0.15, 0.15, count)
+        lons = np.array([a.longitude for a in airports])[picks] + np_rng.uniform(-0.15, 0.15, count)
+        return lats, lons
+    picks = [rng.choice(airports) for _ in range(count)]
+    return ([a.latitude + rng.uniform(-0.15, 0.15) for a in picks],
+            [a.longitude + rng.uniform(-0.15, 0.15) for a in picks])
+
+
+def check_worldwide(rng, k, cell_degrees, count=20_000):
+    """
+    Batch answers against brute force for captures spread over the globe -
+    near the poles and the antimeridian too - with only the sparse
+    US_AIRPORTS, where the candidate boxes widen the most.
+    """
+    airports = [Airport(*airport) for airport in US_AIRPORTS]
+    tree = AirportTree(airports)
+    k = min(k, len(tree))
+    points = [(math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)) for _ in range(count)]
+    points += [(rng.choice((-1, 1)) * rng.uniform(85, 90), rng.uniform(-180, 180)) for _ in range(500)]
+    points += [(rng.uniform(-90, 90), rng.choice((-1, 1)) * rng.uniform(179, 180)) for _ in range(500)]
+    lats, lons = [lat for lat, _ in points], [lon for _, lon in points]
+    indexes, _ = nearest_airports(tree, lats, lons, k, cell_degrees)
+
+    wrong = 0
+    for (lat, lon), found in zip(points, indexes):
+        point = to_xyz(lat, lon)
+        expected = sorted(range(len(airports)), key=lambda i: math.dist(point, tree.points[i]))[:k]
+        if list(found) != expected:
+            wrong += 1
+    print(f"  worldwide check:    {wrong} of {len(points):,} differ from brute force "
+          f"(poles and antimeridian included)")
+
+
+def benchmark(args, metrics):
+    rng = random.Random(args.seed)
+    airports = synthetic_airports(args.airport_count, rng)
+    lats, lons = synthetic_captures(args.capture_count, airports, rng)
+    print(f"Benchmark: {len(airports):,} airports, {args.capture_count:,} captures")
+
+    with metrics.stage('build_tree', unit='airports') as stage:
+        tree = AirportTree(airports)
+        stage.update(len(tree))
+    with metrics.stage('build_grid', unit='captures') as stage:
+        grid = GridIndex(lats, lons, args.cell_degrees)
+        stage.update(len(grid))
+    for stage in metrics.stages[-2:]:
+        print(f"  {stage.name}: {stage.seconds:.2f}s")
+
+    # Single-point queries, as for one new capture
+    samples = [(rng.uniform(US_BOUNDS[0], US_BOUNDS[2]), rng.uniform(US_BOUNDS[1], US_BOUNDS[3]))
+               for _ in range(2000)]
+    start = time.perf_counter()
+    for lat, lon in samples:
+        tree.nearest(lat, lon, args.k)
+    print(f"  nearest (single):   {(time.perf_counter() - start) / len(samples) * 1e6:8.1f} us/query")
+
+    with metrics.stage('nearest_batch', unit='captures') as stage:
+        indexes, distances = nearest_airports(tree, lats, lons, args.k, grid=grid)
+        stage.update(len(grid))
+    print(f"  nearest (batch):    {stage.seconds / len(grid) * 1e6:8.2f} us/capture "
+          f"({len(grid) / stage.seconds:,.0f}/s)")
+
+    # Spot-check the batch answers against single queries
+    for i in rng.sample(range(len(grid)), min(200, len(grid))):
+        expected = [j for _, j in tree.nearest(float(grid.latitudes[i]), float(grid.longitudes[i]), args.k)]
+        if list(indexes[i]) != expected:
+            print(f"  MISMATCH at capture {i}: {list(indexes[i])} != {expected}")
+            break
+
+    check_worldwide(rng, args.k, args.cell_degrees)
+
+    # Viewports from city to regional scale
+    for span in (0.1, 1.0, 5.0):
+        boxes = []
+        for _ in range(200):
+            lat, lon = rng.uniform(US_BOUNDS[0], US_BOUNDS[2]), rng.uniform(US_BOUNDS[1], US_BOUNDS[3])
+            boxes.append((lat, lon, lat + span, lon + span))
+        start = time.perf_counter()
+        found = sum(len(grid.query_bbox(*box)) for box in boxes)
+        elapsed = (time.perf_counter() - start) / len(boxes)
+        print(f"  bbox {span:>4} deg:      {elapsed * 1e3:8.3f} ms/query ({found / len(boxes):,.0f} captures avg)")
+
+
+def assign_captures(args, metrics):
+    """Nearest airport for every capture in a captures CSV, compared with its near_airport."""
+    if not args.captures.exists():
+        print(f"Error: {args.captures} not found")
+        sys.exit(1)
+    airports = load_airports(args.airports)
+    source = args.airports if args.airports.exists() else "US_AIRPORTS"
+    with open(args.captures, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    print(f"{len(rows):,} captures, {len(airports):,} airports ({source})")
+
+    with metrics.stage('nearest_airports', unit='captures') as stage:
+        tree = AirportTree(airports)
+        indexes, distances = nearest_airports(tree, [float(r['latitude']) for r in rows],
+                                              [float(r['longitude']) for r in rows], args.k,
+                                              args.cell_degrees)
+        stage.update(len(rows))
+
+    same = sum(1 for row, found in zip(rows, indexes) if airports[found[0]].code == row.get('near_airport'))
+    print(f"  Nearest airport matches near_airport for {same:,} of {len(rows):,}")
+    for row, found, km in list(zip(rows, indexes, distances))[:5]:
+        nearest = ', '.join(f"{airports[i].code} ({d:.1f} km)" for i, d in zip(found, km))
+        print(f"  {row['registration']:8} {row['latitude']:>11},{row['longitude']:>12} -> {nearest}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid and KD-tree spatial indexes for captures and airports.")
+    parser.add_argument('--airports', type=Path, default=AIRPORTS_CSV, help="Airport CSV (OurAirports layout)")
+    parser.add_argument('--captures', type=Path, default=CAPTURES, help="Capture CSV (generate_test_data.py output)")
+    parser.add_argument('--cell-degrees', type=float, default=DEFAULT_CELL_DEGREES, help="Grid cell size")
+    parser.add_argument('-k', type=int, default=1, help="Nearest airports per capture")
+    parser.add_argument('--benchmark', action='store_true', help="Time the indexes on synthetic data")
+    parser.add_argument('--airport-count', type=int, default=100_000, help="Benchmark airports")
+    parser.add_argument('--capture-count', type=int, default=1_000_000, help="Benchmark captures")
+    parser.add_argument('--seed', type=int, default=8643, help="Benchmark random seed")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented('spatial_index', args) as metrics:
+        if args.benchmark:
+            benchmark(args, metrics)
+        else:
+            assign_captures(args, metrics)
+
+
+if __name__ == '__main__':
+    main()
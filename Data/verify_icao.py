@@ -1,232 +1,515 @@
-#!/usr/bin/env python3
-"""
-Script to verify ICAO codes in MasterAircraftList.csv against the official ICAO database.
-Queries the ICAO Doc 8643 database.
-
-NOTE: The ICAO database API (www4.icao.int) may be periodically unavailable for maintenance.
-      Check https://www.icao.int/publications/DOC8643/Pages/Search.aspx manually if needed.
-
-Usage:
-    cd Aircraft/faa/ICAO
-    python3 verify_icao.py
-"""
-import csv
-import requests
-import time
-import json
-import sys
-
-def lookup_icao(type_code):
-    """Query the ICAO Doc 8643 database for an aircraft type code."""
-    url = 'https://www4.icao.int/doc8643/External/AircraftTypes'
-    params = {'searchParam': type_code}
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        'Accept': 'application/json',
-    }
-
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=15)
-        if response.status_code == 200:
-            # Check if we got HTML (maintenance page) or JSON
-            content = response.text.strip()
-            if content.startswith('<'):
-                # HTML response - likely maintenance page
-                return None
-            if not content:
-                return []
-            try:
-                data = response.json()
-                # Filter for exact type code match
-                exact_matches = [r for r in data if r.get('Designator', '').upper() == type_code.upper()]
-                return exact_matches if exact_matches else data
-            except json.JSONDecodeError:
-                return None
-        else:
-            return None
-    except Exception as e:
-        return None
-
-def check_api_status():
-    """Check if the ICAO API is available."""
-    print("Checking ICAO API status...")
-    url = 'https://www4.icao.int/doc8643/External/AircraftTypes'
-    params = {'searchParam': 'A320'}  # Test with common code
-
-    try:
-        response = requests.get(url, params=params, timeout=15)
-        if response.status_code == 200:
-            content = response.text.strip()
-            if content.startswith('<'):
-                # HTML response - check for maintenance message
-                if 'maintenance' in content.lower():
-                    print("\n*** ICAO DATABASE IS CURRENTLY IN MAINTENANCE ***")
-                    print("Please try again later or check manually at:")
-                    print("https://www.icao.int/publications/DOC8643/Pages/Search.aspx")
-                    return False
-            else:
-                try:
-                    data = response.json()
-                    if data:
-                        print("API is available and responding.")
-                        return True
-                except:
-                    pass
-        print("API returned unexpected response.")
-        return False
-    except Exception as e:
-        print(f"API connection error: {e}")
-        return False
-
-def main():
-    # Check API status first
-    if not check_api_status():
-        print("\nExiting due to API unavailability.")
-        sys.exit(1)
-
-    # Read our aircraft list
-    aircraft = []
-    with open('../MasterAircraftList.csv', 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        for row in reader:
-            if len(row) >= 5:
-                aircraft.append({
-                    'icao': row[0],
-                    'manufacturer': row[1],
-                    'model': row[2],
-                    'engine_type': row[3],
-                    'num_engines': row[4]
-                })
-
-    print(f"\nLoaded {len(aircraft)} aircraft from MasterAircraftList.csv")
-
-    # Get unique ICAO codes (skip XXXX)
-    icao_codes = set()
-    for a in aircraft:
-        if a['icao'] != 'XXXX':
-            icao_codes.add(a['icao'])
-
-    print(f"Found {len(icao_codes)} unique ICAO codes to verify")
-
-    # Test with a few codes first
-    test_codes = ['C182', 'B738', 'A320', 'PA28', 'SR22', 'BE9L']
-
-    print("\n" + "="*60)
-    print("TESTING API WITH SAMPLE CODES")
-    print("="*60 + "\n")
-
-    api_working = False
-    for code in test_codes:
-        print(f"Looking up: {code}")
-        results = lookup_icao(code)
-        if results and len(results) > 0:
-            api_working = True
-            print(f"  Found {len(results)} result(s)")
-            for r in results[:2]:
-                mfg = r.get('Manufacturer', r.get('ManufacturerCode', 'N/A'))
-                model = r.get('ModelFullName', r.get('Model', 'N/A'))
-                eng_count = r.get('EngineCount', 'N/A')
-                eng_type = r.get('EngineType', 'N/A')
-                print(f"    → {mfg} {model}")
-                print(f"      Engines: {eng_count} x {eng_type}")
-        elif results is not None:
-            print(f"  NOT FOUND in ICAO database")
-        else:
-            print(f"  ERROR during lookup (API may be unavailable)")
-        time.sleep(0.5)
-
-    if not api_working:
-        print("\n*** API does not appear to be working. Please try again later. ***")
-        sys.exit(1)
-
-    # Verify all codes
-    print("\n" + "="*60)
-    print(f"VERIFYING ALL {len(icao_codes)} ICAO CODES")
-    print(f"Estimated time: {len(icao_codes) * 0.6 / 60:.1f} minutes")
-    print("="*60 + "\n")
-
-    valid_codes = []
-    invalid_codes = []
-    errors = []
-
-    sorted_codes = sorted(icao_codes)
-    total = len(sorted_codes)
-
-    for i, code in enumerate(sorted_codes):
-        results = lookup_icao(code)
-
-        if results and len(results) > 0:
-            valid_codes.append((code, results))
-        elif results is not None:
-            invalid_codes.append(code)
-        else:
-            errors.append(code)
-
-        # Progress update
-        if (i + 1) % 50 == 0:
-            print(f"  Progress: {i+1}/{total} codes checked...")
-            print(f"    Valid: {len(valid_codes)}, Invalid: {len(invalid_codes)}, Errors: {len(errors)}")
-
-        # Rate limiting
-        time.sleep(0.5)
-
-    # Summary
-    print("\n" + "="*60)
-    print("VERIFICATION SUMMARY")
-    print("="*60)
-    print(f"Total unique ICAO codes checked: {total}")
-    print(f"Valid codes (found in ICAO DB):  {len(valid_codes)}")
-    print(f"Invalid codes (not found):       {len(invalid_codes)}")
-    print(f"Errors during lookup:            {len(errors)}")
-
-    if invalid_codes:
-        print(f"\nInvalid/Unknown ICAO codes ({len(invalid_codes)}):")
-        for code in sorted(invalid_codes)[:30]:
-            our_aircraft = [a for a in aircraft if a['icao'] == code]
-            if our_aircraft:
-                print(f"  {code}: {our_aircraft[0]['manufacturer']} {our_aircraft[0]['model']}")
-        if len(invalid_codes) > 30:
-            print(f"  ... and {len(invalid_codes) - 30} more")
-
-    # Save detailed results
-    with open('icao_verification_results.txt', 'w') as f:
-        f.write("ICAO Code Verification Results\n")
-        f.write("="*60 + "\n\n")
-
-        f.write(f"Total codes checked: {total}\n")
-        f.write(f"Valid codes: {len(valid_codes)}\n")
-        f.write(f"Invalid codes: {len(invalid_codes)}\n")
-        f.write(f"Errors: {len(errors)}\n\n")
-
-        f.write("INVALID CODES (not in ICAO database):\n")
-        f.write("-"*40 + "\n")
-        for code in sorted(invalid_codes):
-            our_aircraft = [a for a in aircraft if a['icao'] == code]
-            if our_aircraft:
-                f.write(f"{code}: {our_aircraft[0]['manufacturer']} {our_aircraft[0]['model']}\n")
-
-        f.write("\n\nERROR CODES (lookup failed):\n")
-        f.write("-"*40 + "\n")
-        for code in sorted(errors):
-            our_aircraft = [a for a in aircraft if a['icao'] == code]
-            if our_aircraft:
-                f.write(f"{code}: {our_aircraft[0]['manufacturer']} {our_aircraft[0]['model']}\n")
-
-        f.write("\n\nVALID CODES - COMPARISON:\n")
-        f.write("-"*40 + "\n")
-        for code, results in sorted(valid_codes):
-            our_aircraft = [a for a in aircraft if a['icao'] == code]
-            f.write(f"\n{code}:\n")
-            if our_aircraft:
-                f.write(f"  OURS: {our_aircraft[0]['manufacturer']} - {our_aircraft[0]['model']}\n")
-            for r in results[:2]:
-                mfg = r.get('Manufacturer', r.get('ManufacturerCode', 'N/A'))
-                model = r.get('ModelFullName', r.get('Model', 'N/A'))
-                f.write(f"  ICAO: {mfg} - {model}\n")
-
-    print(f"\nDetailed results saved to icao_verification_results.txt")
-
-if __name__ == '__main__':
-    main()
+#!/usr/bin/env python3
+"""
+Script to verify ICAO codes in MasterAircraftList.csv against the official ICAO database.
+Queries the ICAO Doc 8643 database.
+
+NOTE: The ICAO database API (www4.icao.int) may be periodically unavailable for maintenance.
+      Check https://www.icao.int/publications/DOC8643/Pages/Search.aspx manually if needed.
+
+Lookups run concurrently (asyncio over a pool of keep-alive sessions) behind a
+token-bucket rate limit, and transient failures are retried with exponential
+backoff and jitter. Use icao_stub_server.py and --base-url to run offline.
+
+Results are cached in icao_lookup_cache.sqlite. By default only codes the
+cache has never seen or that are older than --ttl-days are looked up; every
+other code is reported from the cache. After editing the master list,
+--only-new looks up just the codes the cache has never seen; --only-stale
+looks up just the expired ones, and --refresh looks every code up again.
+
+Usage:
+    cd Aircraft/faa/ICAO
+    python3 verify_icao.py [--concurrency 8] [--rate 4] [--retries 4] [--base-url URL]
+                           [--only-new | --only-stale | --refresh] [--ttl-days 30] [--no-cache]
+                           [--metrics-json FILE] [--profile FILE] [--trace-memory]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import random
+import requests
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from icao_report import VerificationReport, load_results, write_report
+from instrumentation import Stage, add_arguments, instrumented
+
+ICAO_API_URL = 'https://www4.icao.int/doc8643/External/AircraftTypes'
+LOOKUP_CACHE_FILE = 'icao_lookup_cache.sqlite'
+DEFAULT_TTL_DAYS = 30
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    'Accept': 'application/json',
+}
+
+def parse_lookup_response(type_code, content):
+    """
+    Interpret a 200 response body from the AircraftTypes endpoint.
+
+    Returns the matching records ([] if none), or None for the HTML
+    maintenance page and unparseable responses.
+    """
+    content = content.strip()
+    if content.startswith('<'):
+        # HTML response - likely maintenance page
+        return None
+    if not content:
+        return []
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return None
+    # Filter for exact type code match
+    exact_matches = [r for r in data if r.get('Designator', '').upper() == type_code.upper()]
+    return exact_matches if exact_matches else data
+
+
+class IcaoLookupCache:
+    """
+    On-disk SQLite cache of Doc 8643 lookups, keyed by designator.
+
+    Stores the fetch time and the JSON results of every successful lookup
+    (an empty list for codes the database does not know). Entries older than
+    the TTL are stale. Failed lookups are never cached.
+    """
+
+    def __init__(self, path=LOOKUP_CACHE_FILE, ttl_days=DEFAULT_TTL_DAYS):
+        self.ttl = ttl_days * 86400
+        self.db = sqlite3.connect(path)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS lookups (
+            designator TEXT PRIMARY KEY,
+            fetched_at REAL NOT NULL,
+            raw_json TEXT NOT NULL
+        )''')
+        self.db.commit()
+
+    def is_fresh(self, fetched_at, now=None):
+        return (now or time.time()) - fetched_at < self.ttl
+
+    def get(self, type_code, allow_stale=False):
+        """Cached results for a code, or None if missing (or stale)."""
+        row = self.db.execute('SELECT fetched_at, raw_json FROM lookups WHERE designator = ?',
+                              (type_code.upper(),)).fetchone()
+        if row is None or not (allow_stale or self.is_fresh(row[0])):
+            return None
+        return json.loads(row[1])
+
+    def put_many(self, items):
+        """Store (code, results) pairs; results of None (errors) are skipped."""
+        now = time.time()
+        self.db.executemany(
+            'INSERT OR REPLACE INTO lookups (designator, fetched_at, raw_json) VALUES (?, ?, ?)',
+            [(code.upper(), now, json.dumps(results)) for code, results in items if results is not None])
+        self.db.commit()
+
+    def put(self, type_code, results):
+        self.put_many([(type_code, results)])
+
+    def partition(self, codes):
+        """Split codes into (new, stale, fresh) lists by cache state."""
+        fetched = dict(self.db.execute('SELECT designator, fetched_at FROM lookups'))
+        now = time.time()
+        new, stale, fresh = [], [], []
+        for code in codes:
+            fetched_at = fetched.get(code.upper())
+            if fetched_at is None:
+                new.append(code)
+            elif self.is_fresh(fetched_at, now):
+                fresh.append(code)
+            else:
+                stale.append(code)
+        return new, stale, fresh
+
+    def close(self):
+        self.db.close()
+
+
+def lookup_icao(type_code, session=None, base_url=ICAO_API_URL, cache=None):
+    """
+    Query the ICAO Doc 8643 database for an aircraft type code.
+
+    With an IcaoLookupCache, a fresh cached answer is returned without a
+    request, and successful lookups are written back to the cache.
+    """
+    if cache is not None:
+        cached = cache.get(type_code)
+        if cached is not None:
+            return cached
+
+    params = {'searchParam': type_code}
+
+    try:
+        response = (session or requests).get(base_url, params=params, headers=REQUEST_HEADERS, timeout=15)
+        if response.status_code == 200:
+            results = parse_lookup_response(type_code, response.text)
+            if cache is not None and results is not None:
+                cache.put(type_code, results)
+            return results
+        else:
+            return None
+    except Exception as e:
+        return None
+
+
+class TransientLookupError(Exception):
+    """A lookup failure worth retrying (network error, 429 or 5xx)."""
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` acquisitions per second, bursts up to `capacity`.
+
+    The bucket can be shared by several asyncio.run() calls; its lock is
+    recreated for each event loop it is used from.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = None
+        self.loop = None
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.lock, self.loop = asyncio.Lock(), loop
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncIcaoVerifier:
+    """
+    Concurrent Doc 8643 lookups with rate limiting and retries.
+
+    Blocking requests run on a thread pool of `concurrency` workers, each with
+    its own keep-alive requests.Session, so connections are reused across
+    lookups. A TokenBucket caps the request rate across all workers, and
+    transient failures are retried with full-jitter exponential backoff.
+    The pool and bucket last for the verifier's lifetime, so the API checks
+    and the verification share connections and the rate limit; use it as a
+    context manager (or call close()) to shut the pool down.
+    """
+
+    def __init__(self, base_url=ICAO_API_URL, concurrency=8, rate=4.0, burst=None,
+                 retries=4, backoff=0.5, max_backoff=8.0, timeout=15):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst or concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.local = threading.local()
+        self.bucket = TokenBucket(rate, self.burst)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.retried = 0
+        self.cached = set()  # Codes answered from the cache by the last verify()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def _session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.headers.update(REQUEST_HEADERS)
+        return session
+
+    def _get(self, type_code):
+        """Blocking GET for one code; raises TransientLookupError on failures worth retrying."""
+        try:
+            response = self._session().get(self.base_url, params={'searchParam': type_code},
+                                           timeout=self.timeout)
+        except requests.RequestException as e:
+            raise TransientLookupError(str(e)) from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientLookupError(f"HTTP {response.status_code}")
+        return response
+
+    def _fetch(self, type_code):
+        """Blocking single attempt, run on the worker pool."""
+        response = self._get(type_code)
+        if response.status_code != 200:
+            return None
+        return parse_lookup_response(type_code, response.text)
+
+    def _probe(self, type_code):
+        """Blocking status check: 'available', 'maintenance' or 'unexpected'."""
+        response = self._get(type_code)
+        content = response.text.strip()
+        if response.status_code != 200:
+            return 'unexpected'
+        if content.startswith('<'):
+            return 'maintenance' if 'maintenance' in content.lower() else 'unexpected'
+        return 'available' if parse_lookup_response(type_code, content) else 'unexpected'
+
+    async def status(self, type_code='A320'):
+        """Probe the endpoint with one code, retrying transient failures. None if unreachable."""
+        return await self.lookup(type_code, self._probe)
+
+    async def lookup(self, type_code, fetch=None):
+        """
+        Look up one code, retrying transient failures. None if it never succeeds.
+        fetch is the blocking attempt to make (default _fetch).
+        """
+        loop = asyncio.get_running_loop()
+        fetch = fetch or self._fetch
+        for attempt in range(self.retries + 1):
+            await self.bucket.acquire()
+            try:
+                return await loop.run_in_executor(self.executor, fetch, type_code)
+            except TransientLookupError:
+                if attempt == self.retries:
+                    return None
+                self.retried += 1
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+
+    async def verify(self, codes, progress=None, cache=None):
+        """
+        Verify codes concurrently.
+
+        Returns (valid_codes, invalid_codes, errors) like the sequential loop:
+        valid_codes is a list of (code, results), in the order of `codes`.
+        progress is an instrumentation Stage advanced once per code. With an
+        IcaoLookupCache, codes with a fresh cached answer are not requested
+        (they are listed in self.cached).
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = {}
+        self.cached = set()
+        progress = progress or Stage('verify', len(codes), 'codes', progress_every=50)
+
+        async def check(code):
+            cached = cache.get(code) if cache is not None else None
+            if cached is not None:
+                results[code] = cached
+                self.cached.add(code)
+            else:
+                async with semaphore:
+                    results[code] = await self.lookup(code)
+            progress.advance()
+
+        await asyncio.gather(*(check(code) for code in codes))
+
+        valid_codes, invalid_codes, errors = [], [], []
+        for code in codes:
+            found = results[code]
+            if found and len(found) > 0:
+                valid_codes.append((code, found))
+            elif found is not None:
+                invalid_codes.append(code)
+            else:
+                errors.append(code)
+        return valid_codes, invalid_codes, errors
+
+
+def check_api_status(verifier):
+    """Check if the ICAO API is available, retrying transient failures."""
+    print("Checking ICAO API status...")
+    status = asyncio.run(verifier.status('A320'))  # Test with common code
+    if status == 'available':
+        print("API is available and responding.")
+        return True
+    if status == 'maintenance':
+        print("\n*** ICAO DATABASE IS CURRENTLY IN MAINTENANCE ***")
+        print("Please try again later or check manually at:")
+        print("https://www.icao.int/publications/DOC8643/Pages/Search.aspx")
+        return False
+    if status is None:
+        print(f"API connection error after {verifier.retries} retries.")
+        return False
+    print("API returned unexpected response.")
+    return False
+
+
+async def lookup_samples(verifier, codes):
+    """Look up a few codes through the verifier, in the order given."""
+    return await asyncio.gather(*(verifier.lookup(code) for code in codes))
+
+
+def run_api_checks(verifier):
+    """Check the API is up and answering sample codes; exit if it is not."""
+    if not check_api_status(verifier):
+        print("\nExiting due to API unavailability.")
+        sys.exit(1)
+
+    # Test with a few codes first
+    test_codes = ['C182', 'B738', 'A320', 'PA28', 'SR22', 'BE9L']
+
+    print("\n" + "="*60)
+    print("TESTING API WITH SAMPLE CODES")
+    print("="*60 + "\n")
+
+    api_working = False
+    for code, results in zip(test_codes, asyncio.run(lookup_samples(verifier, test_codes))):
+        print(f"Looking up: {code}")
+        if results and len(results) > 0:
+            api_working = True
+            print(f"  Found {len(results)} result(s)")
+            for r in results[:2]:
+                mfg = r.get('Manufacturer', r.get('ManufacturerCode', 'N/A'))
+                model = r.get('ModelFullName', r.get('Model', 'N/A'))
+                eng_count = r.get('EngineCount', 'N/A')
+                eng_type = r.get('EngineType', 'N/A')
+                print(f"    → {mfg} {model}")
+                print(f"      Engines: {eng_count} x {eng_type}")
+        elif results is not None:
+            print(f"  NOT FOUND in ICAO database")
+        else:
+            print(f"  ERROR during lookup (API may be unavailable)")
+
+    if not api_working:
+        print("\n*** API does not appear to be working. Please try again later. ***")
+        sys.exit(1)
+
+
+def verify_codes(verifier, codes, args, metrics, cache=None):
+    """
+    Look up codes concurrently and record successful results in the cache.
+    Fresh cached answers are used instead of a request unless --refresh.
+    """
+    print("\n" + "="*60)
+    print(f"VERIFYING {len(codes)} ICAO CODES")
+    print(f"Concurrency: {args.concurrency}, rate limit: {args.rate:g} requests/second")
+    print(f"Estimated time: {len(codes) / args.rate / 60:.1f} minutes")
+    print("="*60 + "\n")
+
+    retried = verifier.retried
+    started = time.monotonic()
+    with metrics.stage('verify', len(codes), 'codes', progress_every=50) as stage:
+        valid_codes, invalid_codes, errors = asyncio.run(
+            verifier.verify(codes, stage, None if args.refresh else cache))
+    print(f"  Checked {len(codes)} codes in {time.monotonic() - started:.1f}s "
+          f"({verifier.retried - retried} retries, {len(verifier.cached)} from the cache)")
+    metrics.set('retries', verifier.retried)
+
+    if cache is not None:
+        fetched = [(code, results) for code, results in valid_codes if code not in verifier.cached]
+        cache.put_many(fetched + [(code, []) for code in invalid_codes if code not in verifier.cached])
+    return valid_codes, invalid_codes, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify MasterAircraftList.csv ICAO codes against Doc 8643.")
+    parser.add_argument('--master', default='../MasterAircraftList.csv', help="Path to MasterAircraftList.csv")
+    parser.add_argument('--base-url', default=ICAO_API_URL, help="AircraftTypes endpoint (e.g. icao_stub_server.py)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Lookups in flight at once")
+    parser.add_argument('--rate', type=float, default=4.0, help="Maximum requests per second")
+    parser.add_argument('--retries', type=int, default=4, help="Retries per code for transient failures")
+    parser.add_argument('--cache', default=LOOKUP_CACHE_FILE, help="SQLite lookup cache file")
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL_DAYS, help="Age at which cached lookups expire")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore and do not update the lookup cache")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--only-new', action='store_true', help="Only look up codes not in the cache yet")
+    mode.add_argument('--only-stale', action='store_true',
+                      help="Only look up codes whose cached result has expired")
+    mode.add_argument('--refresh', action='store_true', help="Look up every code again, ignoring the cache")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumented('verify_icao', args) as metrics:
+        run(args, metrics)
+
+
+def run(args, metrics):
+    """Verify the master list's codes and write the reports."""
+    # Read our aircraft list
+    with metrics.stage('load_master', unit='rows') as stage:
+        aircraft = []
+        with open(args.master, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            for row in reader:
+                if len(row) >= 5:
+                    aircraft.append({
+                        'icao': row[0],
+                        'manufacturer': row[1],
+                        'model': row[2],
+                        'engine_type': row[3],
+                        'num_engines': row[4]
+                    })
+        stage.update(len(aircraft))
+
+    print(f"\nLoaded {len(aircraft)} aircraft from MasterAircraftList.csv")
+
+    # Get unique ICAO codes (skip XXXX)
+    icao_codes = set()
+    for a in aircraft:
+        if a['icao'] != 'XXXX':
+            icao_codes.add(a['icao'])
+
+    print(f"Found {len(icao_codes)} unique ICAO codes to verify")
+
+    # Decide what needs a network lookup; everything else comes from the cache
+    sorted_codes = sorted(icao_codes)
+    cache = None if args.no_cache else IcaoLookupCache(args.cache, args.ttl_days)
+    if cache is not None and not args.refresh:
+        new, stale, fresh = cache.partition(sorted_codes)
+        print(f"Cache: {len(new)} new, {len(stale)} expired, {len(fresh)} fresh")
+        if args.only_new:
+            codes_to_fetch = new
+        elif args.only_stale:
+            codes_to_fetch = stale
+        else:
+            codes_to_fetch = new + stale
+    else:
+        codes_to_fetch = sorted_codes
+    metrics.set('unique_codes', len(sorted_codes))
+    metrics.set('fetched', len(codes_to_fetch))
+
+    if codes_to_fetch:
+        with AsyncIcaoVerifier(args.base_url, concurrency=args.concurrency,
+                               rate=args.rate, retries=args.retries) as verifier:
+            with metrics.stage('api_checks'):
+                run_api_checks(verifier)
+            valid_codes, invalid_codes, errors = verify_codes(verifier, codes_to_fetch, args, metrics, cache)
+    else:
+        print("Nothing to look up - all results come from the cache.")
+        valid_codes, invalid_codes, errors = [], [], []
+
+    # Fill in the codes that were not re-fetched from the cache
+    if cache is not None:
+        with metrics.stage('read_cache', unit='codes') as stage:
+            fetched = set(codes_to_fetch)
+            for code in sorted_codes:
+                if code in fetched:
+                    continue
+                stage.advance()
+                results = cache.get(code, allow_stale=True)
+                if results:
+                    valid_codes.append((code, results))
+                elif results is not None:
+                    invalid_codes.append(code)
+                else:
+                    errors.append(code)
+            cache.close()
+
+    # Summary and reports (diffed against the previous run's JSON, if any)
+    with metrics.stage('report', unit='codes') as stage:
+        report = VerificationReport(aircraft, valid_codes, invalid_codes, errors)
+        report.print_summary()
+        write_report(report, previous=load_results())
+        stage.update(report.total)
+
+if __name__ == '__main__':
+    main()
@@ -5,20 +5,77 @@ Add Copyright Metadata to SVG Files
 Adds copyright notices, legal warnings, and unique tracking hashes
 to SVG files for Passion Highway, Inc. / Airplane-ID project.
 
-Usage: python add_copyright.py <svg_file_or_directory>
+Batch mode (for Xcode build phases) keeps a manifest of path, size, mtime
+and content hash for every stamped file in the directory. Files whose size
+and mtime still match are skipped without being opened; the rest are stamped
+in a process pool. Every rewrite goes to a temp file that is renamed over
+the original, so an interrupted build never leaves a half-written SVG.
+
+Files are streamed in chunks rather than loaded whole: one pass checks for an
+existing copyright and hashes the path data, a second pass drops the old
+prolog, finds the <svg> tag and writes the stamped document.
+
+Usage: python add_copyright.py [--batch] [--jobs N] [--manifest PATH] <svg_file_or_directory>
+       [--metrics-json FILE] [--profile FILE] [--trace-memory]
 """
 
+import argparse
+import json
 import os
 import sys
 import hashlib
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 
+# Stage timing/profiling flags are shared with the Data/ scripts when they are
+# checked out alongside; the Xcode build phase also runs without them
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', 'Data'))
+try:
+    from instrumentation import Metrics, add_arguments, instrumented  # noqa: E402
+except ImportError:
+    class _NullStage:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def advance(self, count=1, detail=None):
+            pass
+
+        def update(self, items, detail=None):
+            pass
+
+    class Metrics:
+        """Stand-in for instrumentation.Metrics that records nothing."""
+
+        def __init__(self, script, trace_memory=False):
+            pass
+
+        def stage(self, name, total=None, unit='items', progress_every=None):
+            return _NullStage()
+
+        def set(self, name, value):
+            pass
+
+    def add_arguments(parser):
+        pass
+
+    def instrumented(script, args):
+        return nullcontext(Metrics(script))
+
 # Copyright configuration
 COPYRIGHT_YEAR = "2026"
 COMPANY_NAME = "Passion Highway, Inc."
 CONTACT_EMAIL = "jim@passionhighway.com"
 PROJECT_PREFIX = "PHI-AID"  # Passion Highway Inc - Airplane ID
+MANIFEST_NAME = ".copyright-manifest.json"  # Written in the processed directory
+CHUNK_SIZE = 64 * 1024
+COPYRIGHT_MARKERS = (PROJECT_PREFIX, "Passion Highway")
+PATH_DATA = re.compile(r'd="([^"]+)"')
 
 COPYRIGHT_COMMENT = f"""
   Copyright (c) {COPYRIGHT_YEAR} {COMPANY_NAME}. All Rights Reserved.
@@ -69,10 +126,9 @@ def generate_asset_id(filename):
 
 def generate_file_hash(content):
     """Generate SHA256 hash of the SVG content (paths only)."""
-    # Hash just the path data to create a content fingerprint
-    paths = re.findall(r'd="([^"]+)"', content)
-    path_content = ''.join(paths)
-    return hashlib.sha256(path_content.encode()).hexdigest()[:16]
+    hasher = PathHasher()
+    hasher.feed(content)
+    return hasher.hexdigest()
 
 
 def get_title_from_filename(filename):
@@ -89,19 +145,235 @@ def get_title_from_filename(filename):
         return f"{base} Aircraft Silhouette"
 
 
-def add_copyright_to_svg(filepath):
-    """Add copyright metadata to an SVG file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+# =============================================================================
+# Streaming
+# =============================================================================
+
+class SvgTagNotFound(Exception):
+    pass
 
-    # Check if already has our copyright
-    if PROJECT_PREFIX in content or "Passion Highway" in content:
-        print(f"  Skipping (already has copyright): {filepath}")
-        return False
 
-    # Generate IDs and hashes
+def read_chunks(filepath):
+    """Yield the decoded text of filepath in CHUNK_SIZE pieces."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _partial_suffix(text, token, start=0):
+    """Length of the longest suffix of text[start:] that begins token."""
+    for length in range(min(len(token) - 1, len(text) - start), 0, -1):
+        if text.endswith(token[:length]):
+            return length
+    return 0
+
+
+class PathHasher:
+    """
+    Incremental sha256 of ''.join(re.findall(r'd="([^"]+)"', content)).
+
+    Path data is fed to the hash as it streams past; the hash state from
+    before an open d=" is kept so an unterminated one at EOF is left out.
+    """
+
+    def __init__(self):
+        self.sha = hashlib.sha256()
+        self.before_path = None
+        self.in_path = False
+        self.pending = ''
+
+    def feed(self, text):
+        text = self.pending + text
+        self.pending = ''
+        i = 0
+        if self.in_path:
+            end = text.find('"')
+            if end < 0:
+                self.sha.update(text.encode())
+                return
+            self.sha.update(text[:end].encode())
+            self.in_path = False
+            i = end + 1
+
+        for match in PATH_DATA.finditer(text, i):
+            self.sha.update(match.group(1).encode())
+            i = match.end()
+
+        # No complete path is left, but one may be open at the chunk boundary
+        start = text.find('d="', i)
+        while start >= 0 and start + 3 < len(text) and text[start + 3] == '"':
+            start = text.find('d="', start + 1)
+        if start < 0:
+            self.pending = text[max(i, len(text) - 2):]
+        elif start + 3 == len(text):
+            self.pending = text[start:]
+        else:
+            self.before_path = self.sha.copy()
+            self.in_path = True
+            self.sha.update(text[start + 3:].encode())
+
+    def hexdigest(self):
+        sha = self.before_path if self.in_path else self.sha
+        return sha.hexdigest()[:16]
+
+
+class XmlDeclStripper:
+    r"""Incremental re.sub(r'<\?xml[^?]*\?>\s*', '', text)."""
+
+    def __init__(self):
+        self.pending = ''
+        self.eat_space = False
+
+    def feed(self, text, final=False):
+        text = self.pending + text
+        out = []
+        i = 0
+        while True:
+            if self.eat_space:
+                while i < len(text) and text[i].isspace():
+                    i += 1
+                if i == len(text) and not final:
+                    break
+                self.eat_space = False
+            start = text.find('<?xml', i)
+            if start < 0:
+                keep = 0 if final else _partial_suffix(text, '<?xml', i)
+                out.append(text[i:len(text) - keep])
+                i = len(text) - keep
+                break
+            out.append(text[i:start])
+            close = text.find('?', start + 5)
+            if 0 <= close < len(text) - 1:
+                if text[close + 1] == '>':
+                    i = close + 2
+                    self.eat_space = True
+                else:
+                    out.append('<')
+                    i = start + 1
+            elif final:
+                out.append('<')
+                i = start + 1
+            else:
+                i = start
+                break
+        self.pending = text[i:]
+        return ''.join(out)
+
+
+def scan_svg(filepath):
+    """Stream filepath once; returns (already has copyright, path data hash)."""
+    hasher = PathHasher()
+    overlap = max(len(marker) for marker in COPYRIGHT_MARKERS) - 1
+    tail = ''
+    for chunk in read_chunks(filepath):
+        window = tail + chunk
+        if any(marker in window for marker in COPYRIGHT_MARKERS):
+            return True, None
+        hasher.feed(chunk)
+        tail = window[-overlap:]
+    return False, hasher.hexdigest()
+
+
+def stamped_svg_chunks(filepath, comment, metadata):
+    """
+    Yield the stamped document for filepath piece by piece.
+
+    Matches the old whole-file rewrite exactly: <?xml ...?> declarations are
+    dropped everywhere, then a leading comment, and everything before the
+    first <svg ...> tag is replaced by the copyright prolog. Only the prolog
+    and a run of trailing whitespace are ever held in memory. Raises
+    SvgTagNotFound before yielding anything if there is no <svg> tag.
+    """
+    stripper = XmlDeclStripper()
+    chunks = read_chunks(filepath)
+    state = 'lead'
+    text = ''
+    trailing = ''
+    final = False
+
+    while not final:
+        chunk = next(chunks, None)
+        final = chunk is None
+        text += stripper.feed(chunk or '', final)
+
+        if state == 'lead':
+            text = text.lstrip()
+            if not final and len(text) < 4 and '<!--'.startswith(text):
+                continue
+            state = 'comment' if text.startswith('<!--') else 'svg'
+
+        if state == 'comment':
+            end = text.find('-->', 4)
+            if end >= 0:
+                text = text[end + 3:]
+            elif not final:
+                continue
+            state = 'svg'
+
+        if state == 'svg':
+            start = text.find('<svg')
+            end = text.find('>', start + 4) if start >= 0 else -1
+            if end < 0:
+                if final:
+                    raise SvgTagNotFound(filepath)
+                # Nothing before the tag is kept
+                text = text[start:] if start >= 0 else text[-3:]
+                continue
+            yield f'''<?xml version="1.0" encoding="UTF-8"?>
+<!--{comment}-->
+{text[start:end + 1]}
+  {metadata}
+'''
+            text = text[end + 1:]
+            state = 'body'
+
+        text = trailing + text
+        body = text.rstrip()
+        trailing = '' if final else text[len(body):]
+        text = ''
+        if body:
+            yield body
+
+
+def write_atomic(filepath, content):
+    """
+    Replace filepath with content via a temp file in the same directory.
+
+    content is a string or an iterable of strings; if the iterable raises,
+    the original file is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.svg.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for piece in ([content] if isinstance(content, str) else content):
+                f.write(piece)
+        if os.path.exists(filepath):
+            os.chmod(tmp_path, os.stat(filepath).st_mode & 0o7777)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def stamp_svg(filepath):
+    """
+    Add copyright metadata to an SVG file.
+
+    Returns (status, message) where status is 'added', 'skipped' (already
+    has copyright) or 'error'.
+    """
+    # Check if already has our copyright (and hash the paths on the way)
+    has_copyright, file_hash = scan_svg(filepath)
+    if has_copyright:
+        return 'skipped', f"  Skipping (already has copyright): {filepath}"
+
+    # Generate IDs
     asset_id = generate_asset_id(filepath)
-    file_hash = generate_file_hash(content)
     title = get_title_from_filename(filepath)
 
     # Prepare the copyright comment
@@ -110,74 +382,191 @@ def add_copyright_to_svg(filepath):
     # Prepare the metadata
     metadata = METADATA_TEMPLATE.format(asset_id=asset_id, title=title)
 
-    # Build the new SVG content
-    # Remove any existing XML declaration
-    content = re.sub(r'<\?xml[^?]*\?>\s*', '', content)
-
-    # Remove any existing comments at the start
-    content = re.sub(r'^<!--[\s\S]*?-->\s*', '', content.strip())
-
-    # Find the opening svg tag
-    svg_match = re.search(r'(<svg[^>]*>)', content)
-    if not svg_match:
-        print(f"  Error: No <svg> tag found in {filepath}")
-        return False
+    # Stream the new file over the old one
+    try:
+        write_atomic(filepath, stamped_svg_chunks(filepath, comment, metadata))
+    except SvgTagNotFound:
+        return 'error', f"  Error: No <svg> tag found in {filepath}"
 
-    svg_tag = svg_match.group(1)
-    svg_content_after_tag = content[svg_match.end():]
+    return 'added', f"  Added copyright: {os.path.basename(filepath)} [{asset_id}]"
 
-    # Build new file
-    new_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<!--{comment}-->
-{svg_tag}
-  {metadata}
-{svg_content_after_tag}'''
 
-    # Write back
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(new_content)
-
-    print(f"  Added copyright: {os.path.basename(filepath)} [{asset_id}]")
-    return True
-
-
-def process_directory(directory):
+def add_copyright_to_svg(filepath):
+    """Add copyright metadata to an SVG file."""
+    status, message = stamp_svg(filepath)
+    print(message)
+    return status == 'added'
+
+
+def find_svgs(directory):
+    """Yield (path, stat) for every .svg under directory, like os.walk order."""
+    with os.scandir(directory) as entries:
+        entries = list(entries)
+    subdirs = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=True):
+            subdirs.append(entry.path)
+        elif entry.name.endswith('.svg') and entry.is_file():
+            yield entry.path, entry.stat()
+    for subdir in subdirs:
+        yield from find_svgs(subdir)
+
+
+# =============================================================================
+# Batch Mode
+# =============================================================================
+
+def file_sha256(filepath):
+    sha = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def load_manifest(path):
+    """{relative path: {size, mtime_ns, sha256}} ({} if missing or unreadable)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, files):
+    content = json.dumps({'prefix': PROJECT_PREFIX, 'year': COPYRIGHT_YEAR,
+                          'files': dict(sorted(files.items()))}, indent=2) + "\n"
+    write_atomic(path, content)
+
+
+def _stamp_batch_file(filepath, known_sha256):
+    """
+    Worker: stamp one file whose size/mtime no longer match the manifest.
+
+    A file whose bytes still hash to the manifest entry (e.g. only touched)
+    is not rewritten. Returns (filepath, status, message, manifest entry);
+    the entry is None when the file should not be recorded.
+    """
+    digest = file_sha256(filepath)
+    if digest == known_sha256:
+        status, message = 'unchanged', None
+    else:
+        status, message = stamp_svg(filepath)
+        if status == 'error':
+            return filepath, status, message, None
+        if status == 'added':
+            digest = file_sha256(filepath)
+    st = os.stat(filepath)
+    return filepath, status, message, {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+
+
+def process_batch(directory, jobs=None, manifest_path=None, metrics=None):
+    """
+    Stamp every SVG under directory using the manifest and a process pool.
+
+    Returns (updated count, files skipped via the manifest).
+    """
+    metrics = metrics or Metrics('add_copyright')
+    manifest_path = manifest_path or os.path.join(directory, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    files = {}
+    pending = []
+
+    with metrics.stage('scan', unit='files') as stage:
+        for filepath, st in find_svgs(directory):
+            stage.advance()
+            key = os.path.relpath(filepath, directory)
+            entry = manifest.get(key)
+            if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+                files[key] = entry
+            else:
+                pending.append((filepath, entry['sha256'] if entry else None))
+
+    skipped = len(files)
+    count = 0
+    jobs = min(jobs or os.cpu_count() or 1, max(len(pending), 1))
+    with metrics.stage('stamp', total=len(pending), unit='files', progress_every=500) as stage, \
+            ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext() as pool:
+        if pool is None:
+            results = (_stamp_batch_file(*args) for args in pending)
+        else:
+            results = pool.map(_stamp_batch_file, *zip(*pending), chunksize=16)
+        for filepath, status, message, entry in results:
+            if message:
+                print(message)
+            if status == 'added':
+                count += 1
+            if entry is not None:
+                files[os.path.relpath(filepath, directory)] = entry
+            stage.advance()
+
+    if files != manifest:
+        with metrics.stage('save_manifest', unit='files') as stage:
+            save_manifest(manifest_path, files)
+            stage.update(len(files))
+    metrics.set('skipped_by_manifest', skipped)
+    metrics.set('updated', count)
+    return count, skipped
+
+
+def process_directory(directory, metrics=None):
     """Process all SVG files in a directory recursively."""
+    metrics = metrics or Metrics('add_copyright')
     count = 0
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.svg'):
-                filepath = os.path.join(root, file)
-                if add_copyright_to_svg(filepath):
-                    count += 1
+    with metrics.stage('stamp', unit='files') as stage:
+        for root, dirs, files in os.walk(directory):
+            for file in files:
+                if file.endswith('.svg'):
+                    filepath = os.path.join(root, file)
+                    if add_copyright_to_svg(filepath):
+                        count += 1
+                    stage.advance()
+    metrics.set('updated', count)
     return count
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python add_copyright.py <svg_file_or_directory>")
+    parser = argparse.ArgumentParser(description="Adds copyright metadata to SVG files.")
+    parser.add_argument('target', nargs='?', help="SVG file or directory")
+    parser.add_argument('--batch', action='store_true',
+                        help=f"Use the {MANIFEST_NAME} manifest and a process pool (directories only)")
+    parser.add_argument('--jobs', type=int, default=None, help="Batch worker processes (default: CPU count)")
+    parser.add_argument('--manifest', help=f"Batch manifest path (default: <directory>/{MANIFEST_NAME})")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.target:
+        print("Usage: python add_copyright.py [--batch] [--jobs N] [--manifest PATH] <svg_file_or_directory>")
         print("\nAdds copyright metadata to SVG files.")
         print(f"Company: {COMPANY_NAME}")
         print(f"Contact: {CONTACT_EMAIL}")
         sys.exit(1)
 
-    target = sys.argv[1]
+    target = args.target
 
     print(f"\nAdding copyright metadata for {COMPANY_NAME}")
     print(f"=" * 50)
 
-    if os.path.isfile(target):
-        if add_copyright_to_svg(target):
-            print("\n1 file updated.")
-        else:
-            print("\nNo files updated.")
-    elif os.path.isdir(target):
-        count = process_directory(target)
-        print(f"\n{count} files updated.")
-    else:
+    if not os.path.exists(target):
         print(f"Error: {target} not found")
         sys.exit(1)
 
+    with instrumented('add_copyright', args) as metrics:
+        if os.path.isfile(target):
+            with metrics.stage('stamp', total=1, unit='files') as stage:
+                updated = add_copyright_to_svg(target)
+                stage.advance()
+            if updated:
+                print("\n1 file updated.")
+            else:
+                print("\nNo files updated.")
+        elif args.batch:
+            count, skipped = process_batch(target, args.jobs, args.manifest, metrics)
+            print(f"\n{count} files updated ({skipped} unchanged per manifest).")
+        else:
+            count = process_directory(target, metrics)
+            print(f"\n{count} files updated.")
+
 
 if __name__ == '__main__':
     main()
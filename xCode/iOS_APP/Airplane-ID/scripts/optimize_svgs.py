@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Optimize MapIcons SVG Files
+
+Shrinks the map annotation silhouettes before they ship in the asset
+catalog:
+  - rounds path, polygon and shape coordinates to --precision decimals
+  - rewrites path data with relative commands (h/v for straight runs)
+  - drops empty groups, identity transforms, default attribute values,
+    unused ids and authoring comments/whitespace after the metadata
+
+The copyright comment, the <svg> tag and the RDF <metadata> block written by
+add_copyright.py are copied through byte for byte, except the comment's
+Hash: line: it records a hash of the path data, so it is recomputed with
+add_copyright's hasher over the rewritten paths. Rounding relative
+coordinates is done against the already-rounded pen position, so error does
+not accumulate along a path. Running it again on its own output changes
+nothing. Prints per-icon and total bytes and path command counts, before
+and after.
+
+Usage: python optimize_svgs.py [--precision 2] [--dry-run] <svg_file_or_directory>
+"""
+
+import argparse
+import os
+import re
+import sys
+
+from add_copyright import find_svgs, generate_file_hash, write_atomic
+
+DEFAULT_PRECISION = 2
+
+# Presentation attributes at their initial value; inherited ones are only
+# dropped when no ancestor sets something else
+DEFAULT_ATTRIBUTES = {
+    'fill-opacity': '1',
+    'stroke-opacity': '1',
+    'fill-rule': 'nonzero',
+    'clip-rule': 'nonzero',
+    'stroke': 'none',
+    'stroke-width': '1',
+    'stroke-linecap': 'butt',
+    'stroke-linejoin': 'miter',
+    'stroke-miterlimit': '4',
+    'stroke-dasharray': 'none',
+    'stroke-dashoffset': '0',
+    'visibility': 'visible',
+    'opacity': '1',
+    'display': 'inline',
+}
+NOT_INHERITED = {'opacity', 'display'}
+
+# Geometry attributes whose default is 0, per element
+ZERO_DEFAULTS = {
+    'rect': {'x', 'y', 'rx', 'ry'},
+    'circle': {'cx', 'cy'},
+    'ellipse': {'cx', 'cy'},
+    'line': {'x1', 'y1', 'x2', 'y2'},
+}
+NUMERIC_ATTRIBUTES = {'x', 'y', 'width', 'height', 'cx', 'cy', 'r', 'rx', 'ry',
+                      'x1', 'y1', 'x2', 'y2', 'stroke-width'}
+
+# Elements dropped when they end up with no children
+REMOVABLE_WHEN_EMPTY = {'g', 'defs'}
+# Elements whose whitespace text is significant
+KEEP_WHITESPACE = {'text', 'tspan', 'textPath', 'style', 'title', 'desc'}
+
+PATH_ARGS = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7, 'Z': 0}
+
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+SEPARATORS = re.compile(r'[\s,]*')
+TOKEN = re.compile(r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<[^>]*>|[^<]+', re.DOTALL)
+TAG = re.compile(r'<\s*(/?)\s*([\w:.-]+)(.*?)(/?)\s*>$', re.DOTALL)
+ATTRIBUTE = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+TRANSLATE = re.compile(r'^\s*translate\(\s*(' + NUMBER.pattern + r')(?:[\s,]+(' + NUMBER.pattern + r'))?\s*\)\s*$')
+STAMPED_HASH = re.compile(r'^(\s*Hash: )[0-9a-f]+$', re.MULTILINE)
+IDENTITY_TRANSFORM = re.compile(
+    r'^\s*(?:(?:translate\(\s*[-+]?0*\.?0*(?:[\s,]+[-+]?0*\.?0*)?\s*\)|rotate\(\s*[-+]?0*\.?0*\s*\)'
+    r'|scale\(\s*1(?:\.0*)?(?:[\s,]+1(?:\.0*)?)?\s*\))\s*)+$')
+
+
+# =============================================================================
+# Numbers
+# =============================================================================
+
+def format_number(value, precision):
+    """Shortest text for value rounded to precision decimals ('-0.50' -> '-.5')."""
+    text = f"{round(value, precision):.{precision}f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text in ('-0', ''):
+        text = '0'
+    if text.startswith('0.'):
+        text = text[1:]
+    elif text.startswith('-0.'):
+        text = '-' + text[2:]
+    return text
+
+
+def needs_separator(previous, number):
+    """False when number can follow previous directly ('1.5-2', '.5.5')."""
+    if number.startswith('-'):
+        return False
+    return not (number.startswith('.') and '.' in previous and 'e' not in previous)
+
+
+def join_numbers(numbers, previous=None):
+    """Join formatted numbers, leaving out separators SVG does not need."""
+    out = []
+    for number in numbers:
+        if previous is not None and needs_separator(previous, number):
+            out.append(',')
+        out.append(number)
+        previous = number
+    return ''.join(out)
+
+
+def round_number_list(value, precision):
+    """Round a points="..." style list of numbers."""
+    return ' '.join(format_number(float(n), precision) for n in NUMBER.findall(value))
+
+
+# =============================================================================
+# Path Data
+# =============================================================================
+
+def parse_path(d):
+    """
+    Parse path data into absolute segments [(command, args)].
+
+    Implicit repeats become separate segments (extra M pairs become L), and
+    H/V keep a single coordinate. Raises ValueError on malformed data.
+    """
+    segments = []
+    pos = 0
+    command = None
+    x = y = start_x = start_y = 0.0
+
+    def skip(pos):
+        return SEPARATORS.match(d, pos).end()
+
+    pos = skip(pos)
+    while pos < len(d):
+        if d[pos].isalpha():
+            command = d[pos]
+            if command.upper() not in PATH_ARGS:
+                raise ValueError(f"unknown path command {command!r}")
+            pos = skip(pos + 1)
+        elif command is None:
+            raise ValueError("path data must start with a command")
+
+        upper = command.upper()
+        relative = command.islower()
+        args = []
+        for i in range(PATH_ARGS[upper]):
+            if upper == 'A' and i in (3, 4):
+                if pos >= len(d) or d[pos] not in '01':
+                    raise ValueError("bad arc flag")
+                args.append(float(d[pos]))
+                pos = skip(pos + 1)
+                continue
+            match = NUMBER.match(d, pos)
+            if not match:
+                raise ValueError(f"expected a number at {pos}")
+            args.append(float(match.group()))
+            pos = skip(match.end())
+
+        if upper == 'Z':
+            segments.append(('Z', []))
+            x, y = start_x, start_y
+            command = None
+            continue
+
+        if relative:
+            if upper == 'H':
+                args[0] += x
+            elif upper == 'V':
+                args[0] += y
+            else:
+                for i in range(len(args) - 2 if upper == 'A' else 0, len(args), 2):
+                    args[i] += x
+                    args[i + 1] += y
+        segments.append((upper, args))
+
+        if upper == 'H':
+            x = args[0]
+        elif upper == 'V':
+            y = args[0]
+        else:
+            x, y = args[-2], args[-1]
+        if upper == 'M':
+            start_x, start_y = x, y
+            command = 'l' if relative else 'L'
+
+    return segments
+
+
+def serialize_path(segments, precision, keep_zero_length=False, offset=(0.0, 0.0)):
+    """
+    Write absolute segments as compact relative path data.
+
+    Every delta is taken from the rounded pen position, so rounding error
+    stays under one unit of the last decimal instead of accumulating along
+    the path. Zero-length line segments
+    are dropped unless keep_zero_length (stroked paths draw caps on them).
+    offset translates the whole path. Returns (d, segment count).
+    """
+    scale = 10 ** precision
+    pen_x = pen_y = start_x = start_y = 0.0
+    parts = []
+    previous = None
+    last_number = None
+    count = 0
+
+    def delta(target, pen):
+        return round((target - pen) * scale) / scale
+
+    for command, args in segments:
+        if command == 'Z':
+            letter, numbers = 'z', []
+            pen_x, pen_y = start_x, start_y
+        elif command == 'M':
+            dx, dy = delta(args[0] + offset[0], pen_x), delta(args[1] + offset[1], pen_y)
+            letter, numbers = 'm', [dx, dy]
+            pen_x += dx
+            pen_y += dy
+            start_x, start_y = pen_x, pen_y
+        elif command in ('L', 'H', 'V'):
+            target_x = args[0] + offset[0] if command != 'V' else pen_x
+            target_y = args[-1] + offset[1] if command != 'H' else pen_y
+            dx = delta(target_x, pen_x) if command != 'V' else 0.0
+            dy = delta(target_y, pen_y) if command != 'H' else 0.0
+            if dx == 0 and dy == 0 and not keep_zero_length:
+                continue
+            if dy == 0 and command != 'V':
+                letter, numbers = 'h', [dx]
+            elif dx == 0:
+                letter, numbers = 'v', [dy]
+            else:
+                letter, numbers = 'l', [dx, dy]
+            pen_x += dx
+            pen_y += dy
+        elif command == 'A':
+            dx, dy = delta(args[5] + offset[0], pen_x), delta(args[6] + offset[1], pen_y)
+            letter = 'a'
+            numbers = [round(args[0] * scale) / scale, round(args[1] * scale) / scale,
+                       round(args[2] * scale) / scale, args[3], args[4], dx, dy]
+            pen_x += dx
+            pen_y += dy
+        else:
+            numbers = []
+            for i in range(0, len(args), 2):
+                numbers.append(delta(args[i] + offset[0], pen_x))
+                numbers.append(delta(args[i + 1] + offset[1], pen_y))
+            letter = command.lower()
+            pen_x += numbers[-2]
+            pen_y += numbers[-1]
+
+        count += 1
+        texts = [format_number(n, precision) for n in numbers]
+        if letter == 'a':
+            # Arc flags stay separated; some renderers reject packed flags
+            parts.append('a' + ','.join(texts))
+            last_number = None
+        elif letter != previous or letter in 'mz':
+            parts.append(letter + join_numbers(texts))
+            last_number = texts[-1] if texts else None
+        else:
+            parts.append(join_numbers(texts, last_number))
+            last_number = texts[-1]
+        previous = letter
+
+    return ''.join(parts), count
+
+
+def optimize_path_data(d, precision, keep_zero_length=False, offset=(0.0, 0.0)):
+    """Returns (new d, segments before, segments after)."""
+    segments = parse_path(d)
+    new_d, count = serialize_path(segments, precision, keep_zero_length, offset)
+    return new_d, len(segments), count
+
+
+# =============================================================================
+# Document
+# =============================================================================
+
+def split_protected(content):
+    """
+    Split content into (head, body).
+
+    head runs through </metadata> (or the <svg> tag when there is no
+    metadata) and holds the copyright comment and RDF block; it is never
+    rewritten.
+    """
+    end = content.find('</metadata>')
+    if end >= 0:
+        end += len('</metadata>')
+    else:
+        match = re.search(r'<svg[^>]*>', content)
+        if not match:
+            return None, content
+        end = match.end()
+    return content[:end], content[end:]
+
+
+def format_attributes(attributes):
+    return ''.join(f' {name}="{value}"' if '"' not in value else f" {name}='{value}'"
+                   for name, value in attributes)
+
+
+class IconStats:
+    def __init__(self):
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.commands_before = 0
+        self.commands_after = 0
+
+    def add(self, other):
+        self.bytes_before += other.bytes_before
+        self.bytes_after += other.bytes_after
+        self.commands_before += other.commands_before
+        self.commands_after += other.commands_after
+
+
+def optimize_body(body, precision, referenced_ids, stats):
+    """Optimize the elements after the protected head."""
+    out = []
+    # One entry per open element: (name, index of its start tag in out, inherited presentation values)
+    stack = [('svg', -1, {})]
+
+    for token in TOKEN.findall(body):
+        if token.startswith('<!--'):
+            continue
+        if not token.startswith('<') or token.startswith('<!['):
+            if token.strip() or any(name in KEEP_WHITESPACE for name, _, _ in stack):
+                out.append(token)
+            continue
+        tag = TAG.match(token)
+        if not tag or token.startswith('<?') or token.startswith('<!'):
+            out.append(token)
+            continue
+
+        closing, name, attribute_text, self_closing = tag.groups()
+        if closing:
+            open_name, start_index, _ = stack.pop() if len(stack) > 1 else (name, -1, {})
+            if open_name in REMOVABLE_WHEN_EMPTY and start_index == len(out) - 1:
+                out.pop()
+            else:
+                out.append(f'</{name}>')
+            continue
+
+        inherited = stack[-1][2]
+        attributes = [(a, v if v is not None else v2) for a, v, v2 in ATTRIBUTE.findall(attribute_text)]
+        values = dict(attributes)
+        kept = []
+        offset = (0.0, 0.0)
+
+        translate = TRANSLATE.match(values.get('transform', ''))
+        if name == 'path' and translate and 'd' in values:
+            offset = (float(translate.group(1)), float(translate.group(2) or 0))
+
+        for attribute, value in attributes:
+            if attribute == 'data-name' or (attribute == 'id' and value not in referenced_ids):
+                continue
+            if attribute == 'transform' and (IDENTITY_TRANSFORM.match(value) or offset != (0.0, 0.0)):
+                continue
+            default = DEFAULT_ATTRIBUTES.get(attribute)
+            if default is not None and same_value(value, default):
+                if attribute in NOT_INHERITED or same_value(inherited.get(attribute, default), default):
+                    continue
+            if attribute in ZERO_DEFAULTS.get(name, ()) and same_value(value, '0'):
+                continue
+            if attribute in NUMERIC_ATTRIBUTES and NUMBER.fullmatch(value.strip()):
+                value = format_number(float(value), precision)
+            elif attribute == 'points':
+                value = round_number_list(value, precision)
+            elif attribute == 'd' and name == 'path':
+                stroked = not same_value(values.get('stroke', inherited.get('stroke', 'none')), 'none')
+                value, before, after = optimize_path_data(value, precision, stroked, offset)
+                stats.commands_before += before
+                stats.commands_after += after
+            kept.append((attribute, value))
+
+        child_inherited = inherited
+        presentation = {a: v for a, v in attributes if a in DEFAULT_ATTRIBUTES and a not in NOT_INHERITED}
+        if presentation:
+            child_inherited = {**inherited, **presentation}
+
+        if name == 'path' and not any(a == 'd' for a, _ in kept):
+            continue
+        out.append(f'<{name}{format_attributes(kept)}{"/" if self_closing else ""}>')
+        if not self_closing:
+            stack.append((name, len(out) - 1, child_inherited))
+
+    return ''.join(out)
+
+
+def same_value(value, default):
+    value = value.strip()
+    if value == default:
+        return True
+    try:
+        return float(value) == float(default)
+    except ValueError:
+        return False
+
+
+def optimize_svg(content, precision=DEFAULT_PRECISION):
+    """Returns (optimized content, IconStats); raises ValueError on bad path data."""
+    stats = IconStats()
+    stats.bytes_before = len(content.encode('utf-8'))
+
+    head, body = split_protected(content)
+    if head is None:
+        raise ValueError("no <svg> tag")
+    referenced_ids = set(re.findall(r'#([\w:.-]+)', content))
+    body = optimize_body(body, precision, referenced_ids, stats)
+    new_content = head + '\n' + body
+    if content.endswith('\n'):
+        new_content = new_content.rstrip('\n') + '\n'
+    if STAMPED_HASH.search(head):
+        # Keep the stamp's path data hash in step with the rewritten paths
+        file_hash = generate_file_hash(new_content)
+        new_content = STAMPED_HASH.sub(lambda m: m.group(1) + file_hash, head, count=1) + new_content[len(head):]
+
+    stats.bytes_after = len(new_content.encode('utf-8'))
+    return new_content, stats
+
+
+def optimize_file(filepath, precision=DEFAULT_PRECISION, dry_run=False):
+    """Optimize one SVG in place. Returns IconStats, or None if it was skipped."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    try:
+        new_content, stats = optimize_svg(content, precision)
+    except ValueError as e:
+        print(f"  Error: {filepath}: {e}")
+        return None
+    if new_content != content and not dry_run:
+        write_atomic(filepath, new_content)
+    return stats
+
+
+def print_stats(label, stats):
+    saved = stats.bytes_before - stats.bytes_after
+    percent = 100 * saved / stats.bytes_before if stats.bytes_before else 0
+    print(f"  {label:<28} {stats.bytes_before:>9,} -> {stats.bytes_after:>9,} bytes ({percent:5.1f}% smaller)"
+          f"  commands {stats.commands_before:>6,} -> {stats.commands_after:>6,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimizes MapIcons SVG files in place.")
+    parser.add_argument('target', help="SVG file or directory")
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION,
+                        help=f"Decimal places kept in coordinates (default {DEFAULT_PRECISION})")
+    parser.add_argument('--dry-run', action='store_true', help="Report savings without writing files")
+    args = parser.parse_args()
+
+    if os.path.isfile(args.target):
+        files = [args.target]
+    elif os.path.isdir(args.target):
+        files = sorted(path for path, _ in find_svgs(args.target))
+    else:
+        print(f"Error: {args.target} not found")
+        sys.exit(1)
+
+    print(f"\nOptimizing {len(files)} SVG files (precision {args.precision})"
+          f"{' - dry run' if args.dry_run else ''}")
+    print("=" * 50)
+
+    total = IconStats()
+    for filepath in files:
+        stats = optimize_file(filepath, args.precision, args.dry_run)
+        if stats is not None:
+            print_stats(os.path.basename(filepath), stats)
+            total.add(stats)
+
+    print("-" * 50)
+    print_stats("Total", total)
+
+
+if __name__ == '__main__':
+    main()